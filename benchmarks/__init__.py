@@ -0,0 +1 @@
+"""Performance benchmarks for the application's hot views and utilities, run with the run_benchmarks command."""
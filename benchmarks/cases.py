@@ -0,0 +1,103 @@
+"""The benchmarked hot paths, and the sizes of synthetic data (as created by seed_scale) they are measured against."""
+
+from django.core.cache import cache
+from django.test import RequestFactory
+
+from charts import views as chart_views
+from quizzes.models import Topic
+from quizzes.utils import quiz_builder
+from quizzes.utils.quiz_logger import process_results
+from quizzes.views import HomeView, TopicDetailView
+from users.models import User
+
+# seed_scale options for each size of data
+SIZES = {
+    'small': {'topics': 10, 'words': 200, 'students': 50, 'days': 14},
+    'medium': {'topics': 50, 'words': 2000, 'students': 1000, 'days': 30},
+    'large': {'topics': 100, 'words': 5000, 'students': 10000, 'days': 30},
+}
+
+
+def get_benchmark_data():
+    """Choose the student, teacher and Topic to benchmark with: the first student, and the largest live Topic."""
+    student = User.objects.filter(is_teacher=False).order_by('id').first()
+    teacher, _ = User.objects.get_or_create(username='benchmark_teacher', defaults={'is_teacher': True})
+    topic = Topic.live_topics().order_by('-word_count', 'id').first()
+    return {'student': student, 'teacher': teacher, 'topic': topic}
+
+
+def _get_request(user, headers=None, **params):
+    request = RequestFactory().get('/', params, headers=headers)
+    request.user = user
+    return request
+
+
+def _call_view(view, user, params=None, headers=None, **kwargs):
+    def call():
+        response = view(_get_request(user, headers, **(params or {})), **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    return call
+
+
+def _uncached(call):
+    # as the first of several teachers to open the Dashboard, before response_cache holds its aggregates (the cache
+    # cleared is the benchmarks' own, set up by run_benchmarks)
+    def clear_and_call():
+        cache.clear()
+        return call()
+    return clear_and_call
+
+
+def _not_modified(view, user, params):
+    # the ETag is taken from the first (unmeasured) run, as the cache entry it describes is cleared by earlier cases
+    headers = {}
+
+    def call():
+        if not headers:
+            headers['If-None-Match'] = view(_get_request(user, **params))['ETag']
+        return view(_get_request(user, headers, **params))
+    return call
+
+
+def get_cases(data):
+    """Get a list of (name, callable) pairs, one for each benchmarked view or utility."""
+    student, teacher, topic = data['student'], data['teacher'], data['topic']
+    quiz = quiz_builder.get_quiz(student, topic.id)
+    results = {str(question['word_id']): i % 2 == 0 for i, question in enumerate(quiz['questions'])}
+    last_30_days = {'date_range': 30}
+    topic_filters = {'topic': topic.pk, **last_30_days}
+    compact = {'format': 'compact'}
+
+    return [
+        ('HomeView', _call_view(HomeView.as_view(), student)),
+        ('TopicDetailView', _call_view(TopicDetailView.as_view(), student, pk=topic.pk)),
+        ('quiz_builder.get_quiz', lambda: quiz_builder.get_quiz(student, topic.id)),
+        ('quiz_logger.process_results', lambda: process_results(results, student, topic.id)),
+        ('progress', _call_view(chart_views.progress, student)),
+        ('dashboard', _call_view(chart_views.dashboard, teacher)),
+        ('api: progress', _call_view(chart_views.get_progress_data, student)),
+        ('api: progress (compact)', _call_view(chart_views.get_progress_data, student, compact)),
+        ('api: dashboard', _call_view(chart_views.get_dashboard_data, teacher)),
+        ('api: dashboard (uncached)', _uncached(_call_view(chart_views.get_dashboard_data, teacher))),
+        ('api: dashboard (compact)', _call_view(chart_views.get_dashboard_data, teacher, compact)),
+        ('api: filter-date-student', _call_view(chart_views.get_filtered_data_student, student, last_30_days)),
+        ('api: filter-date-teacher', _call_view(chart_views.get_filtered_data_teacher, teacher, last_30_days)),
+        ('api: filter-date-teacher (uncached)', _uncached(_call_view(chart_views.get_filtered_data_teacher, teacher,
+                                                                     last_30_days))),
+        ('api: filter-date-topic', _call_view(chart_views.get_filtered_data_topic, teacher, topic_filters)),
+        ('api: filter-date-topic (compact)', _call_view(chart_views.get_filtered_data_topic, teacher,
+                                                        {**topic_filters, **compact})),
+        ('api: filter-date-topic (uncached)', _uncached(_call_view(chart_views.get_filtered_data_topic, teacher,
+                                                                   topic_filters))),
+        ('api: updatable-charts (student)', _call_view(chart_views.get_updatable_charts, student, last_30_days)),
+        ('api: updatable-charts (teacher)', _call_view(chart_views.get_updatable_charts, teacher, last_30_days)),
+        ('api: updatable-charts (teacher, compact)', _call_view(chart_views.get_updatable_charts, teacher,
+                                                                {**last_30_days, **compact})),
+        ('api: updatable-charts (teacher, uncached)', _uncached(_call_view(chart_views.get_updatable_charts, teacher,
+                                                                           last_30_days))),
+        ('api: updatable-charts (teacher, not modified)', _not_modified(chart_views.get_updatable_charts, teacher,
+                                                                        last_30_days)),
+        ('api: points-per-day', _call_view(chart_views.get_points_per_day, student)),
+    ]
@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from benchmarks import cases, runner
+from users.models import User
+
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmarks',
+    }
+}
+
+
+class Command(BaseCommand):
+    """Terminal command for timing the application's hot views and utilities at several sizes of synthetic data."""
+    help = 'Time each hot view and utility against a throwaway database of synthetic data at each size, recording ' \
+           'wall time, SQL query count and peak memory. Optionally save the results as a JSON baseline, and flag ' \
+           'any regressions against a previous baseline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', choices=cases.SIZES, default=['small', 'medium'],
+                            help='Sizes of data to benchmark against (large takes several minutes to create).')
+        parser.add_argument('-r', '--repeat', type=int, default=5, help='Number of timed runs of each case.')
+        parser.add_argument('-o', '--output', help='Save the results to this JSON file, as a future baseline.')
+        parser.add_argument('-b', '--baseline', help='Compare the results with those saved in this JSON file.')
+        parser.add_argument('-t', '--threshold', type=float, default=0.5,
+                            help='Fractional increase in time or memory over the baseline that counts as a regression.')
+        parser.add_argument('-w', '--workers', type=int, default=1,
+                            help='Number of processes used to create the data.')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the data for each size (in benchmark_<size>.sqlite3), and reuse it next time.')
+
+    def handle(self, *args, **options):
+        baseline = {}
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)['results']
+
+        results = {}
+        # the benchmarks clear the cache between runs, so they are given one of their own rather than the site's
+        with tempfile.TemporaryDirectory() as directory, override_settings(DEBUG=False, CACHES=BENCHMARK_CACHES):
+            for size in options['sizes']:
+                if options['keepdb']:
+                    database = settings.BASE_DIR / f'benchmark_{size}.sqlite3'
+                else:
+                    database = os.path.join(directory, f'benchmark_{size}.sqlite3')
+                results[size] = self._benchmark_size(size, database, options)
+                self._write_results(size, results[size], baseline.get(size, {}))
+
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump({'created': timezone.now().isoformat(), 'repeat': options['repeat'], 'results': results},
+                          output_file, indent=2)
+            self.stdout.write(f"Results saved to {options['output']}")
+
+        regressions = runner.compare(baseline, results, options['threshold'])
+        for size, name, metric, previous, current in regressions:
+            self.stderr.write(f"REGRESSION ({size}) {name}: {metric} {previous} -> {current}")
+        if regressions:
+            raise CommandError(f"{len(regressions)} regressions against the baseline.")
+
+    def _benchmark_size(self, size, database, options):
+        """Create (or reuse) the database for this size of data, then measure every case against it."""
+        if connection.vendor != 'sqlite':
+            raise CommandError("Benchmarks are only supported on SQLite.")
+
+        old_name = connection.settings_dict['NAME']
+        connection.settings_dict['TEST']['NAME'] = database
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=options['keepdb'])
+        cache.clear()  # anything cached refers to the previous database
+        try:
+            if not User.objects.filter(is_teacher=False).exists():
+                self.stdout.write(f"Creating {size} data...")
+                seed_options = [f'--{option}={value}' for option, value in cases.SIZES[size].items()]
+                call_command('seed_scale', *seed_options, workers=options['workers'], stdout=self.stdout)
+
+            measurements = {}
+            for name, func in cases.get_cases(cases.get_benchmark_data()):
+                measurements[name] = runner.measure(func, options['repeat'])
+            return measurements
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            cache.clear()
+
+    def _write_results(self, size, measurements, baseline):
+        self.stdout.write(f"\n{size}:")
+        for name, result in measurements.items():
+            line = f"  {name:<46} {result['time_ms']:>9.2f} ms {result['queries']:>4} queries " \
+                   f"{result['peak_memory_kb']:>9.1f} KB"
+            if 'response_kb' in result:
+                line += f" {result['response_kb']:>8.1f} KB sent"
+            previous = baseline.get(name)
+            if previous and previous['time_ms']:
+                line += f"  ({(result['time_ms'] - previous['time_ms']) / previous['time_ms']:+.0%} time)"
+            self.stdout.write(line)
@@ -0,0 +1,83 @@
+"""This module measures each benchmark case, and compares the measurements with those of a previous baseline."""
+
+import statistics
+import time
+import tracemalloc
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+# differences smaller than these are treated as noise, however large they are relative to the baseline
+MIN_TIME_DIFFERENCE_MS = 0.5
+MIN_MEMORY_DIFFERENCE_KB = 64
+
+
+def _run_and_roll_back(func):
+    """Run the function inside a transaction that is always rolled back, so every run sees the same data."""
+    with transaction.atomic():
+        result = func()
+        transaction.set_rollback(True)
+    return result
+
+
+def measure(func, repeat=5):
+    """Measure the function's wall time (the median and fastest of the repeated runs), SQL query count and peak memory.
+    If the function returns a response, its size is measured too.
+
+    A first, unmeasured run warms up the caches. Queries and memory are measured in runs of their own, as capturing
+    either one slows down the function.
+    """
+    response = _run_and_roll_back(func)
+
+    times = []
+    for _ in range(repeat):
+        with transaction.atomic():
+            start = time.perf_counter()
+            func()
+            times.append((time.perf_counter() - start) * 1000)
+            transaction.set_rollback(True)
+
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as context:
+            func()
+        transaction.set_rollback(True)
+
+    tracemalloc.start()
+    try:
+        _run_and_roll_back(func)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    measurements = {
+        'time_ms': round(statistics.median(times), 3),
+        'min_time_ms': round(min(times), 3),
+        'queries': len(context.captured_queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+    if hasattr(response, 'content'):
+        measurements['response_kb'] = round(len(response.content) / 1024, 1)
+    return measurements
+
+
+def compare(baseline, results, threshold=0.5):
+    """Compare results with a baseline, both of the form {size: {case: measurements}}.
+
+    Returns a list of (size, case, metric, baseline value, new value) for each regression: any increase in the number
+    of queries, or an increase in time or peak memory of more than the threshold (a fraction of the baseline value).
+    """
+    regressions = []
+    for size, cases in results.items():
+        for name, measurements in cases.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+
+            if measurements['queries'] > previous['queries']:
+                regressions.append((size, name, 'queries', previous['queries'], measurements['queries']))
+            for metric, min_difference in (('time_ms', MIN_TIME_DIFFERENCE_MS),
+                                           ('peak_memory_kb', MIN_MEMORY_DIFFERENCE_KB)):
+                difference = measurements[metric] - previous[metric]
+                if difference > previous[metric] * threshold and difference > min_difference:
+                    regressions.append((size, name, metric, previous[metric], measurements[metric]))
+    return regressions
@@ -0,0 +1,73 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import TestCase
+
+from benchmarks import cases, runner
+from quizzes.models import QuizResults
+from users.models import User
+
+
+class MeasureTests(TestCase):
+    def test_measurements(self):
+        result = runner.measure(lambda: list(QuizResults.objects.all()), repeat=3)
+        self.assertEquals(result['queries'], 1)
+        self.assertGreater(result['time_ms'], 0)
+        self.assertLessEqual(result['min_time_ms'], result['time_ms'])
+        self.assertGreater(result['peak_memory_kb'], 0)
+        self.assertNotIn('response_kb', result)
+
+    def test_response_size(self):
+        result = runner.measure(lambda: HttpResponse(b'x' * 2048), repeat=1)
+        self.assertEquals(result['response_kb'], 2)
+
+    def test_changes_are_rolled_back(self):
+        usernames = []
+
+        def create_user():
+            self.assertFalse(User.objects.exists())
+            usernames.append(User.objects.create_user(username='benchmark').username)
+
+        runner.measure(create_user, repeat=2)
+        self.assertEquals(len(usernames), 5)  # a warm up, the timed runs, then one run each for queries and memory
+        self.assertFalse(User.objects.exists())
+
+
+class CompareTests(TestCase):
+    baseline = {'small': {'home': {'time_ms': 10, 'queries': 5, 'peak_memory_kb': 1000}}}
+
+    def compare(self, **measurements):
+        return runner.compare(self.baseline, {'small': {'home': {**self.baseline['small']['home'], **measurements}},
+                                              'large': {'home': {'time_ms': 1000, 'queries': 50,
+                                                                 'peak_memory_kb': 10000}}})
+
+    def test_no_change(self):
+        self.assertEquals(self.compare(), [])
+
+    def test_any_extra_query_is_a_regression(self):
+        self.assertEquals(self.compare(queries=6), [('small', 'home', 'queries', 5, 6)])
+
+    def test_time_within_threshold(self):
+        self.assertEquals(self.compare(time_ms=14.9), [])
+
+    def test_time_over_threshold(self):
+        self.assertEquals(self.compare(time_ms=15.1), [('small', 'home', 'time_ms', 10, 15.1)])
+
+    def test_memory_over_threshold(self):
+        self.assertEquals(self.compare(peak_memory_kb=1600), [('small', 'home', 'peak_memory_kb', 1000, 1600)])
+
+    def test_improvements_are_not_regressions(self):
+        self.assertEquals(self.compare(time_ms=1, queries=1, peak_memory_kb=1), [])
+
+
+class CasesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_scale', '--topics', '3', '--words', '30', '--students', '3', '--days', '3',
+                     stdout=StringIO())
+
+    def test_every_case_runs(self):
+        for name, func in cases.get_cases(cases.get_benchmark_data()):
+            with self.subTest(name):
+                func()
@@ -0,0 +1,39 @@
+import datetime
+import gzip
+
+from django.core.management import BaseCommand, CommandError
+
+from charts.utils import exports
+
+
+class Command(BaseCommand):
+    """Terminal command for exporting the students' raw QuizResults or WordScores, as the Dashboard's export links do."""
+    help = 'Export the QuizResults or WordScores of every student (or only those matching the filters) as CSV or ' \
+           'NDJSON, to a file or the standard output. Rows are written a chunk at a time, in constant memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=list(exports.EXPORTS), help='The data to export.')
+        parser.add_argument('-f', '--format', choices=list(exports.FORMATS), default='csv', dest='file_format')
+        parser.add_argument('-o', '--output', help='File to write to, instead of the standard output.')
+        parser.add_argument('-z', '--gzip', action='store_true', help='Compress the export with gzip.')
+        parser.add_argument('--student', type=int, help='Only export the data of the student with this id.')
+        parser.add_argument('--topic', type=int, help='Only export the data of the Topic with this id.')
+        parser.add_argument('--date-from', type=datetime.date.fromisoformat, help='First date (YYYY-MM-DD) to export.')
+        parser.add_argument('--date-to', type=datetime.date.fromisoformat, help='Last date (YYYY-MM-DD) to export.')
+
+    def handle(self, *args, **kwargs):
+        filters = {field: kwargs[field] for field in ('student', 'topic', 'date_from', 'date_to')}
+        chunks = exports.encode(kwargs['name'], filters, kwargs['file_format'])
+
+        if not kwargs['output']:
+            if kwargs['gzip']:
+                raise CommandError("An --output file is required to compress the export.")
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        open_file = gzip.open if kwargs['gzip'] else open
+        with open_file(kwargs['output'], 'wt', encoding='utf-8', newline='') as output:
+            for chunk in chunks:
+                output.write(chunk)
+        self.stdout.write(f"Exported {kwargs['name']} to {kwargs['output']}.")
@@ -5,25 +5,114 @@
 
 /**
  * Asynchronously retrieves data from the server and hands it to an Updater function to display.
+ * The data is kept (for the rest of the browser session) along with its ETag, which is sent back with the next request
+ * for the same URL: if the server answers 304 Not Modified, the data kept from last time is displayed instead.
+ * The data is requested (and kept) in the compact format, and expanded by expandData before it is displayed.
  * @param {(Chart[]|Chart|Element[])} target - An HTML element (or array of HTML elements) to be updated with new data.
  * @param {String} url - A String representing a URL to use for the GET request.
  * @param {Function} updaterFunc - A Function that updates the target with the retrieved data.
  */
 function updateData(target, url, updaterFunc) {
-    fetch(url, {
-        headers:{
-            'Accept': 'application/json',
-            'X-Requested-With': 'XMLHttpRequest', // necessary to work with request.is_ajax()
-        },
-    })
+    url += (url.includes('?') ? '&' : '?') + 'format=compact';
+    const stored = getStoredResponse(url);
+    const headers = {
+        'Accept': 'application/json',
+        'X-Requested-With': 'XMLHttpRequest', // necessary to work with request.is_ajax()
+    };
+    if (stored) {
+        headers['If-None-Match'] = stored.etag;
+    }
+
+    // bypass the browser's own cache, so that a 304 response reaches this code
+    fetch(url, {headers: headers, cache: 'no-store'})
         .then(response => {
-            return response.json(); // convert response to JSON
+            if (response.status === 304 && stored) {
+                return stored.data;
+            }
+            return response.json().then(data => {
+                storeResponse(url, response.headers.get('ETag'), data);
+                return data;
+            });
         })
         .then(data => {
-            updaterFunc(target, data);
+            updaterFunc(target, expandData(data));
         })
 }
 
+/**
+ * Expands data received in the compact format back into the format expected by the Updater functions and Chart.JS.
+ * i.e. tables are given as columns, chart colours as indices into a palette, and date labels as offsets in days.
+ * @param data - The compact data retrieved by updateData's asynchronous request.
+ * @returns - The same data, in full.
+ */
+function expandData(data) {
+    if (Array.isArray(data)) {
+        return data.map(expandData);
+    }
+    if (data === null || typeof data !== 'object') {
+        return data;
+    }
+    if ('columns' in data) {
+        return data.columns.length ? data.columns[0].map((_, i) => data.columns.map(column => column[i])) : [];
+    }
+    if ('palette' in data) {
+        return expandChart(data);
+    }
+    return Object.fromEntries(Object.entries(data).map(([key, value]) => [key, expandData(value)]));
+}
+
+/**
+ * Expands Chart.JS data received in the compact format (see expandData).
+ * @param chartData - The compact data for a single chart.
+ * @returns {{labels: Array, datasets: Object[]}} - The data for the chart, in full.
+ */
+function expandChart(chartData) {
+    let labels = chartData.labels;
+    if (!Array.isArray(labels)) {
+        const base = new Date(labels.base + 'T00:00:00Z');
+        labels = labels.offsets.map(days => new Date(base.getTime() + days * 86400000).toISOString().slice(0, 10));
+    }
+
+    const datasets = chartData.datasets.map(({colours, ...dataset}) => {
+        const pairs = colours.map(i => chartData.palette[i]);
+        // a single colour is shared by every point in the dataset
+        dataset.backgroundColor = pairs.length === 1 ? pairs[0][0] : pairs.map(pair => pair[0]);
+        dataset.borderColor = pairs.length === 1 ? pairs[0][1] : pairs.map(pair => pair[1]);
+        return dataset;
+    });
+    return {labels: labels, datasets: datasets};
+}
+
+/**
+ * Gets the data (and its ETag) last retrieved from the given URL, if any.
+ * @param {String} url - A String representing the URL the data was retrieved from.
+ * @returns {?{etag: String, data}} - The stored ETag and data, or null.
+ */
+function getStoredResponse(url) {
+    try {
+        return JSON.parse(sessionStorage.getItem('chart-data:' + url));
+    } catch (error) {
+        return null;
+    }
+}
+
+/**
+ * Keeps the data retrieved from the given URL, along with its ETag, in session storage.
+ * @param {String} url - A String representing the URL the data was retrieved from.
+ * @param {?String} etag - The ETag header of the response, or null if it had none.
+ * @param data - The raw data retrieved by updateData's asynchronous request.
+ */
+function storeResponse(url, etag, data) {
+    if (!etag) {
+        return;
+    }
+    try {
+        sessionStorage.setItem('chart-data:' + url, JSON.stringify({etag: etag, data: data}));
+    } catch (error) {
+        // storage is full or unavailable, so the data will simply be retrieved in full next time
+    }
+}
+
 /**
  * Updates the innerText displayed in the 'box' elements in the Dashboard UI.
  * @param {Element[]} boxes - An array of HTML Elements to be updated with new data.
@@ -73,7 +162,15 @@ function tableUpdater(tableBody, tableData) {
         tableBody.removeChild(tableBody.firstChild);
     }
 
-    // add new rows (and cells)
+    appendRows(tableBody, tableData);
+}
+
+/**
+ * Adds rows received by updateData() to the end of the given table, e.g. the next page of a paginated table.
+ * @param {HTMLTableElement} tableBody - A reference to a <tbody> HTML Element.
+ * @param tableData - The raw data retrieved by updateData's asynchronous request.
+ */
+function appendRows(tableBody, tableData) {
     tableData.forEach(row => {
         let newRow = tableBody.insertRow(-1);
 
@@ -84,6 +181,38 @@ function tableUpdater(tableBody, tableData) {
     })
 }
 
+/**
+ * Replaces the rows in the Weakest Words table with data received by updateData().
+ * @param {HTMLTableElement} tableBody - A reference to a <tbody> HTML Element.
+ * @param wordsData - An array of [origin, target, % correct] rows.
+ */
+function weakestWordsUpdater(tableBody, wordsData) {
+    tableUpdater(tableBody, wordsData.map(([origin, target, pc]) => [origin, target, pc + '%']));
+}
+
+/**
+ * Replaces the rows in the Longest Streaks table with data received by updateData().
+ * @param {HTMLTableElement} tableBody - A reference to a <tbody> HTML Element.
+ * @param streaksData - An array of [student name, streak] rows.
+ */
+function streaksUpdater(tableBody, streaksData) {
+    tableUpdater(tableBody, streaksData.map(([student, streak]) => [student, formatDays(streak)]));
+    if (!streaksData.length) {
+        const cell = tableBody.insertRow(-1).insertCell(-1);
+        cell.colSpan = 2;
+        cell.innerText = 'No streaks to display.';
+    }
+}
+
+/**
+ * Formats a number of days for display, e.g. "1 day" or "3 days".
+ * @param {Number} days - The number of days.
+ * @returns {String} - The formatted number of days.
+ */
+function formatDays(days) {
+    return days + (days === 1 ? ' day' : ' days');
+}
+
 /**
  * Returns the template of common Chart settings for building the Chart objects.
  * @param {String} chartType - A String representing the type of Chart to be created.
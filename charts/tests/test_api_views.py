@@ -6,6 +6,7 @@ from django.test import TestCase
 from django.urls import reverse
 
 from charts.utils.chart_data import PTS_PER_DAY_DATERANGE
+from charts.utils.chart_tools import compact
 from quizzes.models import QuizResults, Topic
 from users.models import User
 
@@ -40,6 +41,35 @@ class BaseAPIViewTests(TestCase):
     def test_when_no_students(self):
         self.student.delete()
 
+    def test_not_modified(self):
+        response = self.client.get(self.path)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEquals(304, response.status_code)
+
+    def test_modified_by_new_quiz(self):
+        etag = self.client.get(self.path)['ETag']
+        topic = Topic.objects.create(name='Animals')
+        QuizResults.objects.create(student=self.student, topic=topic, correct_answers=1, points=10)
+
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(200, response.status_code)
+        self.assertNotEqual(etag, response['ETag'])
+
+    def test_modified_by_edited_quiz(self):
+        topic = Topic.objects.create(name='Animals')
+        quiz_results = QuizResults.objects.create(student=self.student, topic=topic, correct_answers=1, points=10)
+        etag = self.client.get(self.path)['ETag']
+
+        # the latest id and count of the QuizResults are unchanged
+        quiz_results.points = 20
+        quiz_results.save()
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(200, response.status_code)
+        self.assertNotEqual(etag, response['ETag'])
+
 
 class BaseTeachersOnlyAPIViewTests(BaseAPIViewTests):
     """
@@ -153,6 +183,13 @@ class FilteredDataDateTopicTests(BaseTeachersOnlyAPIViewTests):
         expected = [["test user", 0]]
         self.assertJSONEqual(actual, expected)
 
+    def test_invalid_page(self):
+        expected = self.client.get(self.path).json()
+        for page in ('x', '', '-2'):
+            response = self.client.get(self.path, {'page': page})
+            self.assertEquals(200, response.status_code)
+            self.assertEquals(expected, response.json())
+
 
 class UpdatableChartsTests(BaseAPIViewTests):
     @classmethod
@@ -210,8 +247,8 @@ class GetPointsPerDayTests(BaseAPIViewTests):
         response = self.client.get(self.path)
         response_dict = json.loads(response.content)
 
-        # labels should contain an entry for each day in PTS_PER_DAY_DATERANGE
-        start_date = datetime.date.today() - datetime.timedelta(PTS_PER_DAY_DATERANGE)
+        # labels should contain an entry for each day in PTS_PER_DAY_DATERANGE, up to and including today
+        start_date = datetime.date.today() - datetime.timedelta(PTS_PER_DAY_DATERANGE - 1)
         labels = [str(start_date + datetime.timedelta(num)) for num in range(PTS_PER_DAY_DATERANGE)]
         points = [0 for _ in range(PTS_PER_DAY_DATERANGE)]
 
@@ -222,3 +259,56 @@ class GetPointsPerDayTests(BaseAPIViewTests):
         super().test_when_no_students()
         self.client.force_login(self.teacher)
         self.test_points_per_day_no_data()
+
+
+class BundledDataTests(TestCase):
+    """Each page's bundled data should match what the separate API views give for the same filters."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='test_teacher', password='test_user1234', is_teacher=True)
+        cls.student = User.objects.create_user(username='test_user', password='test_user1234', first_name='test',
+                                               last_name='user')
+        cls.topic = Topic.objects.create(name='Animals')
+        QuizResults.objects.create(student=cls.student, topic=cls.topic, correct_answers=10, incorrect_answers=5,
+                                   points=100)
+        QuizResults.objects.create(student=cls.student, topic=cls.topic, correct_answers=4, incorrect_answers=1,
+                                   points=40, date_created=datetime.date.today() - datetime.timedelta(9))
+
+    def get_json(self, name, query=''):
+        response = self.client.get(reverse(name) + query)
+        self.assertEquals(200, response.status_code)
+        return response.json()
+
+    def test_dashboard_data(self):
+        self.client.force_login(self.teacher)
+        for query in ('', '?date_range=7'):
+            data = self.get_json('data-dashboard', query)
+            self.assertEquals(self.get_json('filter-date-teacher', query), data['filtered_data'])
+            self.assertEquals(self.get_json('data-updatable-charts', query), data['updatable_charts'])
+            self.assertEquals(self.get_json('filter-date-topic', query), data['points_per_student'])
+
+        self.assertEquals({'active_students': 1, 'quizzes_taken': 1, 'points_earned': 100}, data['filtered_data'])
+
+    def test_progress_data(self):
+        self.client.force_login(self.student)
+        for query in ('', '?date_range=7'):
+            data = self.get_json('data-progress', query)
+            self.assertEquals(self.get_json('filter-date-student', query), data['filtered_data'])
+            self.assertEquals(self.get_json('data-updatable-charts', query), data['updatable_charts'])
+            self.assertEquals(self.get_json('data-points-per-day', query), data['points_per_day'])
+
+        self.assertEquals({'points_earned': 100, 'quizzes_taken': 1, 'correct_pc': '67%'}, data['filtered_data'])
+
+    def test_dashboard_data_not_accessible_to_students(self):
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('data-dashboard'))
+        self.assertRedirects(response, reverse('login') + '?next=' + reverse('data-dashboard'))
+
+    def test_compact_format(self):
+        self.client.force_login(self.teacher)
+        data = self.get_json('data-dashboard')
+        compact_data = self.get_json('data-dashboard', '?format=compact')
+        self.assertEquals(json.loads(json.dumps(compact(data))), compact_data)
+        self.assertEquals(compact_data['points_per_student'], {'columns': [['test user'], [140]]})
+        self.assertLess(len(self.client.get(reverse('data-dashboard') + '?format=compact').content),
+                        len(self.client.get(reverse('data-dashboard')).content))
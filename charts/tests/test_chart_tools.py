@@ -1,7 +1,10 @@
+import datetime
+import json
+
 from django.test import SimpleTestCase
 
 from charts.utils import chart_tools
-from charts.utils.chart_tools import _unzip, _get_colours
+from charts.utils.chart_tools import _unzip, _get_colours, compact, encode_compact, prepare_data
 
 
 class ChartToolsTests(SimpleTestCase):
@@ -48,3 +51,26 @@ class ChartToolsTests(SimpleTestCase):
         actual = _get_colours(5, empty_preset_palette)
         expected = []
         self.assertEquals(expected, actual)
+
+    def test_compact_chart(self):
+        chart = prepare_data([("a", 1), ("b", 2), ("c", 3)], "Points", _get_colours(2))
+        expected = {
+            "labels": ["a", "b", "c"],
+            "datasets": [{"label": "Points", "data": [1, 2, 3], "colours": [0, 1], "borderWidth": 2, "tension": 0.2}],
+            "palette": list(zip(*_get_colours(2))),
+        }
+        self.assertEquals(expected, compact(chart))
+
+    def test_compact_single_colour_and_dates(self):
+        today = datetime.date.today()
+        chart = prepare_data([(today, 5), (today + datetime.timedelta(7), 0)], "Points", ['area', 'border'])
+        compacted = compact(chart)
+        self.assertEquals({"base": today.isoformat(), "offsets": [0, 7]}, compacted['labels'])
+        self.assertEquals([0], compacted['datasets'][0]['colours'])
+        self.assertEquals([('area', 'border')], compacted['palette'])
+
+    def test_compact_tables(self):
+        data = {"table": [("Student 1", 10), ("Student 2", 0)], "empty": [], "overview": {"points": 10}}
+        expected = {"table": {"columns": [["Student 1", "Student 2"], [10, 0]]}, "empty": [], "overview": {"points": 10}}
+        self.assertEquals(expected, compact(data))
+        self.assertEquals(json.dumps(expected, separators=(',', ':')), encode_compact(data))
@@ -0,0 +1,97 @@
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from charts.utils import exports
+from quizzes.models import QuizResults, Topic, Word, WordScore
+from users.models import User
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='test_teacher', password='test_user1234', is_teacher=True)
+        cls.student = User.objects.create_user(username='test_user', password='test_user1234')
+        cls.other_student = User.objects.create_user(username='other_user')
+        cls.topic = Topic.objects.create(name='Animals')
+        cls.word = Word.objects.create(origin='chat', target='cat')
+        cls.word.topics.add(cls.topic)
+        cls.today = datetime.date.today()
+        for student, days_ago in ((cls.student, 0), (cls.student, 10), (cls.other_student, 0), (cls.teacher, 0)):
+            QuizResults.objects.create(student=student, topic=cls.topic, correct_answers=3, incorrect_answers=1,
+                                       points=30, date_created=cls.today - datetime.timedelta(days_ago))
+        WordScore.objects.create(word=cls.word, student=cls.student, times_seen=4, times_correct=3)
+
+    def export(self, name, query='', headers=None):
+        self.client.force_login(self.teacher)
+        return self.client.get(reverse('export-data', args=[name]) + query, headers=headers)
+
+    def test_quiz_results_csv(self):
+        response = self.export('quiz-results')
+        self.assertEquals(200, response.status_code)
+        self.assertTrue(response.streaming)
+        self.assertEquals('attachment; filename="quiz-results.csv"', response['Content-Disposition'])
+
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEquals(list(exports.EXPORTS['quiz-results']['columns']), rows[0])
+        # teachers' own results are left out, as in the charts
+        self.assertEquals(['test_user', 'test_user', 'other_user'], [row[2] for row in rows[1:]])
+
+    def test_filters(self):
+        response = self.export('quiz-results', f'?student={self.student.pk}&date_range=7')
+        self.assertEquals(2, len(b''.join(response.streaming_content).splitlines()))
+
+    def test_word_scores_ndjson(self):
+        response = self.export('word-scores', f'?format=ndjson&topic={self.topic.pk}')
+        self.assertEquals('application/x-ndjson', response['Content-Type'])
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEquals(1, len(rows))
+        self.assertEquals({'student__username': 'test_user', 'word__origin': 'chat', 'times_seen': 4,
+                           'next_review': self.today.isoformat()},
+                          {key: rows[0][key] for key in ('student__username', 'word__origin', 'times_seen',
+                                                         'next_review')})
+
+    def test_gzip(self):
+        response = self.export('quiz-results', headers={'Accept-Encoding': 'gzip'})
+        self.assertEquals('gzip', response['Content-Encoding'])
+        self.assertEquals(4, len(gzip.decompress(b''.join(response.streaming_content)).splitlines()))
+
+    def test_unknown_export(self):
+        self.assertEquals(404, self.export('passwords').status_code)
+        self.assertEquals(404, self.export('quiz-results', '?format=xml').status_code)
+
+    def test_not_accessible_to_students(self):
+        self.client.force_login(self.student)
+        path = reverse('export-data', args=['quiz-results'])
+        self.assertRedirects(self.client.get(path), reverse('login') + '?next=' + path)
+
+    def test_encoded_in_chunks(self):
+        with mock.patch('charts.utils.exports.CHUNK_SIZE', 2):
+            chunks = list(exports.encode('quiz-results', {'student': None, 'topic': None, 'date_from': None,
+                                                          'date_to': None}, 'csv'))
+        self.assertEquals([1, 2, 1], [len(chunk.splitlines()) for chunk in chunks])
+
+    def test_command(self):
+        stdout = io.StringIO()
+        call_command('export_data', 'quiz-results', '--format=ndjson', f'--student={self.other_student.pk}',
+                     stdout=stdout)
+        self.assertEquals(['other_user'], [json.loads(line)['student__username'] for line in
+                                           stdout.getvalue().splitlines()])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'export.csv.gz')
+            call_command('export_data', 'word-scores', '--gzip', f'--output={path}', stdout=io.StringIO())
+            with gzip.open(path, 'rt') as export_file:
+                self.assertEquals(2, len(export_file.readlines()))
+
+        with self.assertRaises(CommandError):
+            call_command('export_data', 'word-scores', '--gzip', stdout=io.StringIO())
@@ -0,0 +1,105 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, RequestFactory
+from django.urls import reverse
+
+from charts.utils import response_cache
+from charts.utils.chart_data import get_filters
+from quizzes.models import QuizResults, Topic
+from users.models import User
+
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='test_teacher', password='test_user1234', is_teacher=True)
+        cls.student = User.objects.create_user(username='test_user', password='test_user1234')
+        cls.topic = Topic.objects.create(name='Animals')
+        cls.other_topic = Topic.objects.create(name='Colours')
+
+    def setUp(self):
+        cache.clear()
+        self.computed = 0
+
+    def compute(self):
+        self.computed += 1
+        return self.computed
+
+    def get_filters(self, **params):
+        request = RequestFactory().get('/', params)
+        request.user = self.teacher
+        return get_filters(request)
+
+    def test_cached_until_results_change(self):
+        filters = self.get_filters()
+        self.assertEquals(1, response_cache.get_or_compute('test', filters, self.compute))
+        self.assertEquals(1, response_cache.get_or_compute('test', filters, self.compute))
+
+        QuizResults.objects.create(student=self.student, topic=self.topic, correct_answers=1, points=10)
+        self.assertEquals(2, response_cache.get_or_compute('test', filters, self.compute))
+
+    def test_only_invalidated_by_results_in_scope(self):
+        filters = self.get_filters(topic=self.topic.pk)
+        response_cache.get_or_compute('test', filters, self.compute)
+
+        QuizResults.objects.create(student=self.student, topic=self.other_topic, correct_answers=1, points=10)
+        self.assertEquals(1, response_cache.get_or_compute('test', filters, self.compute))
+
+        QuizResults.objects.create(student=self.student, topic=self.topic, correct_answers=1, points=10)
+        self.assertEquals(2, response_cache.get_or_compute('test', filters, self.compute))
+
+    def test_equivalent_filters_share_an_entry(self):
+        date_from = (datetime.date.today() - datetime.timedelta(7)).isoformat()
+        response_cache.get_or_compute('test', self.get_filters(date_range=7), self.compute)
+        self.assertEquals(1, response_cache.get_or_compute('test', self.get_filters(date_from=date_from), self.compute))
+        self.assertEquals(2, response_cache.get_or_compute('test', self.get_filters(date_range=6), self.compute))
+
+    def test_stale_entry_served_while_recomputed(self):
+        filters = self.get_filters()
+        response_cache.get_or_compute('test', filters, self.compute)
+        QuizResults.objects.create(student=self.student, topic=self.topic, correct_answers=1, points=10)
+
+        # another request is recomputing the entry
+        cache.add(response_cache.LOCK_KEY.format(response_cache._get_key('test', filters)), 'other')
+        self.assertEquals(1, response_cache.get_or_compute('test', filters, self.compute))
+        self.assertEquals(1, self.computed)
+
+    def test_waits_for_entry_being_computed(self):
+        filters = self.get_filters()
+        key = response_cache._get_key('test', filters)
+        cache.add(response_cache.LOCK_KEY.format(key), 'other')
+
+        def other_request_finishes(seconds):
+            versions = response_cache.daily_results.get_versions(['all'])
+            response_cache._compute(key, versions, lambda: 'computed elsewhere')
+
+        with mock.patch('charts.utils.response_cache.time.sleep', side_effect=other_request_finishes):
+            self.assertEquals('computed elsewhere', response_cache.get_or_compute('test', filters, self.compute))
+        self.assertEquals(0, self.computed)
+
+    def test_students_listed_by_topic_view_are_current(self):
+        self.client.force_login(self.teacher)
+        path = reverse('filter-date-topic') + f'?topic={self.topic.pk}'
+        self.client.get(path)
+
+        User.objects.create_user(username='new_user', first_name='new', last_name='student')
+        data = self.client.get(path).json()
+        self.assertIn(['new student', 0], data)
+
+    def test_etag_matches_stale_entry_served(self):
+        self.client.force_login(self.teacher)
+        path = reverse('filter-date-teacher')
+        etag = self.client.get(path)['ETag']
+        QuizResults.objects.create(student=self.student, topic=self.topic, correct_answers=1, points=10)
+
+        # while another request recomputes the entry, the outdated one is served, so the browser's copy is still current
+        lock_key = response_cache.LOCK_KEY.format(response_cache._get_key('filtered-data-teacher', get_filters()))
+        cache.add(lock_key, 'other')
+        self.assertEquals(304, self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code)
+
+        cache.delete(lock_key)
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(200, response.status_code)
+        self.assertNotEqual(etag, response['ETag'])
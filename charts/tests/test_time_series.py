@@ -0,0 +1,94 @@
+import datetime
+
+from django.test import TestCase, SimpleTestCase
+from django.urls import reverse
+
+from charts.utils import time_series
+from charts.utils.chart_data import get_points_per_day_data, PTS_PER_DAY_DATERANGE
+from quizzes.models import DailyResults, QuizResults, Topic
+from users.models import User
+
+
+class TimeSeriesBucketTests(SimpleTestCase):
+    def test_get_buckets(self):
+        date_from, date_to = datetime.date(2023, 11, 29), datetime.date(2024, 1, 3)
+        self.assertEquals(time_series.get_buckets(date_from, date_to, time_series.DAY)[-3:],
+                          [datetime.date(2024, 1, 1), datetime.date(2024, 1, 2), datetime.date(2024, 1, 3)])
+        self.assertEquals(len(time_series.get_buckets(date_from, date_to, time_series.DAY)), 36)
+        # weeks begin on Mondays, as with the database's truncate functions
+        self.assertEquals(time_series.get_buckets(date_from, date_to, time_series.WEEK)[:2],
+                          [datetime.date(2023, 11, 27), datetime.date(2023, 12, 4)])
+        self.assertEquals(time_series.get_buckets(date_from, date_to, time_series.MONTH),
+                          [datetime.date(2023, 11, 1), datetime.date(2023, 12, 1), datetime.date(2024, 1, 1)])
+        self.assertEquals(time_series.get_buckets(date_from, date_to, time_series.YEAR),
+                          [datetime.date(2023, 1, 1), datetime.date(2024, 1, 1)])
+
+    def test_get_period(self):
+        date_to = datetime.date(2024, 1, 1)
+        self.assertEquals(time_series.get_period(date_to - datetime.timedelta(59), date_to), time_series.DAY)
+        self.assertEquals(time_series.get_period(date_to - datetime.timedelta(60), date_to), time_series.WEEK)
+        self.assertEquals(time_series.get_period(datetime.date(2020, 1, 1), date_to), time_series.MONTH)
+        self.assertEquals(time_series.get_period(datetime.date(2000, 1, 1), date_to), time_series.YEAR)
+
+    def test_fill_gaps(self):
+        buckets = [1, 2, 3, 4]
+        self.assertEquals(time_series.fill_gaps([(2, 5), (4, 1)], buckets), [(1, 0), (2, 5), (3, 0), (4, 1)])
+        self.assertEquals(time_series.fill_gaps([], buckets, default=None), [(bucket, None) for bucket in buckets])
+
+
+class TimeSeriesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = datetime.date.today()
+        cls.topic = Topic.objects.create(name='Animals')
+        cls.other_topic = Topic.objects.create(name='Colours')
+        cls.student = User.objects.create_user(username='test_student')
+        for days_ago, points, topic in ((0, 10, cls.topic), (0, 5, cls.other_topic), (3, 20, cls.topic),
+                                        (400, 7, cls.topic)):
+            QuizResults.objects.create(student=cls.student, topic=topic, correct_answers=1, points=points,
+                                       date_created=cls.today - datetime.timedelta(days_ago))
+
+    def test_days_filled(self):
+        date_from = self.today - datetime.timedelta(4)
+        series = time_series.get_series(DailyResults.objects.all(), date_from)
+        self.assertEquals([total for _, total in series], [0, 20, 0, 0, 15])
+        self.assertEquals(series[0][0], date_from)
+
+    def test_all_time_downsampled(self):
+        series = time_series.get_series(DailyResults.objects.all())
+        self.assertLessEqual(len(series), time_series.MAX_BUCKETS)
+        # over 400 days, there are too many days but few enough weeks
+        self.assertEquals(series[0], (time_series.truncate(self.today - datetime.timedelta(400), time_series.WEEK), 7))
+        self.assertEquals(sum(total for _, total in series), 42)
+
+    def test_downsampled_range_starts_mid_period(self):
+        # a range of 71 days from a Wednesday is downsampled into weeks, the first of which begins on the Monday before
+        date_from, date_to = datetime.date(2023, 11, 29), datetime.date(2024, 2, 7)
+        for date_created, points in ((datetime.date(2023, 11, 27), 7), (date_from, 3), (date_to, 2)):
+            QuizResults.objects.create(student=self.student, topic=self.topic, correct_answers=1, points=points,
+                                       date_created=date_created)
+
+        series = time_series.get_series(DailyResults.objects.all(), date_from, date_to)
+        self.assertEquals(series[0], (datetime.date(2023, 11, 27), 3))
+        self.assertEquals(series[-1], (datetime.date(2024, 2, 5), 2))
+
+    def test_points_per_day(self):
+        data = get_points_per_day_data(self.student, self.today - datetime.timedelta(13))
+        self.assertEquals(data['labels'][-1], self.today)
+        self.assertEquals(data['datasets'][0]['data'][-4:], (20, 0, 0, 15))
+
+        data = get_points_per_day_data(self.student)
+        self.assertEquals(sum(data['datasets'][0]['data']), 42)
+
+    def test_points_per_day_range(self):
+        self.client.force_login(self.student)
+        path = reverse('data-points-per-day')
+        self.assertEquals(len(self.client.get(path).json()['labels']), PTS_PER_DAY_DATERANGE)
+        self.assertEquals(len(self.client.get(path, {'date_range': 30}).json()['labels']), 31)
+
+        # all time is downsampled, and has a validator of its own
+        etag = self.client.get(path)['ETag']
+        response = self.client.get(path, {'date_range': ''}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(200, response.status_code)
+        self.assertEquals(sum(response.json()['datasets'][0]['data']), 42)
+        self.assertLessEqual(len(response.json()['labels']), time_series.MAX_BUCKETS)
@@ -1,7 +1,10 @@
+import datetime
+
 from django.test import TestCase
 from django.urls import reverse
 
 from charts.forms import DateFilterForm, StudentDateFilterForm
+from quizzes.models import MAX_SCORE, Topic, Word, WordScore
 from users.models import User
 
 
@@ -35,27 +38,35 @@ class ProgressTests(TestCase):
         form = response.context.get('form')
         self.assertIsInstance(form, DateFilterForm)
 
-    def test_progress_context_when_no_student_data(self):
-        response = self.client.get(self.path)
-        words_due = response.context.get('words_due_revision')
-        words_memorised = response.context.get('words_memorised')
-        streak = response.context.get('current_streak')
-        self.assertEquals(words_due, 0)
-        self.assertEquals(words_memorised, 0)
-        self.assertEquals(streak, 0)
-
-    def test_progress_context_when_no_students(self):
+    def test_progress_data_when_no_student_data(self):
+        overview = self.client.get(reverse('data-progress')).json()['overview']
+        self.assertEquals(overview['words_due_revision'], 0)
+        self.assertEquals(overview['words_memorised'], 0)
+        self.assertEquals(overview['current_streak'], 0)
+
+    def test_progress_data_when_no_students(self):
         # Remove any students in the database
         User.objects.filter(is_teacher=False).delete()
 
         self.client.force_login(self.teacher)
-        response = self.client.get(self.path)
-        words_due = response.context.get('words_due_revision')
-        words_memorised = response.context.get('words_memorised')
-        streak = response.context.get('current_streak')
-        self.assertEquals(words_due, 0)
-        self.assertEquals(words_memorised, 0)
-        self.assertEquals(streak, 0)
+        overview = self.client.get(reverse('data-progress')).json()['overview']
+        self.assertEquals(overview['words_due_revision'], 0)
+        self.assertEquals(overview['words_memorised'], 0)
+        self.assertEquals(overview['current_streak'], 0)
+
+    def test_progress_words_memorised(self):
+        topic = Topic.objects.create(name='Animals')
+        words = [Word.objects.create(origin=f'origin {i}', target=f'target {i}') for i in range(3)]
+        topic.words.add(*words)
+        other_student = User.objects.create_user(username='other_user', password='test_user1234')
+        WordScore.objects.create(student=self.student, word=words[0], consecutive_correct=MAX_SCORE)
+        WordScore.objects.create(student=self.student, word=words[1], consecutive_correct=1)
+        WordScore.objects.create(student=other_student, word=words[0], consecutive_correct=MAX_SCORE)
+        WordScore.objects.create(student=other_student, word=words[1], consecutive_correct=MAX_SCORE)
+
+        # only the student's own memorised words are counted
+        overview = self.client.get(reverse('data-progress')).json()['overview']
+        self.assertEquals(overview['words_memorised'], 1)
 
 
 class DashboardTests(TestCase):
@@ -98,14 +109,23 @@ class DashboardTests(TestCase):
         self.assertIsInstance(date_filter, DateFilterForm)
         self.assertIsInstance(student_filter, StudentDateFilterForm)
 
-    def test_dashboard_context_when_no_students(self):
+    def test_dashboard_data_when_no_students(self):
         # Remove any students in the database
         User.objects.filter(is_teacher=False).delete()
 
-        response = self.client.get(self.path)
-        live_topics = response.context.get('live_topics')
-        live_words = response.context.get('live_words')
-        students_registered = response.context.get('students_registered')
-        self.assertEquals(live_topics, 0)
-        self.assertEquals(live_words, 0)
-        self.assertEquals(students_registered, 0)
+        overview = self.client.get(reverse('data-dashboard')).json()['overview']
+        self.assertEquals(overview['live_topics'], 0)
+        self.assertEquals(overview['live_words'], 0)
+        self.assertEquals(overview['students_registered'], 0)
+
+    def test_dashboard_longest_streaks(self):
+        today = datetime.date.today()
+        for i, (streak, last_quiz_date) in enumerate(((4, today), (9, today - datetime.timedelta(1)), (2, today),
+                                                      (30, today - datetime.timedelta(2)), (1, today))):
+            User.objects.create_user(username=f'streaker_{i}', first_name='Student', last_name=str(i),
+                                     streak=streak, last_quiz_date=last_quiz_date)
+
+        # the 30-day streak has been broken, so is not shown
+        response = self.client.get(reverse('data-dashboard'))
+        self.assertEquals([['Student 1', 9], ['Student 0', 4], ['Student 2', 2]],
+                          response.json()['student_streaks'])
@@ -1,13 +1,17 @@
 from django.urls import path
 from .views import progress, get_filtered_data_student, dashboard, get_updatable_charts, \
-    get_filtered_data_teacher, get_points_per_day, get_filtered_data_topic
+    get_filtered_data_teacher, get_points_per_day, get_filtered_data_topic, get_progress_data, get_dashboard_data, \
+    export_data
 
 urlpatterns = [
     path('progress/', progress, name='progress'),
     path('dashboard/', dashboard, name='dashboard'),
+    path('api/progress/', get_progress_data, name='data-progress'),
+    path('api/dashboard/', get_dashboard_data, name='data-dashboard'),
     path('api/filter-date-student/', get_filtered_data_student, name='filter-date-student'),
     path('api/filter-date-teacher/', get_filtered_data_teacher, name='filter-date-teacher'),
     path('api/filter-date-topic/', get_filtered_data_topic, name='filter-date-topic'),
     path('api/updatable-charts/', get_updatable_charts, name='data-updatable-charts'),
     path('api/points-per-day/', get_points_per_day, name='data-points-per-day'),
+    path('export/<str:name>/', export_data, name='export-data'),
 ]
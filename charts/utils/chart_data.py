@@ -1,24 +1,82 @@
 """This module defines functions that represent the specific Django ORM queries used by the Charts Views."""
 
 import datetime
+import hashlib
 
-from django.db.models import Sum, Count, CharField, Value
-from django.db.models.functions import Concat
+from django.db.models import Sum, Count, Max, CharField, F, Value
+from django.db.models.functions import Coalesce, Concat
 
+from charts.utils import time_series
 from charts.utils.chart_tools import prepare_data
-from quizzes.models import QuizResults, WordScore
+from quizzes.models import DailyResults, Leaderboard, QuizResults, WordScore, WordStats, Topic, Word, ACCURACY, \
+    MAX_SCORE
+from quizzes.utils import daily_results, leaderboards
+from quizzes.utils.due_counts import get_words_due
 from users.models import User
 
-PTS_PER_DAY_DATERANGE = 14  # number of days to display on Progress template linechart
+PTS_PER_DAY_DATERANGE = 14  # number of days (including today) to display on Progress template linechart
 MAX_WEAKEST_WORDS = 10  # maximum number of the weakest words to display
 MAX_STREAKS = 3  # maximum number of students to display in the longest streaks table
+POINTS_PER_STUDENT_PAGE_SIZE = 50  # number of students to display per page of the points per student table
 
 
 def get_filtered_queryset(request):
-    """Get the base QuizResults queryset for the data visualisations, applying the desired GET URL parameters."""
-    qs = QuizResults.objects.filter(student__is_teacher=False)
+    """Get the base queryset for the data visualisations, applying the desired GET URL parameters.
 
-    # extract filter settings from GET request, apply to queryset
+    The queryset is of DailyResults, so each row totals a student's quizzes in a Topic on one day.
+    """
+    return _apply_filters(request, DailyResults.objects.filter(student__is_teacher=False), 'date')
+
+
+def get_results_etag(request):
+    """Get a validator for the filtered charts data, cheap enough to compute before any of the data itself.
+
+    It is made from the latest id and the number of QuizResults within the filters (read from an index alone), so it
+    changes whenever a quiz within them is taken or deleted, along with the daily_results version tokens of the
+    results, which also change when a quiz is edited. Teachers' data lists every student, so their validator also
+    changes when a student joins, leaves or is renamed. Date ranges are relative to today, so it also changes every day.
+    """
+    filters = get_filters(request)
+    qs = filter_queryset(QuizResults.objects.all(), filters, 'date_created')
+    scopes = daily_results.get_scopes(filters['student'], filters['topic'])
+    if request.user.is_teacher:
+        # an edit only replaces the versions of its student and of all the results
+        scopes += ['all', 'students']
+    parts = [qs.aggregate(latest=Max('id'), count=Count('id')), daily_results.get_versions(scopes)]
+    if request.user.is_teacher:
+        parts.append(User.objects.filter(is_teacher=False).aggregate(latest=Max('id'), count=Count('id')))
+    return _make_etag(request, parts)
+
+
+def get_points_per_day_etag(request):
+    """Get a validator for the student's Points Per Day data over the range in the request, as get_results_etag."""
+    date_from, date_to = get_points_per_day_range(request)
+    filters = {'student': request.user.id, 'topic': None, 'date_from': date_from, 'date_to': date_to}
+    qs = filter_queryset(QuizResults.objects.all(), filters, 'date_created')
+    versions = daily_results.get_versions(daily_results.get_scopes(request.user.id))
+    return _make_etag(request, [qs.aggregate(latest=Max('id'), count=Count('id')), versions])
+
+
+def get_entry_etag(request, entry):
+    """Get a validator for data served from a response_cache entry, made from the versions and time it was computed
+    with, so that it always describes the data actually sent (however outdated the entry)."""
+    return _make_etag(request, [entry['versions'], entry['computed_at']])
+
+
+def _make_etag(request, parts):
+    # the same URL gives different data to each user, on each day
+    validator = repr([request.user.pk, request.get_full_path(), datetime.date.today().isoformat()] + parts)
+    return hashlib.md5(validator.encode()).hexdigest()
+
+
+def get_filters(request=None):
+    """Get the filters in the GET URL parameters, normalised (e.g. with date ranges resolved to dates), so that requests
+    for the same data give the same filters. Without a request, gives the filters for the whole class's data."""
+    filters = {'student': None, 'topic': None, 'date_from': None, 'date_to': None}
+    if request is None:
+        return filters
+
+    # extract filter settings from GET request
     topic = request.GET.get('topic', None)
     date_range = request.GET.get('date_range', None)
     date_from = request.GET.get('date_from', None)
@@ -28,24 +86,98 @@ def get_filtered_queryset(request):
     if request.user.is_teacher:
         filter_student = request.GET.get('student', None)
         if filter_student:
-            qs = qs.filter(student_id=filter_student)
+            filters['student'] = int(filter_student)
     else:
-        qs = qs.filter(student_id=request.user.id)
+        filters['student'] = request.user.id
 
     # apply filters available to students and teachers
     if topic:
-        qs = qs.filter(topic_id=topic)
+        filters['topic'] = int(topic)
+    dates_from = [datetime.date.fromisoformat(date_from)] if date_from else []
     if date_range:
-        from_date = datetime.date.today() - datetime.timedelta(int(date_range))
-        qs = qs.filter(date_created__gte=from_date)
-    if date_from:
-        qs = qs.filter(date_created__gte=date_from)
+        dates_from.append(datetime.date.today() - datetime.timedelta(int(date_range)))
+    if dates_from:
+        filters['date_from'] = max(dates_from)
     if date_to:
-        qs = qs.filter(date_created__lte=date_to)
+        filters['date_to'] = datetime.date.fromisoformat(date_to)
+
+    return filters
+
+
+def get_points_per_day_range(request):
+    """Get the (date_from, date_to) of the Points Per Day series from the dates in the GET URL parameters, as read by
+    get_filters (so an empty date_range means all time). Without any, the series covers the last PTS_PER_DAY_DATERANGE
+    days."""
+    if not any(field in request.GET for field in ('date_range', 'date_from', 'date_to')):
+        return datetime.date.today() - datetime.timedelta(PTS_PER_DAY_DATERANGE - 1), None
+    filters = get_filters(request)
+    return filters['date_from'], filters['date_to']
+
+
+def _apply_filters(request, qs, date_field):
+    """Apply the filters in the GET URL parameters to a queryset of QuizResults or DailyResults."""
+    return filter_queryset(qs, get_filters(request), date_field)
+
+
+def filter_queryset(qs, filters, date_field, topic_field='topic'):
+    """Apply the filters (as returned by get_filters) to a queryset of a model with a student field, and a field (or
+    lookup, e.g. through a Word) giving its Topic."""
+    if filters['student']:
+        qs = qs.filter(student_id=filters['student'])
+    if filters['topic']:
+        qs = qs.filter(**{topic_field: filters['topic']})
+    if filters['date_from']:
+        qs = qs.filter(**{f'{date_field}__gte': filters['date_from']})
+    if filters['date_to']:
+        qs = qs.filter(**{f'{date_field}__lte': filters['date_to']})
 
     return qs
 
 
+def get_dashboard_overview_data():
+    """Get the unfiltered totals shown at the top of the Dashboard page."""
+    live_topics = Topic.live_topics()
+    return {
+        'live_topics': live_topics.count(),
+        'live_words': Word.objects.filter(topics__in=live_topics.values_list('id')).distinct().count(),
+        'students_registered': User.objects.filter(is_teacher=False, is_active=True).count(),
+    }
+
+
+def get_progress_overview_data(student):
+    """Get the unfiltered totals shown at the top of the student's Progress page."""
+    return {
+        'words_due_revision': get_words_due(student),
+        'words_memorised': WordScore.objects.filter(student=student, consecutive_correct__gte=MAX_SCORE).count(),
+        'current_streak': QuizResults.get_user_streak(student),
+    }
+
+
+def get_class_totals_data(qs):
+    """Get the totals shown in the Dashboard's filtered 'databoxes' from the filtered Queryset."""
+    return qs.aggregate(active_students=Count('student', distinct=True),
+                        quizzes_taken=Coalesce(Sum('quizzes_taken'), 0),
+                        points_earned=Coalesce(Sum('points'), 0))
+
+
+def get_student_totals_data(qs):
+    """Get the totals shown in the Progress page's filtered 'databoxes' from the filtered Queryset."""
+    # calculate percentage of correct answers (or "N/A" if no quizzes completed in timeframe)
+    pc = qs.aggregate(total_correct=Sum('correct_answers'), total_incorrect=Sum('incorrect_answers'),
+                      total_points=Sum('points'), quizzes_taken=Sum('quizzes_taken'))
+    total_questions = int(pc['total_correct'] or 0) + int(pc['total_incorrect'] or 0)
+    if total_questions > 0:
+        correct_pc = f"{(pc['total_correct'] / total_questions):.0%}"
+    else:
+        correct_pc = "N/A"
+
+    return {
+        "points_earned": pc['total_points'] or 0,
+        "quizzes_taken": pc['quizzes_taken'] or 0,
+        "correct_pc": correct_pc,
+    }
+
+
 def get_updatable_charts_data(qs):
     """Get the data required for the updatable charts data based on the filtered Queryset."""
     if not qs.exists():
@@ -66,21 +198,20 @@ def _get_points_per_topic_data(qs):
 
 def _get_quizzes_per_topic_data(qs):
     """Helper function that defines the Quizzes Per Topic query, packages it up with labels."""
-    quizzes_per_topic = qs.values('topic__name').annotate(quizzes_taken=Count('id'))\
-        .values_list("topic__name", "quizzes_taken")
+    quizzes_per_topic = qs.values('topic__name').annotate(total_quizzes=Sum('quizzes_taken'))\
+        .values_list("topic__name", "total_quizzes")
     label = "Quizzes"
     return prepare_data(quizzes_per_topic, label)
 
 
 def get_weakest_words_data(student=False):
-    """Get a list of the Words with the worst % incorrect attempts, either for individual student or whole class."""
-    scores = WordScore.objects.all()
-    if student:
-        scores = WordScore.objects.filter(student=student)
-
-    weakest_words = list(scores.values('word').annotate(incorrect_pc=Sum('times_correct')*100/Sum('times_seen'))
-                         .order_by('incorrect_pc')
-                         .values_list('word__origin', 'word__target', 'incorrect_pc')[:MAX_WEAKEST_WORDS])
+    """Get a list of the Words with the worst % correct attempts, either for individual student or whole class."""
+    # read in order from the front of wordscore_student_accuracy_idx or wordstats_accuracy_idx
+    scores = WordScore.objects.filter(student=student) if student else WordStats.objects.all()
+    weakest = scores.annotate(accuracy=ACCURACY).order_by('accuracy')\
+        .values_list('word__origin', 'word__target', 'times_correct', 'times_seen')[:MAX_WEAKEST_WORDS]
+    weakest_words = [(origin, target, times_correct * 100 // times_seen)
+                     for origin, target, times_correct, times_seen in weakest]
 
     # Top up the data so there are enough rows to fill the intended table
     while len(weakest_words) < MAX_WEAKEST_WORDS:
@@ -93,31 +224,22 @@ def get_student_streaks_data():
     """Get a list of the students with the longest streaks."""
     yesterday = datetime.date.today() - datetime.timedelta(1)
 
-    # concatenates first and last names within the query itself
-    streaks = list(QuizResults.objects.filter(student__is_teacher=False, date_created__gte=yesterday)
-                   .annotate(
-        full_name=Concat('student__first_name', Value(' '), 'student__last_name', output_field=CharField()))
-                   .values('student', 'full_name', 'student__streak').distinct()
-                   .values_list('full_name', 'student__streak')
-                   .order_by('-student__streak')[:MAX_STREAKS])
+    # only students who have quizzed since yesterday have a current streak (read in order from student_streak_idx)
+    streaks = list(User.objects.filter(is_teacher=False, last_quiz_date__gte=yesterday).order_by('-streak')
+                   .annotate(full_name=Concat('first_name', Value(' '), 'last_name', output_field=CharField()))
+                   .values_list('full_name', 'streak')[:MAX_STREAKS])
     return streaks
 
 
-def get_points_per_day_data(student):
-    """Helper function that actually performs the Points Per Day query, packages it up with labels."""
-    today = datetime.date.today()
-    date_from = today - datetime.timedelta(PTS_PER_DAY_DATERANGE)
-    student_results = QuizResults.objects.filter(student=student, date_created__gte=date_from)
-    points_per_day = list(student_results.values('date_created').annotate(total_points=Sum('points'))
-                          .order_by('date_created').values_list('date_created', 'total_points'))
+def get_points_per_day_data(student, date_from=None, date_to=None, period=None):
+    """Helper function that actually performs the Points Per Day query, packages it up with labels.
 
-    # fill in missing days
-    if len(points_per_day) < PTS_PER_DAY_DATERANGE:
-        dates_present = [data_point[0] for data_point in points_per_day]
-        for day in range(PTS_PER_DAY_DATERANGE):
-            date = date_from + datetime.timedelta(day)
-            if date not in dates_present:
-                points_per_day.insert(day, (date, 0))
+    The series covers the given dates (as given by get_points_per_day_range), from the student's first result if there
+    is no date_from, and up to today if there is no date_to. Long ranges are downsampled into weeks (or months, etc.)
+    unless a period is given, see time_series.
+    """
+    points_per_day = time_series.get_series(DailyResults.objects.filter(student=student), date_from, date_to,
+                                            period=period)
 
     # line charts look better with same colour nodes
     colours = ['rgba(75, 192, 192, 1)', 'rgba(75, 192, 192, 1)']
@@ -126,25 +248,55 @@ def get_points_per_day_data(student):
     return prepare_data(points_per_day, label, colours)
 
 
-def get_points_per_student_data(qs):
-    """Helper function that actually performs the Points Per Student Per Topic query, packages it up with labels."""
-    # only includes students who have completed a quiz within date range
-    present_student_data = list(qs.values('student')
-                                .annotate(total=Sum('points'),
-                                          full_name=Concat('student__first_name', Value(' '), 'student__last_name'))
-                                .values_list('full_name', 'total')
-                                .order_by('-total', 'student__last_name'))
-
-    # get students who have no quiz data
-    missing_student_data = list(User.objects.filter(is_teacher=False)
-                                .exclude(quizresults__in=qs)
-                                .annotate(full_name=Concat('first_name', Value(' '), 'last_name'), total=Value(0))
-                                .values_list('full_name', 'total')
-                                .order_by('last_name'))
+def get_points_per_student_data(qs, filters=None, page=None):
+    """Helper function that actually performs the Points Per Student Per Topic query, packages it up with labels.
 
-    final_data = present_student_data + missing_student_data
+    If a page is given, only that page of the table is returned. When the filters (as returned by get_filters) match
+    one of the preset date ranges, the students' totals are read from the precomputed Leaderboard instead of qs.
+    """
+    window = get_leaderboard_window(filters) if filters else None
+    board = leaderboards.get_board(filters['topic'], window) if window is not None else None
+    if board is None:
+        # only includes students who have completed a quiz within date range
+        present = qs.values('student') \
+            .annotate(total=Sum('points'), full_name=Concat('student__first_name', Value(' '), 'student__last_name'))
+        present_students = qs.values('student')
+    else:
+        present = board.entries \
+            .annotate(total=F('points'), full_name=Concat('student__first_name', Value(' '), 'student__last_name'))
+        present_students = board.entries.values('student')
+    # ties are broken by name, then by id so that each student appears on exactly one page
+    present = present.values_list('full_name', 'total').order_by('-total', 'student__last_name', 'student')
 
-    if final_data:
+    # get students who have no quiz data
+    missing = User.objects.filter(is_teacher=False) \
+        .exclude(pk__in=present_students) \
+        .annotate(full_name=Concat('first_name', Value(' '), 'last_name'), total=Value(0)) \
+        .values_list('full_name', 'total') \
+        .order_by('last_name', 'pk')
+
+    if page is None:
+        final_data = list(present) + list(missing)
+    else:
+        # the missing students follow on from the present ones, so are only counted once the present ones run out
+        start = (page - 1) * POINTS_PER_STUDENT_PAGE_SIZE
+        final_data = list(present[start:start + POINTS_PER_STUDENT_PAGE_SIZE])
+        if len(final_data) < POINTS_PER_STUDENT_PAGE_SIZE:
+            start = max(0, start - present.count())
+            final_data += list(missing[start:start + POINTS_PER_STUDENT_PAGE_SIZE - len(final_data)])
+
+    if final_data or page not in (None, 1):
         return final_data
     else:
         return [['No Students Registered!', 'N/A']]
+
+
+def get_leaderboard_window(filters):
+    """Get the Leaderboard window matching the filters, or None if they are not of a single Topic (or all Topics) over
+    one of the preset date ranges."""
+    if filters['student'] or filters['date_to']:
+        return None
+    if filters['date_from'] is None:
+        return Leaderboard.ALL_TIME
+    window = (datetime.date.today() - filters['date_from']).days
+    return window if window != Leaderboard.ALL_TIME and window in Leaderboard.WINDOWS else None
@@ -1,5 +1,10 @@
 """This module provides functions for adapting Django queryset data into a format suitable for Chart.JS."""
 
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
 # Colours for use with Chart.JS in rgba format. Each is a tuple of (area-colour, border-colour).
 # e.g. [(area-colour1, border-colour1), (area-colour2, border-colour2)... etc]
 DEFAULT_CHART_PALETTE = (
@@ -67,3 +72,61 @@ def _format_for_chart_js(labels_and_data, colours, label):
             "tension": 0.2,
         }]
     }
+
+
+def compact(data):
+    """Rewrite the charts API data into the compact format, which the browser expands again (see dashboard.js).
+
+    - Chart.JS data lists each distinct (area-colour, border-colour) pair once, as its "palette", and each dataset's
+      colours as indices into it.
+    - Labels which are all dates are given as a base date and the number of days from it to each label.
+    - Tables (lists of equal-length rows) are given as {"columns": [...]}, a list of values for each column.
+
+    Anything else is left as it is, with any dictionaries or lists within it rewritten in turn.
+    """
+    if isinstance(data, dict):
+        if 'labels' in data and 'datasets' in data:
+            return _compact_chart(data)
+        return {key: compact(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        if data and all(isinstance(row, (list, tuple)) for row in data) and len(set(map(len, data))) == 1:
+            return {"columns": [list(column) for column in _unzip(data)]}
+        return [compact(value) for value in data]
+    return data
+
+
+def _compact_chart(chart_data):
+    palette = {}
+    datasets = []
+    for dataset in chart_data['datasets']:
+        background, border = dataset['backgroundColor'], dataset['borderColor']
+        if isinstance(background, str):
+            background, border = [background], [border]
+        # the single colours given by override_colours are shared by every point, so give a single index
+        colours = [palette.setdefault(pair, len(palette)) for pair in zip(background, border)]
+        compacted = {key: value for key, value in dataset.items() if key not in ('backgroundColor', 'borderColor')}
+        compacted['data'] = list(dataset['data'])
+        compacted['colours'] = colours
+        datasets.append(compacted)
+
+    return {
+        "labels": _compact_labels(chart_data['labels']),
+        "datasets": datasets,
+        "palette": list(palette),
+    }
+
+
+def _compact_labels(labels):
+    if labels and all(isinstance(label, datetime.date) for label in labels):
+        base = min(labels)
+        return {"base": base.isoformat(), "offsets": [(label - base).days for label in labels]}
+    return list(labels)
+
+
+# a single encoder, whose C implementation is used for every response as it has no indentation and never sorts keys
+_COMPACT_ENCODER = json.JSONEncoder(separators=(',', ':'), check_circular=False, default=DjangoJSONEncoder().default)
+
+
+def encode_compact(data):
+    """Encode the data in the compact format as JSON, without any whitespace."""
+    return _COMPACT_ENCODER.encode(compact(data))
@@ -0,0 +1,73 @@
+"""This module exports the raw QuizResults and WordScores of the students, as CSV or NDJSON (one JSON object per line).
+
+Rows are read from the database in chunks and encoded a chunk at a time, so an export is written in constant memory
+however many rows it holds, whether it is streamed to the browser or written to a file by the export_data command.
+"""
+
+import csv
+import io
+import itertools
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from charts.utils.chart_data import filter_queryset
+from quizzes.models import QuizResults, WordScore
+
+CHUNK_SIZE = 2000  # rows read from the database, and encoded, at a time
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# for each export, its queryset (as a function of the filters) and the columns taken from it, named by their lookups
+EXPORTS = {
+    'quiz-results': {
+        'get_queryset': lambda filters: filter_queryset(QuizResults.objects.filter(student__is_teacher=False),
+                                                        filters, 'date_created'),
+        'columns': ('id', 'student_id', 'student__username', 'topic_id', 'topic__name', 'date_created',
+                    'correct_answers', 'incorrect_answers', 'points'),
+    },
+    'word-scores': {
+        'get_queryset': lambda filters: filter_queryset(WordScore.objects.filter(student__is_teacher=False),
+                                                        filters, 'last_updated__date', topic_field='word__topics'),
+        'columns': ('id', 'student_id', 'student__username', 'word_id', 'word__origin', 'word__target',
+                    'consecutive_correct', 'times_seen', 'times_correct', 'last_updated', 'next_review'),
+    },
+}
+
+
+def get_rows(name, filters):
+    """Get an iterator over the rows of the named export, as tuples of its columns, read from the database in
+    chunks."""
+    export = EXPORTS[name]
+    return export['get_queryset'](filters) \
+        .order_by('id') \
+        .values_list(*export['columns']) \
+        .iterator(chunk_size=CHUNK_SIZE)
+
+
+def encode(name, filters, file_format):
+    """Get an iterator over the named export encoded in the given format, one chunk of rows (as a string) at a
+    time."""
+    columns = EXPORTS[name]['columns']
+    rows = get_rows(name, filters)
+
+    if file_format == 'csv':
+        yield _encode_csv([columns])
+    while chunk := list(itertools.islice(rows, CHUNK_SIZE)):
+        yield _encode_csv(chunk) if file_format == 'csv' else _encode_ndjson(chunk, columns)
+
+
+def _encode_csv(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+# dates and times are given in ISO 8601 format, as in the charts API views
+_NDJSON_ENCODER = json.JSONEncoder(separators=(',', ':'), default=DjangoJSONEncoder().default)
+
+
+def _encode_ndjson(rows, columns):
+    return ''.join(_NDJSON_ENCODER.encode(dict(zip(columns, row))) + '\n' for row in rows)
@@ -0,0 +1,91 @@
+"""This module caches the aggregates behind the Dashboard (in Django's cache), so that when several teachers open it at
+once, each query is run once and its result shared between them.
+
+Each entry is keyed by the normalised filters it was computed with, and stamped with the version tokens of the results
+it covers (see daily_results.get_versions), which are replaced whenever results within them are added or removed:
+
+- An entry is served while its versions are current, for up to MAX_AGE seconds.
+- Otherwise a single request (across every worker) takes a lock and computes the data afresh. Identical requests made
+  meanwhile are served the outdated entry if it was computed within the last STALE_AGE seconds, or else wait for the
+  new one.
+
+Views validated with an ETag use get_entry, so that their validator is made from the entry actually served (which may
+be outdated, or miss a change recorded only in another worker's cache) rather than from the database.
+"""
+
+import datetime
+import hashlib
+import time
+import uuid
+
+from django.core.cache import cache
+
+from quizzes.utils import daily_results
+
+ENTRY_KEY = 'charts:response:{}'
+LOCK_KEY = 'charts:response-lock:{}'
+MAX_AGE = 60 * 5  # seconds to serve an entry for, even if its versions are current (e.g. Words may have been renamed)
+STALE_AGE = 60  # seconds for which an outdated entry may be served while it is being recomputed
+LOCK_TIMEOUT = 30  # seconds after which a lock is abandoned, in case the request holding it has died
+WAIT_INTERVAL = 0.05  # seconds between checks for the entry being computed by another request
+
+
+def get_or_compute(name, filters, compute, extra_scopes=()):
+    """Get the cached data for the named aggregate and filters (as returned by chart_data.get_filters), calling compute
+    to replace it if it is missing or outdated. extra_scopes names any other version tokens the data depends on."""
+    return get_entry(name, filters, compute, extra_scopes)['data']
+
+
+def get_entry(name, filters, compute, extra_scopes=()):
+    """As get_or_compute, but gives the whole entry served: a dict of its data, the versions it was computed with and
+    the time it was computed at."""
+    key = _get_key(name, filters)
+    scopes = daily_results.get_scopes(filters['student'], filters['topic']) + list(extra_scopes)
+    versions = daily_results.get_versions(scopes)
+
+    entry = cache.get(ENTRY_KEY.format(key))
+    if entry is not None and entry['versions'] == versions and _get_age(entry) < MAX_AGE:
+        return entry
+
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        token = uuid.uuid4().hex
+        if cache.add(LOCK_KEY.format(key), token, timeout=LOCK_TIMEOUT):
+            try:
+                return _compute(key, versions, compute)
+            finally:
+                if cache.get(LOCK_KEY.format(key)) == token:
+                    cache.delete(LOCK_KEY.format(key))
+
+        # another request is already computing the data: serve what it is replacing, if recent enough
+        if entry is not None and _get_age(entry) < STALE_AGE:
+            return entry
+        if time.monotonic() >= deadline:
+            return _make_entry(versions, compute)
+
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(ENTRY_KEY.format(key))
+        if entry is not None and entry['versions'] == versions:
+            return entry
+
+
+def _compute(key, versions, compute):
+    # the versions were read before the data is computed, so any change made meanwhile will outdate the entry
+    entry = _make_entry(versions, compute)
+    cache.set(ENTRY_KEY.format(key), entry, timeout=MAX_AGE + STALE_AGE)
+    return entry
+
+
+def _make_entry(versions, compute):
+    return {'data': compute(), 'versions': versions, 'computed_at': time.time()}
+
+
+def _get_age(entry):
+    return time.time() - entry['computed_at']
+
+
+def _get_key(name, filters):
+    # date ranges have already been resolved to dates, so an entry for the last n days is not served the next day
+    normalised = [name] + [(field, value.isoformat() if isinstance(value, datetime.date) else value)
+                           for field, value in sorted(filters.items())]
+    return hashlib.md5(repr(normalised).encode()).hexdigest()
@@ -0,0 +1,92 @@
+"""This module builds time series for the charts, i.e. the totals of a queryset of DailyResults per day, week, month or
+year over a range of dates.
+
+The totals are grouped by the database, and each series is given a bucket for every period in the range, including
+those without any results. Long ranges (e.g. "All Time") are downsampled to at most MAX_BUCKETS buckets by choosing the
+shortest period which fits.
+"""
+
+import datetime
+
+from django.db.models import F, Min, Sum
+from django.db.models.functions import TruncMonth, TruncWeek, TruncYear
+
+DAY = 'day'
+WEEK = 'week'
+MONTH = 'month'
+YEAR = 'year'
+PERIODS = (DAY, WEEK, MONTH, YEAR)  # from shortest to longest
+MAX_BUCKETS = 60  # maximum number of buckets in a series whose period is chosen automatically
+
+TRUNCATE_FUNCTIONS = {WEEK: TruncWeek, MONTH: TruncMonth, YEAR: TruncYear}
+
+
+def get_series(qs, date_from=None, date_to=None, period=None, total=Sum('points')):
+    """Get the totals of the given DailyResults per period between the given dates, as a list of (bucket, total) pairs
+    in date order, where each bucket is the first date of its period.
+
+    Without a date_from, the series begins at the earliest result, and without a date_to it ends today. If no period is
+    given, the shortest one giving at most MAX_BUCKETS buckets is used.
+    """
+    date_to = date_to or datetime.date.today()
+    if date_from is None:
+        date_from = qs.aggregate(earliest=Min('date'))['earliest'] or date_to
+    period = period or get_period(date_from, date_to)
+    buckets = get_buckets(date_from, date_to, period)
+
+    # the first bucket is labelled with the start of its period, but only counts the results from date_from onwards
+    qs = qs.filter(date__gte=date_from, date__lte=date_to)
+    bucket = F('date') if period == DAY else TRUNCATE_FUNCTIONS[period]('date')
+    rows = qs.annotate(bucket=bucket).values('bucket').annotate(total=total).order_by().values_list('bucket', 'total')
+    return fill_gaps(rows, buckets)
+
+
+def fill_gaps(rows, buckets, default=0):
+    """Give the (bucket, total) rows a row for each of the given buckets in turn, using the default for any missing."""
+    totals = dict(rows)
+    return [(bucket, totals.get(bucket, default)) for bucket in buckets]
+
+
+def get_period(date_from, date_to, max_buckets=MAX_BUCKETS):
+    """Get the shortest period which divides the range of dates into at most max_buckets buckets."""
+    for period in PERIODS[:-1]:
+        if _count_buckets(date_from, date_to, period) <= max_buckets:
+            return period
+    return PERIODS[-1]
+
+
+def get_buckets(date_from, date_to, period):
+    """Get the first date of each period between the given dates (inclusive), in order."""
+    first, last = truncate(date_from, period), truncate(date_to, period)
+    return [_add_periods(first, period, i) for i in range(_count_buckets(first, last, period))]
+
+
+def truncate(date, period):
+    """Get the first date of the period containing the given date, as the database's truncate functions do."""
+    if period == WEEK:
+        return date - datetime.timedelta(date.weekday())
+    if period == MONTH:
+        return date.replace(day=1)
+    if period == YEAR:
+        return date.replace(month=1, day=1)
+    return date
+
+
+def _count_buckets(date_from, date_to, period):
+    first, last = truncate(date_from, period), truncate(date_to, period)
+    if period == DAY:
+        return (last - first).days + 1
+    if period == WEEK:
+        return (last - first).days // 7 + 1
+    if period == MONTH:
+        return (last.year - first.year) * 12 + last.month - first.month + 1
+    return last.year - first.year + 1
+
+
+def _add_periods(date, period, count):
+    if period == DAY:
+        return date + datetime.timedelta(count)
+    if period == WEEK:
+        return date + datetime.timedelta(7 * count)
+    months = count * (12 if period == YEAR else 1) + date.month - 1
+    return date.replace(year=date.year + months // 12, month=months % 12 + 1)
@@ -1,30 +1,35 @@
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Sum, Count
-from django.db.models.functions import Coalesce
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.cache import cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
 
 from charts.forms import DateFilterForm, StudentDateFilterForm, TopicDateFilterForm
+from charts.utils import exports, response_cache
+from charts.utils.chart_tools import encode_compact
 from charts.utils.chart_data import get_points_per_day_data, get_updatable_charts_data, get_filtered_queryset, \
-    get_points_per_student_data, get_weakest_words_data, get_student_streaks_data
-from quizzes.models import Topic, WordScore, MAX_SCORE, Word, QuizResults
-from users.models import User
+    get_points_per_student_data, get_weakest_words_data, get_student_streaks_data, get_results_etag, \
+    get_entry_etag, get_points_per_day_etag, get_points_per_day_range, get_filters, get_dashboard_overview_data, \
+    get_progress_overview_data, get_class_totals_data, get_student_totals_data, MAX_WEAKEST_WORDS, \
+    POINTS_PER_STUDENT_PAGE_SIZE
 
 """
 TEMPLATE VIEWS
+
+Each page is rendered as a shell holding only its filter forms, and its data is then retrieved by a single request to
+the page's bundled API view.
 """
 
 
 @login_required
 def progress(request):
-    """View function responsible for passing all the initial data required by the Progress page."""
+    """View function responsible for rendering the Progress page."""
     context = {
-        "words_due_revision": Topic.all_topics_words_due_revision(request.user).count(),
-        "words_memorised": WordScore.objects.filter(student=request.user,
-                                                    word__wordscore__consecutive_correct__gte=MAX_SCORE).count(),
-        "current_streak": QuizResults.get_user_streak(request.user),
         "date_filter": DateFilterForm("filter-date-student"),
-        "weakest_words": get_weakest_words_data(request.user),
+        "max_weakest_words": MAX_WEAKEST_WORDS,
     }
     return render(request, 'charts/progress.html', context)
 
@@ -32,79 +37,164 @@ def progress(request):
 @login_required
 @user_passes_test(lambda user: user.is_teacher)
 def dashboard(request):
-    """View function responsible for passing all the initial data required by the Dashboard page."""
+    """View function responsible for rendering the Dashboard page."""
     context = {
-        "live_topics": Topic.live_topics().count(),
-        "live_words": Word.objects.filter(topics__in=Topic.live_topics().values_list('id')).distinct().count(),
-        "students_registered": User.objects.filter(is_teacher=False, is_active=True).count(),
         "date_filter": DateFilterForm("filter-date-teacher"),
         "student_filter": StudentDateFilterForm("data-updatable-charts"),
         "topic_filter": TopicDateFilterForm("filter-date-topic"),
-        "weakest_words": get_weakest_words_data(),
-        "student_streaks": get_student_streaks_data(),
+        "max_weakest_words": MAX_WEAKEST_WORDS,
+        "points_page_size": POINTS_PER_STUDENT_PAGE_SIZE,
     }
     return render(request, 'charts/dashboard.html', context)
 
 
 """
-API VIEWS
+BUNDLED API VIEWS
+
+Each bundle holds the data for every widget on a page, with the filtered widgets computed from one filtered queryset.
+They are not conditional, as they include data (e.g. the live Topics) which changes independently of the results.
 """
 
 
-@login_required()
-def get_filtered_data_student(request):
-    """Get the student's filtered data required for the 'databoxes' on the Progress page in JSON format."""
+@login_required
+@cache_control(private=True, no_cache=True)
+def get_progress_data(request):
+    """Get all the data required by the Progress page in JSON format."""
     qs = get_filtered_queryset(request)
+    data = {
+        "overview": get_progress_overview_data(request.user),
+        "filtered_data": get_student_totals_data(qs),
+        "updatable_charts": get_updatable_charts_data(qs),
+        "points_per_day": get_points_per_day_data(request.user, *get_points_per_day_range(request)),
+        "weakest_words": get_weakest_words_data(request.user),
+    }
+    return _json_response(request, data)
 
-    # calculate percentage of correct answers (or "N/A" if no quizzes completed in timeframe)
-    pc = qs.aggregate(total_correct=Sum('correct_answers'), total_incorrect=Sum('incorrect_answers'))
-    total_questions = int(pc['total_correct'] or 0) + int(pc['total_incorrect'] or 0)
-    if total_questions > 0:
-        correct_pc = f"{(pc['total_correct'] / total_questions):.0%}"
-    else:
-        correct_pc = "N/A"
 
+@login_required
+@user_passes_test(lambda user: user.is_teacher)
+@cache_control(private=True, no_cache=True)
+def get_dashboard_data(request):
+    """Get all the data required by the Dashboard page in JSON format."""
+    qs = get_filtered_queryset(request)
+    filters = get_filters(request)
+
+    # the aggregates share their response_cache entries with the separate API views below
     data = {
-        "points_earned": qs.aggregate(total=Sum('points')).get('total') or 0,
-        "quizzes_taken": qs.count(),
-        "correct_pc": correct_pc,
+        "overview": get_dashboard_overview_data(),
+        "filtered_data": response_cache.get_or_compute('filtered-data-teacher', filters,
+                                                       lambda: get_class_totals_data(qs)),
+        "updatable_charts": response_cache.get_or_compute('updatable-charts', filters,
+                                                          lambda: get_updatable_charts_data(qs)),
+        "points_per_student": response_cache.get_or_compute('filtered-data-topic', {**filters, 'page': 1},
+                                                            lambda: get_points_per_student_data(qs, filters, 1),
+                                                            extra_scopes=['students']),
+        "weakest_words": response_cache.get_or_compute('weakest-words', get_filters(), get_weakest_words_data),
+        "student_streaks": get_student_streaks_data(),
     }
-    return JsonResponse(data)
+    return _json_response(request, data)
+
+
+"""
+API VIEWS
+
+Each API view answers 304 Not Modified if the validator (ETag) sent by the browser shows it already has the latest data.
+Browsers must revalidate every time, as the data changes whenever a quiz is taken. The Dashboard's aggregates are also
+shared between teachers via response_cache, and the validator of each of these is made from the cache entry served.
+Every API view (including the bundles) gives the compact format if asked.
+"""
+
+
+@login_required()
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=get_results_etag)
+def get_filtered_data_student(request):
+    """Get the student's filtered data required for the 'databoxes' on the Progress page in JSON format."""
+    data = get_student_totals_data(get_filtered_queryset(request))
+    return _json_response(request, data)
 
 
 @login_required
 @user_passes_test(lambda user: user.is_teacher)
+@cache_control(private=True, no_cache=True)
 def get_filtered_data_teacher(request):
     """Get the filtered data required for the 'databoxes' on the Dashboard page in JSON format."""
-    qs = get_filtered_queryset(request)
-    data = qs.aggregate(active_students=Count('student', distinct=True),
-                        quizzes_taken=Count('id'),
-                        points_earned=Coalesce(Sum('points'), 0))
-
-    return JsonResponse(data)
+    return _cached_json_response(request, 'filtered-data-teacher', get_filters(request),
+                                 lambda: get_class_totals_data(get_filtered_queryset(request)))
 
 
 @login_required
 @user_passes_test(lambda user: user.is_teacher)
+@cache_control(private=True, no_cache=True)
 def get_filtered_data_topic(request):
-    """Get the filtered data required for the Points Per Student table on the Dashboard page in JSON format."""
-    qs = get_filtered_queryset(request)
-
-    data = get_points_per_student_data(qs)
-    return JsonResponse(data, safe=False)
+    """Get a page (given by the 'page' GET URL parameter) of the filtered data required for the Points Per Student
+    table on the Dashboard page in JSON format."""
+    filters = get_filters(request)
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+    # every student is listed, including those without results, so the data also changes when the students do
+    return _cached_json_response(request, 'filtered-data-topic', {**filters, 'page': page},
+                                 lambda: get_points_per_student_data(get_filtered_queryset(request), filters, page),
+                                 extra_scopes=['students'])
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
 def get_updatable_charts(request):
     """Get the filtered data required for the updatable charts on the Dashboard and Progress pages in JSON format."""
-    qs = get_filtered_queryset(request)
-
-    data = get_updatable_charts_data(qs)
-    return JsonResponse(data)
+    return _cached_json_response(request, 'updatable-charts', get_filters(request),
+                                 lambda: get_updatable_charts_data(get_filtered_queryset(request)))
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=get_points_per_day_etag)
 def get_points_per_day(request):
-    """Get the student points per day data required for the Progress page's line chart in JSON format."""
-    chart_data = get_points_per_day_data(request.user)
-    return JsonResponse(chart_data)
+    """Get the student points per day data required for the Progress page's line chart in JSON format, over the range
+    of dates in the GET URL parameters (the last PTS_PER_DAY_DATERANGE days by default)."""
+    chart_data = get_points_per_day_data(request.user, *get_points_per_day_range(request))
+    return _json_response(request, chart_data)
+
+
+"""
+EXPORT VIEWS
+
+The raw data behind the charts, streamed a chunk of rows at a time (and compressed, if the browser accepts gzip).
+"""
+
+
+@login_required
+@user_passes_test(lambda user: user.is_teacher)
+@gzip_page
+def export_data(request, name):
+    """Export the named data (see exports.EXPORTS), with the usual filters applied, as a CSV file. The 'format' GET URL
+    parameter may instead ask for NDJSON."""
+    file_format = request.GET.get('format', 'csv')
+    if name not in exports.EXPORTS or file_format not in exports.FORMATS:
+        raise Http404("No such export.")
+
+    response = StreamingHttpResponse(exports.encode(name, get_filters(request), file_format),
+                                     content_type=exports.FORMATS[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{name}.{file_format}"'
+    return response
+
+
+def _cached_json_response(request, name, filters, compute, extra_scopes=()):
+    """Respond with the data in the named response_cache entry, or 304 Not Modified if the ETag sent by the browser
+    matches that entry. The entry served may be outdated, so unlike the condition decorator's validators, the ETag is
+    made from the entry itself rather than from the database."""
+    entry = response_cache.get_entry(name, filters, compute, extra_scopes)
+    etag = quote_etag(get_entry_etag(request, entry))
+    response = get_conditional_response(request, etag=etag) or _json_response(request, entry['data'])
+    response['ETag'] = etag
+    return response
+
+
+def _json_response(request, data):
+    """Respond with the data in JSON format, or in the compact format (see chart_tools.compact) if the 'format' GET URL
+    parameter asks for it."""
+    if request.GET.get('format') == 'compact':
+        return HttpResponse(encode_compact(data), content_type='application/json')
+    return JsonResponse(data, safe=False)
@@ -48,6 +48,22 @@ class WordCreateForm(ModelForm):
     )
 
 
+class WordImportForm(forms.Form):
+    file = forms.FileField(label='CSV file', help_text='One word per line, as: origin,target',
+                           widget=forms.ClearableFileInput(attrs={'accept': '.csv,text/csv'}))
+
+    helper = FormHelper()
+    helper.form_method = 'POST'
+    helper.form_action = reverse_lazy('import_words')
+    helper.form_class = 'word-import-form'
+    helper.layout = Layout(
+        Field('file'),
+        FormGroup(
+            Reset('reset', 'Cancel', css_class='is-outlined has-text-weight-semibold', css_id='cancel-import-button'),
+            Submit('submit', 'Import', css_class='is-success has-text-weight-semibold'))
+    )
+
+
 class WordUpdateForm(ModelForm):
     class Meta:
         model = Word
@@ -1,13 +1,27 @@
 /**
- * @file Functions for asynchronous handling of the Add Word and Word Filter forms.
+ * @file Functions for asynchronous handling of the Add Word, Import Words and Word Filter forms, and for loading the word
+ * table a page at a time as it is scrolled.
  * @author Nathaniel Samson
  */
 
 // Set up some interactive elements
 const addWordButton = document.getElementById("add-word-button");
 const addWordForm = document.getElementById("add-word-ui");
+const importWordsButton = document.getElementById("import-words-button");
+const importWordsForm = document.getElementById("import-words-ui");
+const importReport = document.getElementById("import-report");
 const wordFilterForm = document.getElementById("word-filter-form");
 const wordsTable = document.querySelector("#words-table > tbody");
+const wordsSentinel = document.getElementById("words-sentinel");
+
+// the URL of the next page of words (or null, once every page is loaded), and whether it is being loaded
+let nextUrl = wordsSentinel.dataset.nextUrl || null;
+let loadingPage = false;
+const wordsObserver = new IntersectionObserver(entries => {
+    if (entries.some(entry => entry.isIntersecting)) {
+        loadNextPage();
+    }
+});
 
 /**
  * Ensure the DOM is fully loaded and set up the JS logic.
@@ -27,22 +41,95 @@ function ready(fn) {
 function setEventListeners() {
     // User is on a topic-specific page
     if (addWordForm) {
-        addWordButton.addEventListener("click", insertForm);
+        addWordButton.addEventListener("click", () => insertForm(addWordButton, addWordForm));
         addWordForm.addEventListener("submit", addWord);
         addWordForm.addEventListener("reset", () => hideAndShow(addWordForm, addWordButton));
+        importWordsButton.addEventListener("click", () => insertForm(importWordsButton, importWordsForm));
+        importWordsForm.addEventListener("submit", importWords);
+        importWordsForm.addEventListener("reset", () => hideAndShow(importWordsForm, importWordsButton));
     }
     // User is on the all-topics page
     if (wordFilterForm) {
         wordFilterForm.addEventListener("submit", filterSubmit)
         wordFilterForm.addEventListener("reset", resetForm);
     }
+    wordsObserver.observe(wordsSentinel);
+}
+
+/**
+ * Append the next page of words to the word table, if there is one. When it is added, the sentinel below the table is
+ * observed afresh, so that if it is still in view (e.g. on a tall screen), the page after is loaded too.
+ */
+function loadNextPage() {
+    if (!nextUrl || loadingPage) {
+        return;
+    }
+    const url = nextUrl;
+    loadingPage = true;
+
+    fetch(url, {
+        headers: {
+            'Accept': 'application/json',
+            'X-Requested-With': 'XMLHttpRequest',
+        },
+    })
+        .then(response => {
+            return response.json();
+        })
+        .then(data => {
+            // the page is dropped if the table has been filtered again meanwhile
+            if (url === nextUrl) {
+                wordsTable.insertAdjacentHTML("beforeend", data.html_word_rows);
+                nextUrl = data.next_url;
+            }
+        })
+        .finally(() => {
+            loadingPage = false;
+            setNextUrl(nextUrl);
+        })
+}
+
+/**
+ * Set the URL of the next page of words, and check whether it should be loaded straight away.
+ * @param {?string} url - the URL of the next page, or null if there are no more pages.
+ */
+function setNextUrl(url) {
+    nextUrl = url;
+    wordsObserver.unobserve(wordsSentinel);
+    wordsObserver.observe(wordsSentinel);
+}
+
+/**
+ * Insert a new word's row into the word table, in alphabetical order. If it comes after every word loaded so far, and
+ * there are more pages to load, it is left to arrive with its own page instead.
+ * @param {string} rowHtml - the HTML of the new word's table row.
+ */
+function insertWordRow(rowHtml) {
+    const template = document.createElement("template");
+    template.innerHTML = rowHtml.trim();
+    const newRow = template.content.firstElementChild;
+
+    const noWordsRow = document.getElementById("no-words-row");
+    if (noWordsRow) {
+        noWordsRow.remove();
+    }
+
+    const nextRow = Array.from(wordsTable.rows).find(row => row.dataset.key > newRow.dataset.key);
+    if (nextRow) {
+        wordsTable.insertBefore(newRow, nextRow);
+    } else if (!nextUrl) {
+        wordsTable.appendChild(newRow);
+    }
 }
 
 /**
- * Get the HTML Add Word form and insert it into the page.
+ * Get the HTML form opened by a button (i.e. Add Word or Import Words) and insert it into the page in place of the
+ * button.
+ * @param {HTMLElement} button - the button, whose data-url gives the form.
+ * @param {HTMLElement} container - the element to insert the form into.
  */
-function insertForm() {
-    fetch(addWordButton.dataset.url, {
+function insertForm(button, container) {
+    fetch(button.dataset.url, {
         headers: {
             'Accept': 'application/json',
             'X-Requested-With': 'XMLHttpRequest',
@@ -52,8 +139,8 @@ function insertForm() {
             return response.json();
         })
         .then(data => {
-            addWordForm.innerHTML = data.html_form;
-            hideAndShow(addWordButton, addWordForm);
+            container.innerHTML = data.html_form;
+            hideAndShow(button, container);
         })
 }
 
@@ -73,15 +160,15 @@ function addWord(event) {
             'X-CSRFToken': getCookie('csrftoken'),
         },
         mode: 'same-origin',
-        body: new FormData(document.querySelector("form"))
+        body: new FormData(addWordForm.querySelector("form"))
     })
         .then(response => {
             return response.json();
         })
         .then(data => {
             if (data.is_valid) {
-                // If the new word is valid, refresh the word table to show the newly added word
-                wordsTable.innerHTML = data.html_word_rows;
+                // If the new word is valid, add it to the word table
+                insertWordRow(data.html_word_rows);
                 hideAndShow(addWordForm, addWordButton);
             } else {
                 // If the new word is not valid, display the relevant errors
@@ -90,6 +177,41 @@ function addWord(event) {
         })
 }
 
+/**
+ * Upload the CSV file chosen in the Import Words form when the Import button is clicked, then report the outcome and
+ * reload the word table, in which the imported words may appear anywhere.
+ */
+function importWords(event) {
+    event.preventDefault();
+    const form = importWordsForm.querySelector("form");
+    let url = form.getAttribute("action");
+    url = topicId ? `${url}${topicId}/` : url; // add the topicID from the page if present
+    form.querySelector("[type=submit]").disabled = true;
+
+    fetch(url, {
+        method: 'POST',
+        headers: {
+            'Accept': 'application/json',
+            'X-Requested-With': 'XMLHttpRequest',
+            'X-CSRFToken': getCookie('csrftoken'),
+        },
+        mode: 'same-origin',
+        body: new FormData(form)
+    })
+        .then(response => {
+            return response.json();
+        })
+        .then(data => {
+            importWordsForm.innerHTML = data.html_form;
+            if (data.is_valid) {
+                importReport.innerHTML = data.html_report;
+                wordsTable.innerHTML = data.html_word_rows;
+                setNextUrl(data.next_url);
+                hideAndShow(importWordsForm, importWordsButton);
+            }
+        })
+}
+
 /**
  * Update the Words table based on the filter settings on the 'All Topics' page.
  * @param {Event} e - an event triggered by the 'All Topics' page form.
@@ -110,6 +232,7 @@ function filterSubmit(e) {
         })
         .then(data => {
             wordsTable.innerHTML = data.html_word_rows;
+            setNextUrl(data.next_url);
         })
 }
 
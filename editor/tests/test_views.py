@@ -1,14 +1,19 @@
 import datetime
 import http.client
-from unittest import SkipTest
+import io
+from unittest import SkipTest, mock
 
 from django.core.exceptions import PermissionDenied
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse, resolve
 
 from editor.forms import TopicForm, WordFilterForm, WordUpdateForm
+from editor.utils import pagination, word_import
 from editor.views import TopicCreateView, TopicWordsView, add_word, get_filtered_words, WordUpdateView, \
-    TopicUpdateView, TopicDeleteView, WordDeleteView
+    TopicUpdateView, TopicDeleteView, WordDeleteView, import_words
 from quizzes.models import Topic, Word
 from users.models import User
 
@@ -185,6 +190,99 @@ class AddWordTests(BaseTestCase):
         self.assertEquals(len(associated_topics), 0)
 
 
+class ImportWordsTests(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.test_topic = Topic.objects.create(name='Test Topic', long_desc='This is a test.')
+        cls.other_topic = Topic.objects.create(name='Other Topic')
+        cls.path = reverse('import_words', kwargs={'topic_id': cls.test_topic.pk})
+        cls.func = import_words
+        cls.template_path = 'editor/word_include_form.html'
+        cls.existing_word = Word.objects.create(origin='existing origin', target='existing target')
+        cls.existing_word.topics.add(cls.other_topic)
+
+    def upload(self, content, path=None):
+        csv_file = SimpleUploadedFile('words.csv', content.encode('utf-8-sig'), content_type='text/csv')
+        return self.client.post(path or self.path, {'file': csv_file}).json()
+
+    def test_words_imported(self):
+        data = self.upload('Origin,Target\nnew origin a,new target a\n"new origin, b",new target b\n\n')
+        self.assertTrue(data['is_valid'])
+        self.assertEquals({'new origin a', 'new origin, b'},
+                          set(self.test_topic.words.values_list('origin', flat=True)))
+        self.assertIn('Imported 2 new words', data['html_report'])
+        self.assertIn('new origin a', data['html_word_rows'])
+
+        # the Topic's denormalised word count is kept up to date
+        self.test_topic.refresh_from_db()
+        self.assertEquals(2, self.test_topic.word_count)
+
+    def test_invalid_rows_reported(self):
+        data = self.upload('good origin,good target\n'
+                           'only origin\n'
+                           ',no origin\n'
+                           f'{"x" * 101},long origin\n'
+                           'good origin,other target\n'
+                           'existing origin,other target\n'
+                           'other origin,existing target\n')
+        self.assertEquals(['good origin'], list(self.test_topic.words.values_list('origin', flat=True)))
+        for line in range(2, 8):
+            self.assertIn(f'<td>{line}</td>', data['html_report'])
+        self.assertIn('Word with this Origin already exists.', data['html_report'])
+        self.assertIn('Word with this Target already exists.', data['html_report'])
+
+    def test_existing_words_added_to_topic(self):
+        data = self.upload('existing origin,existing target\n')
+        self.assertIn('added 1 existing word', data['html_report'])
+        self.assertEquals({self.test_topic, self.other_topic}, set(self.existing_word.topics.all()))
+        # so the same file can be uploaded again without error
+        self.assertNotIn('could not be imported', self.upload('existing origin,existing target\n')['html_report'])
+
+    def test_words_created_meanwhile(self):
+        Word.objects.create(origin='new origin', target='new target')
+        Word.objects.create(origin='clashing origin', target='other target')
+        checks = []
+        word_filter = Word.objects.filter
+
+        def checked_before_created(*args, **kwargs):
+            # the first check against the existing Words was made before another import created the Words above
+            checks.append(args)
+            return word_filter(*args, **kwargs) if len(checks) > 1 else Word.objects.none()
+
+        with mock.patch.object(Word.objects, 'filter', side_effect=checked_before_created):
+            created, added, errors = word_import.import_words(
+                io.BytesIO(b'new origin,new target\nclashing origin,clashing target\nother origin,other target 2\n'),
+                self.test_topic)
+        self.assertEquals((1, 1), (created, added))
+        self.assertEquals([(2, 'Word with this Origin already exists.')], errors)
+        self.assertEquals({'new origin', 'other origin'}, set(self.test_topic.words.values_list('origin', flat=True)))
+
+    def test_unreadable_file(self):
+        csv_file = SimpleUploadedFile('words.xlsx', b'\xff\xfe\x00 binary', content_type='text/csv')
+        data = self.client.post(self.path, {'file': csv_file}).json()
+        self.assertIn('could not be read', data['html_report'])
+
+    def test_missing_file(self):
+        data = self.client.post(self.path, {}).json()
+        self.assertFalse(data['is_valid'])
+        self.assertIn('This field is required.', data['html_form'])
+
+    def test_large_import_in_bulk(self):
+        content = ''.join(f'origin {i},target {i}\n' for i in range(5000))
+        with CaptureQueriesContext(connection) as queries:
+            self.upload(content)
+        self.assertEquals(5000, self.test_topic.words.count())
+        # the number of queries depends on the batch sizes, not the number of Words
+        self.assertLess(len(queries), 50)
+
+    def test_row_limit(self):
+        with mock.patch('editor.utils.word_import.MAX_ROWS', 2):
+            created, added, errors = word_import.import_words(io.BytesIO(b'a,b\nc,d\ne,f\ng,h\n'), self.test_topic)
+        self.assertEquals((2, 0), (created, added))
+        self.assertEquals(3, errors[0][0])
+
+
 class GetFilteredWordsTests(BaseTestCase):
     @classmethod
     def setUpTestData(cls):
@@ -233,6 +331,72 @@ class GetFilteredWordsTests(BaseTestCase):
         self.assertContains(response, 'test target c')
 
 
+class WordPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='test_teacher', password='test_user1234', is_teacher=True)
+        cls.topic = Topic.objects.create(name='Test Topic', long_desc='This is a test.')
+        # mixed case, so that the order is only right if it ignores case
+        cls.origins = sorted([f'{letter}{i}' for i in range(4) for letter in 'aBcD'], key=str.lower)
+        Word.objects.bulk_create([Word(origin=origin, target=f'target {origin}') for origin in reversed(cls.origins)])
+        cls.topic.words.add(*Word.objects.filter(origin__in=cls.origins[::2]))
+
+    def setUp(self):
+        self.client.force_login(self.teacher)
+        patcher = mock.patch('editor.utils.pagination.WORDS_PER_PAGE', 5)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_origins(self, html):
+        return [word.origin for word in Word.objects.all() if f'<td>{word.origin}</td>' in html]
+
+    def follow_pages(self, response):
+        """Get every origin listed on the page, and on each page loaded after it, in order."""
+        origins = [word.origin for word in response.context['words']]
+        next_url = response.context['next_url']
+        while next_url:
+            data = self.client.get(next_url).json()
+            origins += sorted(self.get_origins(data['html_word_rows']), key=str.lower)
+            next_url = data['next_url']
+        return origins
+
+    def test_all_topics_pages(self):
+        response = self.client.get(reverse('topic_words'))
+        self.assertEquals(5, len(response.context['words']))
+        self.assertEquals(self.origins, self.follow_pages(response))
+
+    def test_topic_pages(self):
+        response = self.client.get(reverse('topic_words', kwargs={'topic_id': self.topic.pk}))
+        self.assertEquals(self.origins[::2], self.follow_pages(response))
+        self.assertIn(f'next={self.topic.pk}', response.context['next_url'])
+
+    def test_filtered_pages_keep_filters(self):
+        data = self.client.get(reverse('filter_words') + '?search=target&topic=-1').json()
+        self.assertIn('search=target', data['next_url'])
+        self.assertIn('topic=-1', data['next_url'])
+
+        next_page = self.client.get(data['next_url']).json()
+        self.assertEquals(self.origins[1:10:2], sorted(self.get_origins(data['html_word_rows']), key=str.lower))
+        self.assertEquals(self.origins[11::2], sorted(self.get_origins(next_page['html_word_rows']), key=str.lower))
+        self.assertIsNone(next_page['next_url'])
+
+    def test_words_added_meanwhile(self):
+        words, cursor = pagination.get_page(Word.objects.all())
+        Word.objects.create(origin='A', target='new target')
+        next_words, _ = pagination.get_page(Word.objects.all(), cursor)
+        self.assertEquals(self.origins[5:10], [word.origin for word in next_words])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('filter_words') + '?cursor=not-a-cursor')
+        self.assertEquals(400, response.status_code)
+
+    def test_add_word_returns_only_new_row(self):
+        data = self.client.post(reverse('add_word', kwargs={'topic_id': self.topic.pk}),
+                                {'origin': 'new origin', 'target': 'new target'}).json()
+        self.assertEquals(['new origin'], self.get_origins(data['html_word_rows']))
+        self.assertIn('data-key="new origin"', data['html_word_rows'])
+
+
 class WordUpdateViewTests(BaseTestCase):
     @classmethod
     def setUpTestData(cls):
@@ -1,6 +1,6 @@
 from django.urls import path
 from .views import TopicCreateView, TopicWordsView, add_word, WordUpdateView, TopicUpdateView, TopicDeleteView, \
-    WordDeleteView, get_filtered_words
+    WordDeleteView, get_filtered_words, search_words, import_words
 
 urlpatterns = [
     path('topic/create/', TopicCreateView.as_view(), name='topic_create'),
@@ -10,7 +10,10 @@ urlpatterns = [
     path('topic/words/<int:topic_id>/', TopicWordsView.as_view(), name='topic_words'),
     path('topic/add-word/', add_word, name='add_word'),
     path('topic/add-word/<int:topic_id>/', add_word, name='add_word'),
+    path('topic/import-words/', import_words, name='import_words'),
+    path('topic/import-words/<int:topic_id>/', import_words, name='import_words'),
     path('topic/filter-words/', get_filtered_words, name='filter_words'),
+    path('word/search/', search_words, name='search_words'),
     path('word/update/<pk>/', WordUpdateView.as_view(), name='word_update'),
     path('word/delete/<pk>/', WordDeleteView.as_view(), name='word_delete'),
 ]
@@ -0,0 +1,49 @@
+"""This module splits the editor's lists of Words into pages, in alphabetical order of their origin.
+
+Pages are found by keyset (or cursor) pagination: each page is read from the index on (Lower('origin'), id) starting
+just after the last Word of the page before it, so reading any page is as quick as reading the first, and Words added
+or deleted meanwhile never cause a Word to be shown twice or skipped.
+"""
+
+import base64
+import binascii
+import json
+
+from django.core.exceptions import BadRequest
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+WORDS_PER_PAGE = 50
+
+
+def get_page(words, cursor=None):
+    """Get a page of the given queryset of Words, starting after the given cursor (or from the beginning), along with
+    the cursor for the next page, or None if this is the last one."""
+    words = words.annotate(origin_key=Lower('origin')).order_by('origin_key', 'id')
+    if cursor:
+        origin_key, word_id = decode_cursor(cursor)
+        words = words.filter(Q(origin_key__gt=origin_key) | Q(origin_key=origin_key, id__gt=word_id))
+
+    # one Word more than needed is read, to find whether there is another page
+    page = list(words[:WORDS_PER_PAGE + 1])
+    if len(page) <= WORDS_PER_PAGE:
+        return page, None
+    page = page[:WORDS_PER_PAGE]
+    return page, encode_cursor(page[-1])
+
+
+def encode_cursor(word):
+    """Get the cursor for the page following the given Word, as annotated by get_page."""
+    value = json.dumps([word.origin_key, word.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Get the (origin_key, id) pair from the given cursor, raising BadRequest if it is not valid."""
+    try:
+        origin_key, word_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, TypeError):
+        raise BadRequest("Invalid cursor.")
+    if not isinstance(origin_key, str) or not isinstance(word_id, int):
+        raise BadRequest("Invalid cursor.")
+    return origin_key, word_id
@@ -0,0 +1,116 @@
+"""This module imports Words into a Topic in bulk, from a CSV file of origin and target pairs (one pair per line, with
+an optional 'origin,target' header).
+
+The file is decoded and parsed a line at a time as it is read, and every row is checked against the existing Words in
+a single query, rather than one query per Word. The valid rows are then created and added to the Topic in bulk, and the
+invalid rows reported by line number, so that they can be corrected and the file uploaded again: a row matching an
+existing Word exactly is simply added to the Topic, so rows already imported do no harm.
+"""
+
+import codecs
+import csv
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+
+from quizzes.models import Word
+
+MAX_ROWS = 10000  # keeps the query for existing Words within SQLite's limit on query parameters
+BATCH_SIZE = 500  # Words inserted per query
+ATTEMPTS = 3  # times to check and create the Words, in case clashing Words are created by someone else meanwhile
+HEADER = ['origin', 'target']
+
+
+def read_rows(file):
+    """Get an iterator over the (line number, origin, target) of each row of the given binary CSV file, as it is read.
+    Rows of the wrong length are given with an origin and target of None."""
+    reader = csv.reader(codecs.iterdecode(file, 'utf-8-sig'))
+    for row in reader:
+        row = [value.strip() for value in row]
+        if not any(row) or (reader.line_num == 1 and [value.lower() for value in row] == HEADER):
+            continue
+        yield (reader.line_num, *row) if len(row) == 2 else (reader.line_num, None, None)
+
+
+def import_words(file, topic):
+    """Create the Words in the given binary CSV file and add them to the given Topic (if any). Gives the number of Words
+    created, the number of existing Words added to the Topic, and a list of (line number, message) for each invalid
+    row."""
+    errors = []
+    rows = []
+    try:
+        for line, origin, target in read_rows(file):
+            if len(rows) == MAX_ROWS:
+                errors.append((line, f"Only {MAX_ROWS} words can be imported at a time, so this line and those after "
+                                     "it were not."))
+                break
+            rows.append((line, origin, target))
+    except (UnicodeDecodeError, csv.Error):
+        return 0, 0, [(None, "The file could not be read. Please upload a CSV file saved as UTF-8.")]
+
+    rows = _validate(rows, errors)
+
+    for _ in range(ATTEMPTS):
+        try:
+            return _create_words(rows, topic, list(errors))
+        except IntegrityError:
+            # another Word with the same origin or target was created meanwhile, so check the rows against it too
+            continue
+    return 0, 0, [(None, "Other words were being added at the same time as these. Please upload the file again.")]
+
+
+def _create_words(rows, topic, errors):
+    # every row is checked against the existing Words at once
+    existing = Word.objects.filter(Q(origin__in=[origin for _, origin, _ in rows]) |
+                                   Q(target__in=[target for _, _, target in rows]))
+    existing = existing.values_list('id', 'origin', 'target')
+    existing_ids = {(origin, target): word_id for word_id, origin, target in existing}
+    existing_origins = {origin for origin, _ in existing_ids}
+    existing_targets = {target for _, target in existing_ids}
+
+    new_words, added_ids = [], set()
+    for line, origin, target in rows:
+        if (origin, target) in existing_ids and topic is not None:
+            # a row matching an existing Word exactly is added to the Topic rather than created
+            added_ids.add(existing_ids[origin, target])
+        elif (origin, target) in existing_ids or origin in existing_origins:
+            errors.append((line, "Word with this Origin already exists."))
+        elif target in existing_targets:
+            errors.append((line, "Word with this Target already exists."))
+        else:
+            new_words.append(Word(origin=origin, target=target))
+
+    with transaction.atomic():
+        Word.objects.bulk_create(new_words, batch_size=BATCH_SIZE)
+        if topic is None:
+            return len(new_words), 0, sorted(errors)
+        if connection.features.can_return_rows_from_bulk_insert:
+            new_ids = [word.id for word in new_words]
+        else:
+            new_ids = Word.objects.filter(origin__in=[word.origin for word in new_words]).values_list('id', flat=True)
+        added_ids -= set(topic.words.filter(id__in=added_ids).values_list('id', flat=True))
+        # a single add sends m2m_changed once, which brings the Topic's word count and caches up to date
+        topic.words.add(*new_ids, *added_ids)
+
+    return len(new_words), len(added_ids), sorted(errors)
+
+
+def _validate(rows, errors):
+    # check each row alone and against the rows before it, giving the valid rows
+    max_length = min(Word._meta.get_field(name).max_length for name in HEADER)
+    origins, targets = set(), set()
+    valid_rows = []
+    for line, origin, target in rows:
+        if origin is None:
+            errors.append((line, "Each row must have exactly two values: an origin and a target."))
+        elif not origin or not target:
+            errors.append((line, "Both an origin and a target are required."))
+        elif len(origin) > max_length or len(target) > max_length:
+            errors.append((line, f"Origins and targets may have at most {max_length} characters."))
+        elif origin in origins or target in targets:
+            errors.append((line, "This origin or target is already on an earlier line of the file."))
+        else:
+            origins.add(origin)
+            targets.add(target)
+            valid_rows.append((line, origin, target))
+    return valid_rows
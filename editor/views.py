@@ -1,16 +1,17 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth.mixins import UserPassesTestMixin
-from django.db.models import Q
-from django.db.models.functions import Lower
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.template.loader import render_to_string
 from django.urls import reverse, reverse_lazy
+from django.utils.http import urlencode
 from django.views.generic import FormView, ListView, UpdateView, DeleteView
 
-from editor.forms import TopicForm, WordFilterForm, WordCreateForm, WordUpdateForm
+from editor.forms import TopicForm, WordFilterForm, WordCreateForm, WordImportForm, WordUpdateForm
+from editor.utils import pagination, word_import
 from quizzes.models import Word, Topic
+from quizzes.utils import word_search
 
 
 class TeachersOnlyMixin(UserPassesTestMixin):
@@ -20,20 +21,26 @@ class TeachersOnlyMixin(UserPassesTestMixin):
 
 
 class TopicWordsView(TeachersOnlyMixin, ListView):
-    """View for listing all the Words in a specified Topic, or all Words across all Topics."""
+    """View for listing all the Words in a specified Topic, or all Words across all Topics.
+
+    Only the first page of Words is rendered, and the rest are loaded by get_filtered_words as the teacher scrolls.
+    """
     model = Word
     template_name = 'editor/topic_words.html'
     context_object_name = 'words'
+    next_cursor = None
 
     def get_queryset(self):
-        qs = Word.objects.order_by(Lower('origin'))
+        qs = Word.objects.all()
         topic_id = self.kwargs.get('topic_id', None)
 
         # if user is visiting a topic-specific page, show them only words from that topic
         if topic_id:
             topic = get_object_or_404(Topic, pk=self.kwargs.get('topic_id'))
-            qs = Word.objects.filter(topics=topic).order_by(Lower('origin'))
-        return qs
+            qs = Word.objects.filter(topics=topic)
+
+        words, self.next_cursor = pagination.get_page(qs)
+        return words
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -46,6 +53,8 @@ class TopicWordsView(TeachersOnlyMixin, ListView):
         if topic_id == '':
             context['word_filter_form'] = WordFilterForm()
 
+        # the following pages of a Topic's page link back to it, as its first page does
+        context['next_url'] = _get_next_url(self.next_cursor, {'topic': topic_id, 'next': topic_id} if topic_id else {})
         return context
 
 
@@ -63,13 +72,11 @@ def add_word(request, topic_id=None):
             if topic_id is not None:
                 topic = get_object_or_404(Topic, pk=topic_id)
                 new_word.topics.add(topic)
-                words = Word.objects.filter(topics=topic).order_by(Lower('origin'))
-            else:
-                # words assigned to no topics
-                words = Word.objects.filter(topics__isnull=True).order_by(Lower('origin'))
             data['is_valid'] = True
 
-            data['html_word_rows'] = render_to_string('editor/word_list.html', {'words': words, 'topic_id': topic_id})
+            # only the new Word's row is returned, which the page inserts into the Words already listed
+            data['html_word_rows'] = render_to_string('editor/word_list.html',
+                                                      {'words': [new_word], 'topic_id': topic_id})
 
         else:
             data['is_valid'] = False
@@ -83,19 +90,54 @@ def add_word(request, topic_id=None):
     return JsonResponse(data)
 
 
+@user_passes_test(lambda user: user.is_authenticated and user.is_teacher)
+def import_words(request, topic_id=None):
+    """Obtain the HTML form to import Words from a CSV file as a JSON, or import the Words from a completed form and
+    report on any rows which could not be imported."""
+    data = dict()
+    topic = get_object_or_404(Topic, pk=topic_id) if topic_id is not None else None
+
+    if request.method == 'POST':
+        form = WordImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            created, added, errors = word_import.import_words(form.cleaned_data['file'], topic)
+            data['is_valid'] = True
+            data['html_report'] = render_to_string('editor/word_import_report.html',
+                                                   {'created': created, 'added': added, 'errors': errors})
+
+            # the imported Words may belong anywhere in the list, so its first page is given afresh
+            words, next_cursor = pagination.get_page(topic.words.all() if topic else Word.objects.all())
+            data['html_word_rows'] = render_to_string('editor/word_list.html',
+                                                      {'words': words, 'topic_id': topic_id or ''})
+            data['next_url'] = _get_next_url(next_cursor, {'topic': topic_id, 'next': topic_id} if topic_id else {})
+            form = WordImportForm()
+        else:
+            data['is_valid'] = False
+
+    # Otherwise, create a new blank import form
+    else:
+        form = WordImportForm()
+
+    context = {'form': form}
+    data['html_form'] = render_to_string('editor/word_include_form.html', context, request=request)
+    return JsonResponse(data)
+
+
 @user_passes_test(lambda user: user.is_authenticated and user.is_teacher)
 def get_filtered_words(request):
-    """Get the Words data for the table on the All Topics page as a JSON, according to the URL parameters."""
+    """Get a page of the Words data for the table on the All Topics page (or a Topic's page) as a JSON, according to
+    the URL parameters. The next page is found at the given 'next_url', if there is one."""
     # get base queryset
-    words = Word.objects.order_by(Lower('origin'))
+    words = Word.objects.all()
 
     # extract filter options from GET request (i.e. the URL parameters)
     search = request.GET.get('search', None)
     topic_id = request.GET.get('topic', None)
+    cursor = request.GET.get('cursor', None)
 
     # apply filters
     if search is not None:
-        words = words.filter(Q(origin__icontains=search) | Q(target__icontains=search))
+        words = word_search.filter_words(words, [search])
     if topic_id is not None:
         # special case for Words with no associated Topics
         if topic_id == "-1":
@@ -104,11 +146,33 @@ def get_filtered_words(request):
             filter_topic = get_object_or_404(Topic, pk=topic_id)
             words = words.filter(topics=filter_topic)
 
+    words, next_cursor = pagination.get_page(words, cursor)
+    filters = {field: value for field, value in request.GET.items() if field != 'cursor'}
+
     data = dict()
-    data['html_word_rows'] = render_to_string('editor/word_list.html', {'words': words})
+    context = {'words': words, 'is_next_page': bool(cursor), 'topic_id': request.GET.get('next', '')}
+    data['html_word_rows'] = render_to_string('editor/word_list.html', context)
+    data['next_url'] = _get_next_url(next_cursor, filters)
     return JsonResponse(data)
 
 
+@user_passes_test(lambda user: user.is_authenticated and user.is_teacher)
+def search_words(request):
+    """Get the Words best matching the 'q' URL parameter as a JSON, those beginning with it first."""
+    word_ids = word_search.search(request.GET.get('q', ''))
+    words = Word.objects.in_bulk(word_ids)
+    data = {'words': [{'id': word_id, 'origin': words[word_id].origin, 'target': words[word_id].target}
+                      for word_id in word_ids if word_id in words]}
+    return JsonResponse(data)
+
+
+def _get_next_url(cursor, filters):
+    # the URL of the next page of Words, with the same filters, or None if there are no more
+    if cursor is None:
+        return None
+    return reverse('filter_words') + '?' + urlencode({**filters, 'cursor': cursor})
+
+
 class TopicCreateView(TeachersOnlyMixin, FormView):
     """View for creating a new Topic based on the TopicForm."""
     template_name = 'editor/topic_form.html'
@@ -0,0 +1,2 @@
+"""Request metrics (latency, SQL queries and time, response sizes and errors by URL name), exposed at /metrics in the
+Prometheus text format."""
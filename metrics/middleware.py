@@ -0,0 +1,77 @@
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from metrics.registry import Registry, Counter, Histogram, write_snapshot
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    'django_requests_total', 'Requests by URL name, method and response status.', ['view', 'method', 'status']))
+ERRORS = REGISTRY.register(Counter(
+    'django_request_errors_total', 'Requests by URL name which ended in a server error.', ['view']))
+DURATION = REGISTRY.register(Histogram(
+    'django_request_duration_seconds', 'Request latency by URL name.', ['view'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)))
+QUERIES = REGISTRY.register(Histogram(
+    'django_request_queries', 'SQL queries per request by URL name.', ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100)))
+QUERY_DURATION = REGISTRY.register(Counter(
+    'django_request_query_seconds_total', 'Time spent in SQL queries by URL name.', ['view']))
+RESPONSE_SIZE = REGISTRY.register(Histogram(
+    'django_response_size_bytes', 'Response body size by URL name (excluding streamed responses).', ['view'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576)))
+
+UNRESOLVED = '<unresolved>'  # the label for requests which did not match a URL pattern
+
+
+class QueryTimer:
+    """A database execute wrapper which counts the queries run, and the time spent running them."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """Record the latency, SQL queries, response size and status of every request, labelled by its URL name.
+
+    Should be the first middleware, so the time spent in every other middleware is included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.last_flushed = time.monotonic()
+
+    def __call__(self, request):
+        query_timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(query_timer):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        view = resolver_match.view_name if resolver_match is not None else UNRESOLVED
+
+        REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+        if response.status_code >= 500:
+            ERRORS.inc(view=view)
+        DURATION.observe(duration, view=view)
+        QUERIES.observe(query_timer.count, view=view)
+        QUERY_DURATION.inc(query_timer.duration, view=view)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(len(response.content), view=view)
+
+        if settings.METRICS_DIR and time.monotonic() - self.last_flushed >= settings.METRICS_FLUSH_INTERVAL:
+            self.last_flushed = time.monotonic()
+            write_snapshot(REGISTRY, settings.METRICS_DIR)
+        return response
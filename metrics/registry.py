@@ -0,0 +1,160 @@
+"""A minimal, process-local metrics registry, rendered in the Prometheus text exposition format.
+
+Every process records into its own registry. When several worker processes serve the application, each one can write
+a snapshot of its registry to a shared directory (see write_snapshot), and the snapshots of every process are then
+summed (see read_snapshots and Registry.render) to give totals for the whole server.
+"""
+
+import abc
+import bisect
+import json
+import os
+import tempfile
+import threading
+
+
+class Metric(abc.ABC):
+    """A named metric, holding one value for each combination of label values it has been recorded with."""
+    type = None
+
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return json.dumps([str(labels[name]) for name in self.labelnames])
+
+    def snapshot(self):
+        """Get a JSON serialisable copy of the metric's values, keyed by their (JSON encoded) label values."""
+        with self._lock:
+            return {key: _copy(value) for key, value in self._values.items()}
+
+    @abc.abstractmethod
+    def samples(self, values):
+        """Yield a (name, {label: value}, value) sample for each value in the given snapshot."""
+
+    def _labels(self, key):
+        return dict(zip(self.labelnames, json.loads(key)))
+
+
+class Counter(Metric):
+    """A running total, e.g. of requests or errors."""
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self, values):
+        for key, value in sorted(values.items()):
+            yield self.name, self._labels(key), value
+
+
+class Histogram(Metric):
+    """A count of observations (e.g. request durations) falling into each of a series of buckets, with their sum."""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, amount, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # the count in each bucket (the last one being +Inf), then the sum of every observation
+            value = self._values.setdefault(key, [0] * (len(self.buckets) + 2))
+            value[bisect.bisect_left(self.buckets, amount)] += 1
+            value[-1] += amount
+
+    def samples(self, values):
+        for key, value in sorted(values.items()):
+            labels = self._labels(key)
+            cumulative = 0
+            for upper_bound, count in zip(self.buckets + ('+Inf',), value):
+                cumulative += count
+                yield f'{self.name}_bucket', {**labels, 'le': _format_value(upper_bound)}, cumulative
+            yield f'{self.name}_sum', labels, value[-1]
+            yield f'{self.name}_count', labels, cumulative
+
+
+class Registry:
+    """The collection of metrics recorded by a process."""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def render(self, snapshots=None):
+        """Render the sum of the given snapshots (by default, this process's current metrics) in the Prometheus text
+        format."""
+        totals = _sum_snapshots([self.snapshot()] if snapshots is None else snapshots)
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for sample_name, labels, value in metric.samples(totals.get(name, {})):
+                label_text = ','.join(f'{label}="{_escape(label_value)}"' for label, label_value in labels.items())
+                lines.append(f'{sample_name}{{{label_text}}} {_format_value(value)}' if labels else
+                             f'{sample_name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def write_snapshot(registry, directory):
+    """Replace this process's snapshot file in the directory with the registry's current metrics."""
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as snapshot_file:
+        json.dump(registry.snapshot(), snapshot_file)
+    # readers only ever see a whole snapshot, as the rename is atomic
+    os.replace(snapshot_file.name, os.path.join(directory, f'{os.getpid()}.json'))
+
+
+def read_snapshots(directory):
+    """Read the latest snapshot written by every process (including those that have since exited)."""
+    snapshots = []
+    for filename in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+        if filename.endswith('.json'):
+            try:
+                with open(os.path.join(directory, filename)) as snapshot_file:
+                    snapshots.append(json.load(snapshot_file))
+            except (OSError, ValueError):
+                continue  # e.g. removed while the directory was being read
+    return snapshots
+
+
+def _sum_snapshots(snapshots):
+    totals = {}
+    for snapshot in snapshots:
+        for name, values in snapshot.items():
+            metric_totals = totals.setdefault(name, {})
+            for key, value in values.items():
+                if key not in metric_totals:
+                    metric_totals[key] = _copy(value)
+                elif isinstance(value, list):
+                    metric_totals[key] = [total + count for total, count in zip(metric_totals[key], value)]
+                else:
+                    metric_totals[key] += value
+    return totals
+
+
+def _copy(value):
+    return list(value) if isinstance(value, list) else value
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_value(value):
+    if isinstance(value, str):
+        return value
+    return repr(float(value)) if isinstance(value, float) else str(value)
@@ -0,0 +1,55 @@
+import tempfile
+
+from django.test import SimpleTestCase
+
+from metrics.registry import Registry, Counter, Histogram, write_snapshot, read_snapshots
+
+
+class RegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.registry = Registry()
+        self.requests = self.registry.register(Counter('requests_total', 'Requests.', ['view']))
+        self.duration = self.registry.register(Histogram('duration_seconds', 'Latency.', ['view'], buckets=(0.1, 1)))
+
+    def test_counter(self):
+        self.requests.inc(view='home')
+        self.requests.inc(2, view='home')
+        self.requests.inc(view='quiz')
+        text = self.registry.render()
+        self.assertIn('# TYPE requests_total counter\n', text)
+        self.assertIn('requests_total{view="home"} 3\n', text)
+        self.assertIn('requests_total{view="quiz"} 1\n', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        for duration in (0.05, 0.1, 0.5, 3):
+            self.duration.observe(duration, view='home')
+        text = self.registry.render()
+        self.assertIn('duration_seconds_bucket{view="home",le="0.1"} 2\n', text)
+        self.assertIn('duration_seconds_bucket{view="home",le="1"} 3\n', text)
+        self.assertIn('duration_seconds_bucket{view="home",le="+Inf"} 4\n', text)
+        self.assertIn('duration_seconds_sum{view="home"} 3.65\n', text)
+        self.assertIn('duration_seconds_count{view="home"} 4\n', text)
+
+    def test_label_values_are_escaped(self):
+        self.requests.inc(view='say "hi"\\')
+        self.assertIn(r'requests_total{view="say \"hi\"\\"} 1', self.registry.render())
+
+    def test_snapshots_from_each_process_are_summed(self):
+        self.requests.inc(view='home')
+        self.duration.observe(0.5, view='home')
+        other_process = {'requests_total': {'["home"]': 2, '["quiz"]': 1},
+                         'duration_seconds': {'["home"]': [1, 0, 0, 0.05]}}
+
+        with tempfile.TemporaryDirectory() as directory:
+            write_snapshot(self.registry, directory)
+            snapshots = read_snapshots(directory) + [other_process]
+        text = self.registry.render(snapshots)
+
+        self.assertIn('requests_total{view="home"} 3\n', text)
+        self.assertIn('requests_total{view="quiz"} 1\n', text)
+        self.assertIn('duration_seconds_bucket{view="home",le="0.1"} 1\n', text)
+        self.assertIn('duration_seconds_bucket{view="home",le="1"} 2\n', text)
+        self.assertIn('duration_seconds_count{view="home"} 2\n', text)
+
+    def test_read_snapshots_without_directory(self):
+        self.assertEquals(read_snapshots('/nonexistent/metrics'), [])
@@ -0,0 +1,65 @@
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from metrics.middleware import REQUESTS, QUERIES
+from users.models import User
+
+
+class MetricsMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user(username='test_student', password='test_user1234')
+
+    def test_requests_are_counted_by_url_name(self):
+        before = REQUESTS.snapshot().get('["home", "GET", "200"]', 0)
+        self.client.force_login(self.student)
+        self.client.get(reverse('home'))
+        self.assertEquals(REQUESTS.snapshot()['["home", "GET", "200"]'], before + 1)
+
+    def test_queries_are_counted(self):
+        self.client.force_login(self.student)
+        self.client.get(reverse('home'))
+        queries = QUERIES.snapshot()['["home"]']
+        self.assertGreater(queries[-1], 0)
+
+    def test_unmatched_urls(self):
+        before = REQUESTS.snapshot().get('["<unresolved>", "GET", "404"]', 0)
+        self.client.get('/no/such/page/')
+        self.assertEquals(REQUESTS.snapshot()['["<unresolved>", "GET", "404"]'], before + 1)
+
+
+class MetricsViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user(username='test_student', password='test_user1234')
+        cls.staff = User.objects.create_user(username='test_staff', password='test_user1234', is_staff=True)
+        cls.path = reverse('metrics')
+
+    def test_staff_only(self):
+        self.assertEquals(self.client.get(self.path).status_code, 403)
+        self.client.force_login(self.student)
+        self.assertEquals(self.client.get(self.path).status_code, 403)
+
+    def test_prometheus_text_format(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse('home'))
+        response = self.client.get(self.path)
+        self.assertEquals(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('# TYPE django_request_duration_seconds histogram', response.content.decode())
+        self.assertIn('django_requests_total{view="home",method="GET",status="200"}', response.content.decode())
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        self.assertEquals(self.client.get(self.path, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEquals(self.client.get(self.path, HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    def test_aggregates_snapshots(self):
+        self.client.force_login(self.staff)
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            with open(f'{directory}/1.json', 'w') as other_process:
+                other_process.write('{"django_request_errors_total": {"[\\"quiz\\"]": 7}}')
+            response = self.client.get(self.path)
+        self.assertIn('django_request_errors_total{view="quiz"} 7\n', response.content.decode())
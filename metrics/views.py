@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from metrics.middleware import REGISTRY
+from metrics.registry import read_snapshots, write_snapshot
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def metrics(request):
+    """Get the request metrics in the Prometheus text format, summed across every worker process if METRICS_DIR is set.
+
+    Only available to staff, or to a scraper presenting METRICS_TOKEN as a bearer token.
+    """
+    token = settings.METRICS_TOKEN
+    has_token = bool(token) and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not (has_token or request.user.is_staff):
+        raise PermissionDenied
+
+    if settings.METRICS_DIR:
+        write_snapshot(REGISTRY, settings.METRICS_DIR)  # so this process's latest requests are included
+        text = REGISTRY.render(read_snapshots(settings.METRICS_DIR))
+    else:
+        text = REGISTRY.render()
+    return HttpResponse(text, content_type=CONTENT_TYPE)
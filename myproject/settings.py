@@ -45,6 +45,8 @@ INSTALLED_APPS = [
     'quizzes.apps.QuizzesConfig',
     'charts.apps.ChartsConfig',
     'editor.apps.EditorConfig',
+    'benchmarks.apps.BenchmarksConfig',
+    'metrics.apps.MetricsConfig',
     'crispy_forms',
     'crispy_bulma',
     'django.contrib.humanize',
@@ -53,6 +55,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'metrics.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -95,6 +98,23 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# When running several workers, use a shared backend (e.g. Memcached or Redis) so that they all see the same
+# pre-generated quizzes, vocabulary and results versions, and share the Dashboard's cached aggregates.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+# Sessions are only written on login and logout (quiz results are handed to the results page in a cookie). Expired
+# sessions in the database should be removed nightly with the clearsessions command.
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.db')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -170,6 +190,18 @@ MAX_QUIZ_LENGTH = config('MAX_QUIZ_LENGTH', default=12, cast=int)
 CORRECT_ANSWER_PTS = config('CORRECT_ANSWER_PTS', default=10, cast=int)
 ORIGIN_ICON = config('ORIGIN_ICON', default='🇬🇧')
 TARGET_ICON = config('TARGET_ICON', default='🇩🇪')
+PREGENERATE_QUIZZES = config('PREGENERATE_QUIZZES', default=True, cast=bool)
+
+# Write-behind mode for quiz results (see quizzes/utils/write_behind.py). Requires a POSIX platform.
+WRITE_BEHIND_RESULTS = config('WRITE_BEHIND_RESULTS', default=False, cast=bool)
+WRITE_BEHIND_INTERVAL_MS = config('WRITE_BEHIND_INTERVAL_MS', default=250, cast=int)
+RESULTS_JOURNAL_DIR = config('RESULTS_JOURNAL_DIR', default=str(BASE_DIR / 'journal'))
+
+# Request metrics, served to staff (or to scrapers presenting METRICS_TOKEN) at /metrics. Each process keeps its own
+# metrics: to aggregate them across several worker processes, give every worker the same METRICS_DIR.
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=10, cast=int)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
 
 # Hide the Django Debug Toolbar by uncommenting the below:
 # DEBUG_TOOLBAR_CONFIG = {"SHOW_TOOLBAR_CALLBACK": lambda request: True}
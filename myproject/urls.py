@@ -23,6 +23,7 @@ urlpatterns = [
     path('u/', include('users.urls')),
     path('data/', include('charts.urls')),
     path('editor/', include('editor.urls')),
+    path('metrics', include('metrics.urls')),
     path('', include('quizzes.urls')),
     path('__debug__/', include('debug_toolbar.urls')),
     path('favicon.ico/', RedirectView.as_view(url=staticfiles_storage.url('quizzes/img/favicon.ico'))),
@@ -1,9 +1,23 @@
 from django.contrib import admin
+from django.db.models import Q
 from django.urls import reverse
 from django.utils.html import format_html
 from django.utils.http import urlencode
+from django.utils.text import smart_split, unescape_string_literal
 
 from .models import Topic, Word
+from .signals import refresh_topics
+from .utils import word_search
+
+
+def get_search_terms(search_term):
+    """Split a search into its terms as the admin does, treating quoted phrases as single terms."""
+    terms = []
+    for term in smart_split(search_term):
+        if term.startswith(('"', "'")) and term[0] == term[-1]:
+            term = unescape_string_literal(term)
+        terms.append(term)
+    return terms
 
 
 class TopicWordsInline(admin.TabularInline):
@@ -31,12 +45,22 @@ class TopicAdmin(admin.ModelAdmin):
     ordering = ('date_created', 'available_from',)
     inlines = [TopicWordsInline]
 
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        return qs.prefetch_related('words')
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+
+        # the inline edits the Topic's links to its Words directly, which does not send m2m_changed
+        refresh_topics([form.instance.pk])
+
+    def get_search_results(self, request, queryset, search_term):
+        """Search the Topics' names and descriptions, and the Words within them using the search index."""
+        for term in get_search_terms(search_term):
+            words = word_search.filter_words(Word.objects.all(), [term])
+            topic_ids = Word.topics.through.objects.filter(word__in=words).values('topic_id')
+            queryset = queryset.filter(Q(name__icontains=term) | Q(long_desc__icontains=term) | Q(pk__in=topic_ids))
+        return queryset, False
 
     def link_to_words(self, obj):
-        count = obj.words.count()
+        count = obj.word_count
         url = (
                 reverse('admin:quizzes_word_changelist')
                 + '?' + urlencode({'topics__id': f'{obj.id}'})
@@ -66,6 +90,10 @@ class WordAdmin(admin.ModelAdmin):
         qs = super().get_queryset(request)
         return qs.prefetch_related('topics')
 
+    def get_search_results(self, request, queryset, search_term):
+        """Search using the search index, which also serves the autocomplete of TopicWordsInline."""
+        return word_search.filter_words(queryset, get_search_terms(search_term), word_search.INDEXED_FIELDS), False
+
     def get_topics_list_str(self, word):
         """Display all the Topics for a given word as a String."""
         topics = word.topics.all()
@@ -0,0 +1,175 @@
+import datetime
+import re
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from charts.utils import chart_data
+from quizzes.models import Topic, Word, WordScore, WordStats, QuizResults, DailyResults, LeaderboardEntry
+from quizzes.utils import quiz_builder, due_counts, word_search
+from quizzes.utils.quiz_logger import process_results
+from quizzes.views import HomeView, TopicDetailView
+from users.models import User
+
+# tables which grow with the number of students (or of Words), and so must never be read in full by a hot query
+AUDITED_TABLES = {
+    WordScore._meta.db_table,
+    QuizResults._meta.db_table,
+    DailyResults._meta.db_table,
+    WordStats._meta.db_table,
+    LeaderboardEntry._meta.db_table,
+    due_counts.DueWordCount._meta.db_table,
+    User._meta.db_table,
+    Word._meta.db_table,
+}
+
+# scans which have been reviewed and are allowed, by hot path, as (table, index) pairs: each walks a partial index of
+# the students (or an expression index) in order and stops at the query's LIMIT, or counts the whole class, which no
+# index can avoid
+ALLOWED_SCANS = {
+    'charts validator: teacher': {(User._meta.db_table, 'student_streak_idx')},  # counts the class
+    'dashboard overview': {(User._meta.db_table, 'student_streak_idx')},  # counts the class
+    'weakest words for class': {(WordStats._meta.db_table, 'wordstats_accuracy_idx')},
+    'longest streaks': {(User._meta.db_table, 'student_streak_idx')},
+    'points per student leaderboard': {(User._meta.db_table, 'student_name_idx')},
+}
+
+# e.g. FROM "quizzes_wordscore" U0 or INNER JOIN "quizzes_wordscore" ON ...
+TABLE_ALIAS_PATTERN = re.compile(r'"(\w+)"(?: AS)? ("?[A-Z]\d+"?)\b')
+# any SCAN reads the whole of a table (or index), unlike a SEARCH, which seeks into an index
+FULL_SCAN_PATTERN = re.compile(r'\bSCAN (?:TABLE )?"?(\w+)"?(?: AS (\w+))?(?: USING (?:COVERING )?INDEX (\w+))?')
+
+
+class Command(BaseCommand):
+    """Terminal command that checks the query plans of the application's hot queries for full table scans."""
+    help = 'Run EXPLAIN QUERY PLAN on every hot query, failing if any of them reads a large table in full.'
+
+    def handle(self, *args, **kwargs):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The query plan audit is only supported on SQLite.")
+
+        failures = []
+        audited = 0
+
+        # run the hot paths against a throwaway set of data, which is always rolled back afterwards
+        with transaction.atomic():
+            data = _create_audit_data()
+
+            for name, hot_path in _get_hot_paths(data):
+                with CaptureQueriesContext(connection) as context:
+                    hot_path()
+
+                for query in context.captured_queries:
+                    sql = query['sql']
+                    if not sql.startswith(('SELECT', 'UPDATE', 'DELETE')):
+                        continue
+                    audited += 1
+                    scanned = {table for table, index in _get_full_scans(sql)
+                               if (table, index) not in ALLOWED_SCANS.get(name, ())}
+                    if scanned:
+                        failures.append((name, scanned, sql))
+
+            transaction.set_rollback(True)
+
+        for name, scanned, sql in failures:
+            self.stderr.write(f"{name}: full scan of {', '.join(sorted(scanned))}\n    {sql}")
+
+        if failures:
+            raise CommandError(f"{len(failures)} of {audited} hot queries fall back to a full table scan.")
+        self.stdout.write(f"All {audited} hot queries use an index.")
+
+
+def _get_full_scans(sql):
+    """Return the audited tables that the query plan for the given SQL reads in full, rather than seeking into an
+    index, as (table, index) pairs, where the index is None if the table itself is scanned."""
+    aliases = {alias.strip('"'): table for table, alias in TABLE_ALIAS_PATTERN.findall(sql)}
+
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        plan = [row[-1] for row in cursor.fetchall()]
+
+    scanned = set()
+    for line in plan:
+        match = FULL_SCAN_PATTERN.search(line)
+        if match:
+            table = aliases.get(match.group(2) or match.group(1), match.group(1))
+            if table in AUDITED_TABLES:
+                scanned.add((table, match.group(3)))
+    return scanned
+
+
+def _create_audit_data():
+    """Create a minimal teacher, student, Topic and schedule for the hot paths to run against."""
+    today = datetime.date.today()
+    teacher = User.objects.create_user(username='__audit_teacher__', is_teacher=True)
+    student = User.objects.create_user(username='__audit_student__')
+    topic = Topic.objects.create(name='__audit_topic__')
+    words = Word.objects.bulk_create([Word(origin=f'__audit_origin_{i}__', target=f'__audit_target_{i}__')
+                                      for i in range(4)])
+    topic.words.add(*words)
+    WordScore.objects.create(word=words[0], student=student, next_review=today + datetime.timedelta(3))
+    QuizResults.objects.create(student=student, topic=topic, correct_answers=1, points=10)
+    return {'teacher': teacher, 'student': student, 'topic': topic, 'words': words, 'today': today}
+
+
+def _get_request(user, **params):
+    request = RequestFactory().get('/', params)
+    request.user = user
+    return request
+
+
+def _get_hot_paths(data):
+    """Get a list of (name, callable) pairs, each of which exercises one of the hot query shapes."""
+    student, teacher, topic, today = data['student'], data['teacher'], data['topic'], data['today']
+    results = {str(word.id): True for word in data['words']}
+
+    def home():
+        view = HomeView()
+        view.setup(_get_request(student))
+        list(view.get_queryset())
+
+    def topic_detail():
+        view = TopicDetailView()
+        view.setup(_get_request(student), pk=topic.pk)
+        view.object = topic
+        view.get_context_data()
+
+    def leaderboard(**params):
+        request = _get_request(teacher, **params)
+        filters = chart_data.get_filters(request)
+        chart_data.get_points_per_student_data(chart_data.get_filtered_queryset(request), filters, page=1)
+
+    def filtered(user, **params):
+        return lambda: list(chart_data.get_filtered_queryset(_get_request(user, **params)))
+
+    return [
+        ('home page', home),
+        ('topic detail', topic_detail),
+        ('words due in topic', lambda: topic.words_due_revision(student, today).count()),
+        ('words due in all topics', lambda: Topic.all_topics_words_due_revision(student, today).count()),
+        ('due word counts', lambda: due_counts.get_words_due(student, topic)),
+        ('build quiz', lambda: quiz_builder.get_quiz(student, topic.id)),
+        ('log quiz results', lambda: process_results(results, student, topic.id, today)),
+        ('get streak', lambda: QuizResults.get_user_streak(student)),
+        ('student filter: date range', filtered(student, date_range=7)),
+        ('student filter: topic and dates', filtered(student, topic=topic.id, date_from=today, date_to=today)),
+        ('teacher filter: student and dates', filtered(teacher, student=student.id, date_from=today)),
+        ('teacher filter: topic and date range', filtered(teacher, topic=topic.id, date_range=30)),
+        ('teacher filter: date range', filtered(teacher, date_range=7)),
+        ('points per day', lambda: chart_data.get_points_per_day_data(
+            student, *chart_data.get_points_per_day_range(_get_request(student)))),
+        ('points per day: all time', lambda: chart_data.get_points_per_day_data(student)),
+        ('charts validator: student', lambda: chart_data.get_results_etag(_get_request(student, date_range=7))),
+        ('charts validator: teacher', lambda: chart_data.get_results_etag(_get_request(teacher, date_range=7))),
+        ('points per day validator', lambda: chart_data.get_points_per_day_etag(_get_request(student))),
+        ('progress overview', lambda: chart_data.get_progress_overview_data(student)),
+        ('dashboard overview', chart_data.get_dashboard_overview_data),
+        ('weakest words for student', lambda: chart_data.get_weakest_words_data(student)),
+        ('weakest words for class', chart_data.get_weakest_words_data),
+        ('longest streaks', chart_data.get_student_streaks_data),
+        ('points per student leaderboard', lambda: leaderboard(topic=topic.id, date_range=7)),
+        ('word search', lambda: word_search.search('audit')),
+        ('word search filter', lambda: list(word_search.filter_words(Word.objects.all(), ['audit_origin']))),
+    ]
@@ -0,0 +1,86 @@
+import tempfile
+import threading
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, OperationalError
+
+from myproject.settings import WRITE_BEHIND_INTERVAL_MS
+from quizzes.models import Topic, Word
+from quizzes.utils import write_behind
+from quizzes.utils.quiz_logger import process_results
+from users.models import User
+
+
+class Command(BaseCommand):
+    """Terminal command comparing the throughput of quiz submissions with and without write-behind mode."""
+    help = 'Submit quizzes for many students at once, first writing each one directly and then in write-behind ' \
+           'mode, and report the submissions per second of each. Uses (and then deletes) a throwaway set of data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-s', '--students', type=int, default=30, help="Number of students submitting at once.")
+        parser.add_argument('-q', '--quizzes', type=int, default=5, help="Number of quizzes each student submits.")
+        parser.add_argument('-i', '--interval', type=int, default=WRITE_BEHIND_INTERVAL_MS,
+                            help="Milliseconds between write-behind flushes.")
+
+    def handle(self, *args, **options):
+        topic = Topic.objects.create(name='__benchmark_topic__')
+        words = Word.objects.bulk_create([Word(origin=f'__benchmark_origin_{i}__', target=f'__benchmark_target_{i}__')
+                                          for i in range(12)])
+        topic.words.add(*words)
+        students = [User.objects.create_user(username=f'__benchmark_student_{i}__') for i in range(options['students'])]
+        results = {str(word.id): i % 2 == 0 for i, word in enumerate(words)}
+        submissions = options['students'] * options['quizzes']
+
+        try:
+            def submit_directly(student):
+                for _ in range(options['quizzes']):
+                    # with SQLite, a submission which finds the database locked has to wait its turn and try again
+                    while True:
+                        try:
+                            process_results(results, student, topic.id)
+                            break
+                        except OperationalError:
+                            time.sleep(0.001)
+
+            elapsed = _run_concurrently(submit_directly, students)
+            self.stdout.write(f"Direct writes: {submissions} submissions in {elapsed:.2f}s "
+                              f"({submissions / elapsed:.1f} per second)")
+
+            with tempfile.TemporaryDirectory() as directory:
+                queue = write_behind.WriteBehindQueue(directory, options['interval'])
+                queue.start()
+
+                def submit_write_behind(student):
+                    for _ in range(options['quizzes']):
+                        write_behind.submit(results, student, topic.id, queue=queue)
+
+                start = time.perf_counter()
+                acknowledged = _run_concurrently(submit_write_behind, students)
+                queue.stop()
+                committed = time.perf_counter() - start
+
+            self.stdout.write(f"Write-behind: {submissions} submissions acknowledged in {acknowledged:.2f}s "
+                              f"({submissions / acknowledged:.1f} per second), all committed after {committed:.2f}s "
+                              f"({submissions / committed:.1f} per second)")
+        finally:
+            User.objects.filter(pk__in=[student.pk for student in students]).delete()
+            Word.objects.filter(pk__in=[word.pk for word in words]).delete()
+            topic.delete()
+
+
+def _run_concurrently(target, students):
+    """Run target(student) for every student, each in its own thread. Returns the elapsed time in seconds."""
+    def run(student):
+        try:
+            target(student)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run, args=(student,)) for student in students]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
@@ -1,16 +1,21 @@
 import datetime
+import functools
 import random
-from random import randint
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
 from django.core.management import BaseCommand
-from django.db.models import Count
+from django.db import connection, connections, transaction
+from django.utils import timezone
 
-from quizzes.models import Topic
+from myproject.settings import CORRECT_ANSWER_PTS
+from quizzes.models import Topic, Word, WordScore, QuizResults, QUIZ_INTERVALS, MAX_SCORE
+from quizzes.utils import daily_results, due_counts, leaderboards, quiz_cache, simulation, word_stats
 from quizzes.utils.quiz_builder import MAX_QUIZ_LENGTH
 from quizzes.utils.quiz_logger import process_results
 from users.models import User
 
-MAX_QUIZZES_PER_DAY = 10
+WRITE_BATCH_SIZE = 500  # students whose results are written to the database in each transaction
 
 
 class Command(BaseCommand):
@@ -19,59 +24,166 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('days', type=int, help='Indicates the number of days of quiz results to generate.')
+        parser.add_argument('-w', '--workers', type=int, default=1,
+                            help='Number of processes to divide the students between.')
+        parser.add_argument('-s', '--seed', type=int, help='Seed for the random choices, to reproduce a previous run.')
+        parser.add_argument('--per-quiz', action='store_true',
+                            help='Log every simulated quiz through the application itself (much slower). The '
+                                 'result is identical to the default, in-memory simulation given the same seed.')
 
     def handle(self, *args, **kwargs):
         days_to_generate = kwargs['days']
+        seed = kwargs['seed'] if kwargs['seed'] is not None else random.randrange(2 ** 32)
         today = datetime.date.today()
+        date_from = today - datetime.timedelta(days_to_generate)
 
         # Only active students are used to generate data (Teachers are also excluded)
-        students = User.objects.filter(is_teacher=False, is_active=True)
-
-        # counters for printing in terminal after execution
-        student_count = 0
-        quiz_count = 0
-
-        for student in students:
-            student_count += 1
-            quiz_date = today - datetime.timedelta(days_to_generate)
-
-            while quiz_date <= today:
-                # randomly decide how many quizzes to do today, and in which topics
-                quizzes_today = _get_quiz_today_count()
-
-                topic_list = list(Topic.objects.annotate(word_count=Count('words'))
-                                  .filter(is_hidden=False, word_count__gte=4))
-                topics_to_quiz = random.choices(topic_list, k=quizzes_today)
-
-                for topic in topics_to_quiz:
-                    # do the quizzes!
-                    words_to_quiz = topic.words_due_revision(student, quiz_date)[:MAX_QUIZ_LENGTH]
-                    results = {word.id: _correct_or_incorrect() for word in words_to_quiz}
-
-                    if results:
-                        process_results(results, student, topic.id, quiz_date)
-                        quiz_count += 1
-
-                quiz_date += datetime.timedelta(1)
-
-        print(f"{student_count} students took {quiz_count} quizzes covering {days_to_generate} days.")
-
-
-def _get_quiz_today_count():
-    """Helper method to provide a more natural randomised count of quizzes to be taken 'today'."""
-    quiz_count = -1
-    keep_quizzing = True
-    quiz_pc = 90
-    pc_decay = 5  # after each quiz, it becomes slightly less likely the student will do another.
-
-    while keep_quizzing and quiz_count <= MAX_QUIZZES_PER_DAY:
-        quiz_count += 1
-        keep_quizzing = randint(1, 100) <= quiz_pc
-        quiz_pc -= pc_decay
-    return quiz_count
-
-
-def _correct_or_incorrect():
-    """Helper method to provide a boolean that is 60% likely to be True."""
-    pc_accurate = 60
-    return random.randint(1, 100) <= pc_accurate
+        students = User.objects.filter(is_teacher=False, is_active=True).order_by('id')
+
+        topics = load_topics(Topic.objects.all())
+
+        if kwargs['per_quiz']:
+            student_count, quiz_count = _log_each_quiz(students, topics, seed, date_from, today)
+        else:
+            student_count, quiz_count = simulate_in_memory(students, topics, seed, date_from, today,
+                                                           kwargs['workers'])
+
+        self.stdout.write(f"{student_count} students took {quiz_count} quizzes covering {days_to_generate} days "
+                          f"(seed {seed}).")
+
+
+def load_topics(topics):
+    """Load the given Topics which students can take quizzes in, along with their Words, ready for simulation."""
+    word_ids = defaultdict(list)
+    topic_ids = topics.filter(is_hidden=False, word_count__gte=4).values_list('id', flat=True)
+    for topic_id, word_id in Word.topics.through.objects.filter(topic_id__in=topic_ids)\
+            .values_list('topic_id', 'word_id'):
+        word_ids[topic_id].append(word_id)
+    return [simulation.SimulatedTopic(topic_id, word_ids[topic_id]) for topic_id in sorted(word_ids)]
+
+
+def _log_each_quiz(students, topics, seed, date_from, date_to):
+    """Simulate the students by logging every quiz through quiz_logger, exactly as if taken in the application."""
+    topics_by_id = {topic.id: Topic.objects.get(pk=topic.id) for topic in topics}
+
+    # counters for printing in terminal after execution
+    student_count = 0
+    quiz_count = 0
+
+    for student in students:
+        student_count += 1
+
+        def take_quiz(topic, quiz_date, rng):
+            nonlocal quiz_count
+            words_to_quiz = topics_by_id[topic.id].words_due_revision(student, quiz_date)\
+                .order_by('id').values_list('id', flat=True)[:MAX_QUIZ_LENGTH]
+            results = {str(word_id): simulation.correct_or_incorrect(rng) for word_id in words_to_quiz}
+
+            if results:
+                process_results(results, student, topic.id, quiz_date)
+                quiz_count += 1
+
+        simulation.simulate_days(simulation.get_random(seed, student.id), topics, date_from, date_to, take_quiz)
+
+    return student_count, quiz_count
+
+
+def simulate_in_memory(students, topics, seed, date_from, date_to, workers):
+    """Simulate the students in memory (spread across a pool of worker processes), writing the results in bulk."""
+    simulate = functools.partial(simulation.simulate_student, seed=seed, date_from=date_from, date_to=date_to,
+                                 quiz_length=MAX_QUIZ_LENGTH, intervals=QUIZ_INTERVALS, max_score=MAX_SCORE)
+    student_count = 0
+    quiz_count = 0
+
+    students = list(students.only('id', 'streak', 'last_quiz_date'))
+    if workers > 1:
+        # the workers never use the database, but shouldn't inherit an open connection to it either
+        connections.close_all()
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=simulation.init_worker, initargs=(topics,))
+        run = functools.partial(executor.map, simulate, chunksize=16)
+    else:
+        executor = None
+        run = functools.partial(map, functools.partial(simulate, topics=topics))
+
+    try:
+        for start in range(0, len(students), WRITE_BATCH_SIZE):
+            simulated_students = list(run(_load_students(students[start:start + WRITE_BATCH_SIZE])))
+            _write_simulated_students(simulated_students)
+            student_count += len(simulated_students)
+            quiz_count += sum(len(student.quiz_results) for student in simulated_students)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    # bring every student's stored counts of Words due revision, and every Word's totals, up to date in one go
+    due_counts.recompute_topics(list(Topic.objects.values_list('id', flat=True)))
+    word_stats.rebuild()
+    leaderboards.invalidate()
+    return student_count, quiz_count
+
+
+def _load_students(students):
+    """Load the existing schedule of each student, ready for simulation."""
+    scores = defaultdict(dict)
+    for student_id, word_id, *score in WordScore.objects.filter(student__in=students).values_list(
+            'student_id', 'word_id', 'consecutive_correct', 'times_seen', 'times_correct', 'next_review'):
+        scores[student_id][word_id] = score
+    return [simulation.SimulatedStudent(student.id, scores[student.id], student.streak, student.last_quiz_date)
+            for student in students]
+
+
+@transaction.atomic
+def _write_simulated_students(simulated_students):
+    """Write the final state of each simulated student to the database, with one prepared statement per table (the
+    ORM's bulk_create spends far longer building model instances and SQL than the database spends on the inserts)."""
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    adapt_date = connection.ops.adapt_datefield_value
+    word_scores = []
+    quiz_results = []
+    totals = defaultdict(lambda: [0, 0, 0, 0])  # (student, topic, date): [quizzes, correct, incorrect, points]
+    streaks = []
+
+    for student in simulated_students:
+        for word_id in student.changed_word_ids:
+            consecutive_correct, times_seen, times_correct, next_review = student.scores[word_id]
+            word_scores.append((word_id, student.id, consecutive_correct, times_seen, times_correct,
+                                adapt_date(next_review), now))
+        for topic_id, date_created, correct_answers, incorrect_answers in student.quiz_results:
+            quiz_results.append((student.id, topic_id, adapt_date(date_created), correct_answers, incorrect_answers,
+                                 correct_answers * CORRECT_ANSWER_PTS))
+            day_totals = totals[student.id, topic_id, date_created]
+            for i, amount in enumerate((1, correct_answers, incorrect_answers, correct_answers * CORRECT_ANSWER_PTS)):
+                day_totals[i] += amount
+        if student.quiz_results:
+            streaks.append((student.streak, adapt_date(student.last_quiz_date), student.id))
+
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.executemany(_insert_sql(WordScore, ['word', 'student', 'consecutive_correct', 'times_seen',
+                                                   'times_correct', 'next_review', 'last_updated'],
+                                       conflict_fields=['word', 'student']), word_scores)
+        cursor.executemany(_insert_sql(QuizResults, ['student', 'topic', 'date_created', 'correct_answers',
+                                                     'incorrect_answers', 'points']), quiz_results)
+        cursor.executemany(f"UPDATE {qn(User._meta.db_table)} SET {_column(User, 'streak')} = %s, "
+                           f"{_column(User, 'last_quiz_date')} = %s WHERE {_column(User, 'id')} = %s", streaks)
+    daily_results.add(key + tuple(day_totals) for key, day_totals in totals.items())
+
+    for student in simulated_students:
+        if student.changed_word_ids:
+            quiz_cache.schedule_changed(student.id)
+
+
+def _column(model, field_name):
+    return connection.ops.quote_name(model._meta.get_field(field_name).column)
+
+
+def _insert_sql(model, field_names, conflict_fields=()):
+    """An INSERT of a single row into the model's table, replacing any existing row which conflicts with it."""
+    columns = [_column(model, name) for name in field_names]
+    sql = f"INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({', '.join(columns)}) " \
+          f"VALUES ({', '.join(['%s'] * len(columns))})"
+    if conflict_fields:
+        conflict_columns = [_column(model, name) for name in conflict_fields]
+        sql += f" ON CONFLICT ({', '.join(conflict_columns)}) DO UPDATE SET " + \
+               ', '.join(f'{column} = EXCLUDED.{column}' for column in columns if column not in conflict_columns)
+    return sql
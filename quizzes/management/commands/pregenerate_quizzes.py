@@ -0,0 +1,26 @@
+from django.core.management import BaseCommand
+
+from quizzes.models import Topic
+from quizzes.utils.quiz_cache import pregenerate
+from users.models import User
+
+
+class Command(BaseCommand):
+    """Terminal command for warming the cache with every student's next quiz in every live Topic."""
+    help = 'Pre-generate the next quiz for every active student in every live Topic. Schedule this to run before the ' \
+           'school day starts (requires a cache backend shared with the web workers).'
+
+    def handle(self, *args, **kwargs):
+        topic_ids = list(Topic.live_topics().values_list('id', flat=True))
+        students = User.objects.filter(is_teacher=False, is_active=True)
+
+        # counters for printing in terminal after execution
+        student_count = 0
+        quiz_count = 0
+
+        for student in students.iterator():
+            student_count += 1
+            for topic_id in topic_ids:
+                quiz_count += pregenerate(student, topic_id)
+
+        self.stdout.write(f"Pre-generated {quiz_count} quizzes for {student_count} students.")
@@ -0,0 +1,42 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management import BaseCommand
+from django.db import connections
+
+from quizzes.models import DailyResults
+from quizzes.utils import daily_results, leaderboards
+from users.models import User
+
+STUDENTS_PER_TASK = 500
+
+
+class Command(BaseCommand):
+    """Terminal command for rebuilding the DailyResults rollup from every student's QuizResults."""
+    help = 'Rebuild the daily totals of quizzes, answers and points read by the charts from the QuizResults, e.g. ' \
+           'after importing results. The totals are summed by a pool of processes. Quizzes logged while the command ' \
+           'runs may be missed, so run it while the application is quiet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                            help='Number of processes to divide the students between.')
+
+    def handle(self, *args, **kwargs):
+        student_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+        tasks = [student_ids[start:start + STUDENTS_PER_TASK]
+                 for start in range(0, len(student_ids), STUDENTS_PER_TASK)]
+
+        if kwargs['workers'] > 1:
+            # each worker opens its own connection to the database, rather than sharing this process's connection
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=kwargs['workers'], initializer=django.setup) as executor:
+                for students, rows in zip(tasks, executor.map(daily_results.summarise, tasks)):
+                    daily_results.rebuild(students, rows)
+        else:
+            for students in tasks:
+                daily_results.rebuild(students)
+        leaderboards.invalidate()
+
+        self.stdout.write(f"Daily results rebuilt for {len(student_ids)} users "
+                          f"({DailyResults.objects.count()} rows).")
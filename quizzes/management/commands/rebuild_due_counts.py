@@ -0,0 +1,45 @@
+import datetime
+
+from django.core.management import BaseCommand, CommandError
+
+from quizzes.models import DueWordCount, Topic
+
+
+class Command(BaseCommand):
+    """Terminal command for checking the stored counts of Words due revision against the live schedule query."""
+    help = 'Check every stored count of Words due revision against the live query, correcting any that have drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report drifted counts (exiting with an error if any are found), do not fix them.')
+
+    def handle(self, *args, **kwargs):
+        today = datetime.date.today()
+        rows_to_update = []
+        drifted = 0
+
+        for row in DueWordCount.objects.select_related('student', 'topic').iterator():
+            if row.topic:
+                live_count = row.topic.words_due_revision(row.student, today).count()
+            else:
+                live_count = Topic.all_topics_words_due_revision(row.student, today).count()
+
+            # rows from previous days are simply out of date, only count today's rows as having drifted
+            if row.words_due != live_count:
+                if row.as_of == today:
+                    drifted += 1
+                    self.stderr.write(f"Drifted: {row} (live query: {live_count})")
+                row.words_due = live_count
+                row.as_of = today
+                rows_to_update.append(row)
+            elif row.as_of != today:
+                row.as_of = today
+                rows_to_update.append(row)
+
+        if kwargs['check']:
+            if drifted:
+                raise CommandError(f"{drifted} due word counts do not match the live query.")
+            self.stdout.write("All due word counts match the live query.")
+        else:
+            DueWordCount.objects.bulk_update(rows_to_update, fields=['words_due', 'as_of'], batch_size=500)
+            self.stdout.write(f"{len(rows_to_update)} due word counts rebuilt ({drifted} had drifted).")
@@ -0,0 +1,19 @@
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+
+from quizzes.models import Word
+from quizzes.utils import word_search
+
+
+class Command(BaseCommand):
+    """Terminal command for rebuilding the search index of the Words."""
+    help = 'Rebuild the search index used by the editor and admin from every Word and its Topics, e.g. after ' \
+           'importing Words in bulk.'
+
+    def handle(self, *args, **kwargs):
+        if not word_search.is_supported():
+            raise CommandError("The search index requires SQLite 3.34 or later; searches use icontains instead.")
+
+        with transaction.atomic():
+            word_search.rebuild()
+        self.stdout.write(f"Search index rebuilt for {Word.objects.count()} words.")
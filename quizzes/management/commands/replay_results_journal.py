@@ -0,0 +1,13 @@
+from django.core.management import BaseCommand
+
+from quizzes.utils.write_behind import get_queue
+
+
+class Command(BaseCommand):
+    """Terminal command for recovering quiz results journalled by a web worker which crashed before writing them."""
+    help = 'Write any quiz results left in the write-behind journal by crashed processes to the database. Journals ' \
+           'still in use by running workers are left alone.'
+
+    def handle(self, *args, **kwargs):
+        replayed = get_queue().recover()
+        self.stdout.write(f"{replayed} journalled quiz results written to the database.")
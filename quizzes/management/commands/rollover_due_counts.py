@@ -0,0 +1,12 @@
+from django.core.management import BaseCommand
+
+from quizzes.utils.due_counts import rollover
+
+
+class Command(BaseCommand):
+    """Terminal command for advancing the stored counts of Words due revision to the current date."""
+    help = 'Roll the stored counts of Words due revision over to today. Schedule this to run just after midnight.'
+
+    def handle(self, *args, **kwargs):
+        rolled_over = rollover()
+        self.stdout.write(f"{rolled_over} due word counts rolled over to today.")
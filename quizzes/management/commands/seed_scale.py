@@ -0,0 +1,102 @@
+import datetime
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from quizzes.management.commands.generate_results import load_topics, simulate_in_memory
+from quizzes.models import Topic, Word
+from users.models import User
+
+BATCH_SIZE = 1000
+SYLLABLES = ('ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'ze', 'pa', 'do', 'gu', 'he', 'ri', 'ba', 'ku')
+FIRST_NAMES = ('Alex', 'Sam', 'Jo', 'Charlie', 'Priya', 'Mohammed', 'Olivia', 'Noah', 'Amara', 'Luca', 'Mei', 'Ruth')
+LAST_NAMES = ('Smith', 'Jones', 'Khan', 'Taylor', 'Brown', 'Patel', 'Evans', 'Chen', 'Okafor', 'Garcia', 'Novak')
+
+
+class Command(BaseCommand):
+    """Terminal command for creating a large, realistic dataset for measuring performance at scale."""
+    help = 'Create the given numbers of Topics, Words and students, then simulate the students taking quizzes over ' \
+           'a number of days to give them a realistic WordScore and QuizResults history. The same options and seed ' \
+           'always create the same data. Intended for an otherwise empty database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--topics', type=int, default=50, help='Number of Topics to create.')
+        parser.add_argument('--words', type=int, default=2000, help='Number of Words to create.')
+        parser.add_argument('--students', type=int, default=1000, help='Number of students to create.')
+        parser.add_argument('--days', type=int, default=30, help='Number of days of quiz history to simulate.')
+        parser.add_argument('--multi-topic', type=int, default=10,
+                            help='Percentage of Words which also belong to a second Topic.')
+        parser.add_argument('--password', default='scale',
+                            help='Password given to every student created.')
+        parser.add_argument('-s', '--seed', type=int, default=0, help='Seed for the random choices.')
+        parser.add_argument('-w', '--workers', type=int, default=1,
+                            help='Number of processes to divide the simulation of the students between.')
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith='scale_').exists() or \
+                Topic.objects.filter(name__startswith='Scale ').exists():
+            raise CommandError('This database already contains scale data. Use a fresh database, or flush this one.')
+
+        rng = random.Random(options['seed'])
+        today = datetime.date.today()
+        date_from = today - datetime.timedelta(options['days'])
+        start = time.perf_counter()
+
+        with transaction.atomic():
+            topics = _create_topics(options['topics'], date_from)
+            words = _create_words(rng, options['words'])
+            _add_words_to_topics(rng, topics, words, options['multi_topic'])
+            students = _create_students(rng, options['students'], options['password'],
+                                        timezone.now() - datetime.timedelta(options['days']))
+        self.stdout.write(f"Created {len(topics)} topics, {len(words)} words and {len(students)} students "
+                          f"in {time.perf_counter() - start:.1f}s.")
+
+        start = time.perf_counter()
+        student_count, quiz_count = simulate_in_memory(
+            User.objects.filter(pk__in=[student.pk for student in students]).order_by('id'),
+            load_topics(Topic.objects.filter(pk__in=[topic.pk for topic in topics])),
+            options['seed'], date_from, today, options['workers'])
+        self.stdout.write(f"{student_count} students took {quiz_count} quizzes covering {options['days']} days "
+                          f"in {time.perf_counter() - start:.1f}s (seed {options['seed']}).")
+
+
+def _create_topics(count, available_from):
+    topics = [Topic(name=f'Scale {i:05d}', long_desc=f'Scale test topic number {i}', available_from=available_from)
+              for i in range(count)]
+    return Topic.objects.bulk_create(topics, batch_size=BATCH_SIZE)
+
+
+def _create_words(rng, count):
+    words = []
+    for i in range(count):
+        word = ''.join(rng.choices(SYLLABLES, k=rng.randint(1, 4)))
+        words.append(Word(origin=f'scale {i} {word}', target=f'{word} {i}'))
+    return Word.objects.bulk_create(words, batch_size=BATCH_SIZE)
+
+
+def _add_words_to_topics(rng, topics, words, multi_topic_pc):
+    """Divide the Words between the Topics unevenly (as real Topics are), a few of them belonging to two Topics."""
+    # each Topic has a random weight, so some are much larger than others
+    weights = [rng.uniform(0.2, 1) for _ in topics]
+    topic_words = []
+    for word in words:
+        topic, other_topic = rng.choices(topics, weights=weights, k=2)
+        topic_words.append(Word.topics.through(topic_id=topic.pk, word_id=word.pk))
+        if other_topic != topic and rng.randint(1, 100) <= multi_topic_pc:
+            topic_words.append(Word.topics.through(topic_id=other_topic.pk, word_id=word.pk))
+
+    Word.topics.through.objects.bulk_create(topic_words, batch_size=BATCH_SIZE)
+    Topic.update_word_counts([topic.pk for topic in topics])
+
+
+def _create_students(rng, count, password, date_joined):
+    # hashing is deliberately slow, so every student shares the one hash
+    password = make_password(password)
+    students = [User(username=f'scale_{i:06d}', first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                     password=password, date_joined=date_joined)
+                for i in range(count)]
+    return User.objects.bulk_create(students, batch_size=BATCH_SIZE)
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.5 on 2026-10-18 03:21
+
+import datetime
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('quizzes', '0015_alter_quizresults_correct_answers_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DueWordCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('words_due', models.PositiveIntegerField(default=0)),
+                ('as_of', models.DateField(default=datetime.date.today)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('topic', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='quizzes.topic')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='duewordcount',
+            constraint=models.UniqueConstraint(fields=('student', 'topic'), name='unique_student_topic_due_count'),
+        ),
+        migrations.AddConstraint(
+            model_name='duewordcount',
+            constraint=models.UniqueConstraint(condition=models.Q(('topic__isnull', True)), fields=('student',), name='unique_student_all_topics_due_count'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.5 on 2026-10-18 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0016_duewordcount'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizresults',
+            index=models.Index(fields=['student', 'date_created', 'points'], name='quizresults_student_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizresults',
+            index=models.Index(fields=['topic', 'date_created'], name='quizresults_topic_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizresults',
+            index=models.Index(fields=['date_created'], name='quizresults_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wordscore',
+            index=models.Index(fields=['student', 'next_review', 'word'], name='wordscore_student_review_idx'),
+        ),
+    ]
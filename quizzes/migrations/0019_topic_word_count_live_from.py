@@ -0,0 +1,37 @@
+# Generated by Django 4.2.5 on 2026-10-18 03:43
+
+from django.db import migrations, models
+from django.db.models import Case, Count, F, OuterRef, Subquery, When
+from django.db.models.functions import Coalesce
+
+
+def count_words(apps, schema_editor):
+    """Fill in the word count and live date of every existing Topic."""
+    Topic = apps.get_model('quizzes', 'Topic')
+    TopicWords = apps.get_model('quizzes', 'Word').topics.through
+    words_in_topic = TopicWords.objects.filter(topic_id=OuterRef('pk'))\
+        .values('topic_id').annotate(total=Count('id')).values('total')
+    Topic.objects.update(word_count=Coalesce(Subquery(words_in_topic), 0))
+    Topic.objects.update(live_from=Case(When(is_hidden=False, word_count__gte=4, then=F('available_from')),
+                                        default=None))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0018_flushedjournal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topic',
+            name='live_from',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='topic',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_words, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.5 on 2026-10-18 04:06
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+
+def summarise_results(apps, schema_editor):
+    """Total up the existing QuizResults of each student, Topic and day."""
+    QuizResults = apps.get_model('quizzes', 'QuizResults')
+    DailyResults = apps.get_model('quizzes', 'DailyResults')
+    totals = QuizResults.objects.values('student_id', 'topic_id', 'date_created')\
+        .annotate(quizzes_taken=Count('id'), total_correct=Sum('correct_answers'),
+                  total_incorrect=Sum('incorrect_answers'), total_points=Sum('points')).order_by()
+    DailyResults.objects.bulk_create((DailyResults(student_id=row['student_id'], topic_id=row['topic_id'],
+                                                   date=row['date_created'], quizzes_taken=row['quizzes_taken'],
+                                                   correct_answers=row['total_correct'],
+                                                   incorrect_answers=row['total_incorrect'],
+                                                   points=row['total_points']) for row in totals.iterator()),
+                                     batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('quizzes', '0019_topic_word_count_live_from'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyResults',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quizzes_taken', models.PositiveIntegerField(default=0)),
+                ('correct_answers', models.PositiveIntegerField(default=0)),
+                ('incorrect_answers', models.PositiveIntegerField(default=0)),
+                ('points', models.PositiveIntegerField(default=0)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('topic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='quizzes.topic')),
+            ],
+            options={
+                'verbose_name_plural': 'daily results',
+                'indexes': [models.Index(fields=['topic', 'date'], name='dailyresults_topic_date_idx'), models.Index(fields=['date'], name='dailyresults_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyresults',
+            constraint=models.UniqueConstraint(fields=('student', 'date', 'topic'), name='unique_student_date_topic_results'),
+        ),
+        migrations.RunPython(summarise_results, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.5 on 2026-10-18 04:25
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+import django.db.models.expressions
+import django.db.models.functions.comparison
+
+
+def summarise_word_scores(apps, schema_editor):
+    """Total up the existing WordScores of each Word."""
+    WordScore = apps.get_model('quizzes', 'WordScore')
+    WordStats = apps.get_model('quizzes', 'WordStats')
+    totals = WordScore.objects.values('word_id')\
+        .annotate(total_seen=Sum('times_seen'), total_correct=Sum('times_correct'), students=Count('id')).order_by()
+    WordStats.objects.bulk_create((WordStats(word_id=row['word_id'], times_seen=row['total_seen'],
+                                             times_correct=row['total_correct'], students=row['students'])
+                                   for row in totals.iterator()), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0020_dailyresults'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WordStats',
+            fields=[
+                ('word', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='quizzes.word')),
+                ('times_seen', models.PositiveIntegerField(default=0)),
+                ('times_correct', models.PositiveIntegerField(default=0)),
+                ('students', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'word stats',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='wordscore',
+            index=models.Index(models.F('student'), django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast('times_correct', output_field=models.FloatField()), '/', models.F('times_seen')), name='wordscore_student_accuracy_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wordstats',
+            index=models.Index(django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast('times_correct', output_field=models.FloatField()), '/', models.F('times_seen')), name='wordstats_accuracy_idx'),
+        ),
+        migrations.RunPython(summarise_word_scores, migrations.RunPython.noop),
+    ]
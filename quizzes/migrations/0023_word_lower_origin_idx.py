@@ -0,0 +1,18 @@
+# Generated by Django 4.2.5 on 2026-10-18 04:45
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0022_leaderboards'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(django.db.models.functions.text.Lower('origin'), models.F('id'), name='word_lower_origin_idx'),
+        ),
+    ]
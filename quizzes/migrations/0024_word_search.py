@@ -0,0 +1,60 @@
+from django.db import migrations
+
+# index the Words (those with the given ids, or all of them) along with the names of their Topics
+INDEX_WORDS = "INSERT INTO quizzes_word_search (rowid, origin, target, topics) " \
+              "SELECT w.id, w.origin, w.target, " \
+              "(SELECT group_concat(t.name, ' ') FROM quizzes_word_topics wt " \
+              "JOIN quizzes_topic t ON t.id = wt.topic_id WHERE wt.word_id = w.id) " \
+              "FROM quizzes_word w{where};"
+REMOVE_WORDS = "DELETE FROM quizzes_word_search WHERE rowid {ids};"
+TOPIC_WORDS = "IN (SELECT word_id FROM quizzes_word_topics WHERE topic_id = NEW.id)"
+
+
+def reindex(ids):
+    return REMOVE_WORDS.format(ids=ids) + INDEX_WORDS.format(where=f' WHERE w.id {ids}')
+
+
+# triggers keep the index in step with every change, including those made in bulk (which send no signals)
+TRIGGERS = {
+    'quizzes_word_search_word_insert': ("AFTER INSERT ON quizzes_word", reindex('= NEW.id')),
+    'quizzes_word_search_word_update': ("AFTER UPDATE OF origin, target ON quizzes_word", reindex('= NEW.id')),
+    'quizzes_word_search_word_delete': ("AFTER DELETE ON quizzes_word", REMOVE_WORDS.format(ids='= OLD.id')),
+    'quizzes_word_search_topic_add': ("AFTER INSERT ON quizzes_word_topics", reindex('= NEW.word_id')),
+    'quizzes_word_search_topic_remove': ("AFTER DELETE ON quizzes_word_topics", reindex('= OLD.word_id')),
+    'quizzes_word_search_topic_rename': ("AFTER UPDATE OF name ON quizzes_topic", reindex(TOPIC_WORDS)),
+}
+
+
+def is_supported(schema_editor):
+    connection = schema_editor.connection
+    return connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 34)
+
+
+def create_word_search(apps, schema_editor):
+    """Create the search index of the Words (SQLite only) and its triggers, and index the existing Words."""
+    if not is_supported(schema_editor):
+        return
+    schema_editor.execute("CREATE VIRTUAL TABLE quizzes_word_search USING fts5(origin, target, topics, "
+                          "tokenize='trigram')")
+    for name, (event, action) in TRIGGERS.items():
+        schema_editor.execute(f"CREATE TRIGGER {name} {event} BEGIN {action} END")
+    schema_editor.execute(INDEX_WORDS.format(where=''))
+
+
+def drop_word_search(apps, schema_editor):
+    if not is_supported(schema_editor):
+        return
+    for name in TRIGGERS:
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    schema_editor.execute("DROP TABLE IF EXISTS quizzes_word_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0023_word_lower_origin_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_word_search, drop_word_search),
+    ]
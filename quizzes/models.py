@@ -1,13 +1,18 @@
 import datetime
 
 from django.db import models
-from django.db.models import F, Count
+from django.db.models import F, Count, Q, Case, When, Value, OuterRef, Subquery
+from django.db.models.functions import Cast, Coalesce, Lower
 
 from users.models import User
 
 QUIZ_INTERVALS = (1, 3, 7, 13, 21, 30)
 MAX_SCORE = len(QUIZ_INTERVALS) - 1
 
+# the proportion of times a Word was answered correctly, as indexed (queries must use the same expression to be able to
+# read the weakest Words in order from the index)
+ACCURACY = Cast('times_correct', output_field=models.FloatField()) / F('times_seen')
+
 
 class Topic(models.Model):
     """A Django model representing a 'Topic', that is, a thematic grouping of Words.
@@ -27,9 +32,21 @@ class Topic(models.Model):
     available_from = models.DateField(default=datetime.date.today)
     date_created = models.DateTimeField(auto_now_add=True)
 
+    # maintained by save() and the model signals: live_from is the date the Topic goes live, or null if it cannot
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    live_from = models.DateField(null=True, blank=True, editable=False, db_index=True)
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            self.word_count = self.words.count()  # Words may have been added since this instance was loaded
+        self.live_from = self.available_from if not self.is_hidden and self.word_count >= 4 else None
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'word_count', 'live_from'}
+        super().save(*args, **kwargs)
+
     def words_due_revision(self, user, today=datetime.date.today()):
         """Returns a queryset containing this Topic's Words due for revision today (or on specified date)."""
         words_in_topic = Word.objects.filter(topics=self)
@@ -42,15 +59,24 @@ class Topic(models.Model):
     def all_topics_words_due_revision(user, today=datetime.date.today()):
         """Returns a queryset containing all Words across all Topics due for revision today (or on specified date)."""
         # word must part of a live topic to be counted
-        all_words = Word.objects.filter(topics__in=Topic.live_topics().values_list('id'))
+        all_words = Word.objects.filter(topics__in=Topic.live_topics(today).values_list('id'))
         words_not_due = all_words.filter(wordscore__next_review__gt=today, wordscore__student=user)
         return all_words.difference(words_not_due)
 
     @staticmethod
-    def live_topics(today=datetime.date.today()):
+    def live_topics(today=None):
         """Returns a queryset containing all live Topics, i.e. those with >= 4 Words, not future dated, not hidden."""
-        return Topic.objects.annotate(word_count=Count('words')).filter(word_count__gte=4,
-                                                                        available_from__lte=today, is_hidden=False)
+        today = today or datetime.date.today()
+        return Topic.objects.filter(live_from__lte=today)
+
+    @staticmethod
+    def update_word_counts(topic_ids):
+        """Recount the Words in each of the given Topics, and so whether they are able to go live."""
+        words_in_topic = Word.topics.through.objects.filter(topic_id=OuterRef('pk'))\
+            .values('topic_id').annotate(total=Count('id')).values('total')
+        topics = Topic.objects.filter(pk__in=topic_ids)
+        topics.update(word_count=Coalesce(Subquery(words_in_topic), 0))
+        topics.update(live_from=Case(When(is_hidden=False, word_count__gte=4, then=F('available_from')), default=None))
 
 
 class Word(models.Model):
@@ -68,6 +94,12 @@ class Word(models.Model):
                                       through_fields=('word', 'student'), related_name='words')
     date_created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # the editor lists Words alphabetically, a page at a time (see editor.utils.pagination)
+            models.Index(Lower('origin'), F('id'), name='word_lower_origin_idx'),
+        ]
+
     def __str__(self):
         return f'{self.origin} -> {self.target}'
 
@@ -89,6 +121,12 @@ class WordScore(models.Model):
 
     class Meta:
         unique_together = ('word', 'student')
+        indexes = [
+            # the schedule is almost always read per student, by review date (word is included to cover the joins)
+            models.Index(fields=['student', 'next_review', 'word'], name='wordscore_student_review_idx'),
+            # each student's weakest Words are read from the front of this index
+            models.Index(F('student'), ACCURACY, name='wordscore_student_accuracy_idx'),
+        ]
 
     def __str__(self):
         return f'{self.student} / {self.word}: {self.score()}'
@@ -116,31 +154,179 @@ class QuizResults(models.Model):
     incorrect_answers = models.PositiveIntegerField(default=0)
     points = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            # points are included so the per-day totals can be read from the index alone
+            models.Index(fields=['student', 'date_created', 'points'], name='quizresults_student_date_idx'),
+            models.Index(fields=['topic', 'date_created'], name='quizresults_topic_date_idx'),
+            models.Index(fields=['date_created'], name='quizresults_date_idx'),
+        ]
+
     def __str__(self):
         return f"Quiz Results: {self.student.get_full_name()} / {self.topic} on {self.date_created}"
 
     @staticmethod
-    def update_user_streak(student, today=datetime.date.today()):
+    def update_user_streak(student, today=None):
         """Updates user's streak if this is their first quiz taken today."""
+        today = today or datetime.date.today()
+        if student.last_quiz_date is not None and student.last_quiz_date >= today:
+            return
+
+        # the update is conditional, so that overlapping submissions only extend the streak once
         yesterday = today - datetime.timedelta(1)
-        quizzes_since_yesterday = QuizResults.objects.filter(
-            student=student, date_created__gte=yesterday).values_list('date_created', flat=True)
-
-        if today not in quizzes_since_yesterday:
-            if yesterday in quizzes_since_yesterday:
-                # student is continuing an existing streak
-                student.streak = F('streak') + 1
-            else:
-                # student is starting a new streak
-                student.streak = 1
-            student.save(update_fields=['streak'])
+        User.objects.filter(Q(last_quiz_date__lt=today) | Q(last_quiz_date__isnull=True), pk=student.pk).update(
+            streak=Case(When(last_quiz_date=yesterday, then=F('streak') + 1), default=Value(1)),
+            last_quiz_date=today)
+
+        if student.last_quiz_date == yesterday:
+            # student is continuing an existing streak
+            student.streak += 1
+        else:
+            # student is starting a new streak
+            student.streak = 1
+        student.last_quiz_date = today
 
     @staticmethod
     def get_user_streak(student):
         """Gets the user's current streak as of now. (User.streak stores the streak as of its latest update)."""
         yesterday = datetime.date.today() - datetime.timedelta(1)
-        if QuizResults.objects.filter(student=student, date_created__gte=yesterday).exists():
+        if student.last_quiz_date is not None and student.last_quiz_date >= yesterday:
             streak = student.streak
         else:
             streak = 0
         return streak
+
+
+class DailyResults(models.Model):
+    """A Django model summarising all the QuizResults of a student in a Topic on a single day.
+
+    The charts read these rows rather than the individual QuizResults, so their cost depends on the date range being
+    charted, not on the length of the history. Rows are maintained incrementally (see utils.daily_results).
+    """
+
+    student = models.ForeignKey(User, on_delete=models.CASCADE)
+    topic = models.ForeignKey(Topic, on_delete=models.CASCADE)
+    date = models.DateField()
+    quizzes_taken = models.PositiveIntegerField(default=0)
+    correct_answers = models.PositiveIntegerField(default=0)
+    incorrect_answers = models.PositiveIntegerField(default=0)
+    points = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'daily results'
+        constraints = [
+            models.UniqueConstraint(fields=('student', 'date', 'topic'), name='unique_student_date_topic_results'),
+        ]
+        indexes = [
+            models.Index(fields=['topic', 'date'], name='dailyresults_topic_date_idx'),
+            models.Index(fields=['date'], name='dailyresults_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Daily Results: {self.student.get_full_name()} / {self.topic} on {self.date}"
+
+
+class WordStats(models.Model):
+    """A Django model totalling every student's WordScore for a Word, from which the class's weakest Words are read.
+
+    Rows are maintained incrementally by quiz_logger and the model signals (see utils.word_stats).
+    """
+
+    word = models.OneToOneField(Word, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    times_seen = models.PositiveIntegerField(default=0)
+    times_correct = models.PositiveIntegerField(default=0)
+    students = models.PositiveIntegerField(default=0)  # i.e. the number of WordScores
+
+    class Meta:
+        verbose_name_plural = 'word stats'
+        indexes = [
+            models.Index(ACCURACY, name='wordstats_accuracy_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.word}: {self.times_correct}/{self.times_seen} correct by {self.students} students'
+
+
+class Leaderboard(models.Model):
+    """A Django model representing a ranking of the students by the points they earned in a Topic (or, when topic is
+    null, in all Topics) over one of the preset windows of days offered by the Dashboard's filters.
+
+    A board's entries are added to incrementally as quizzes are logged, but are only trusted for the date stored in
+    as_of (as the windows move on each day). Older boards are rebuilt on the next read (see utils.leaderboards).
+    """
+
+    ALL_TIME = -1
+    WINDOWS = (0, 7, 30, ALL_TIME)  # days before today which are included, as in the charts' date_range filter
+
+    topic = models.ForeignKey(Topic, on_delete=models.CASCADE, null=True, blank=True)
+    window = models.SmallIntegerField(choices=[(0, 'Today'), (7, 'Last 7 Days'), (30, 'Last 30 Days'),
+                                               (ALL_TIME, 'All Time')])
+    as_of = models.DateField(null=True, blank=True)  # null when the board must be rebuilt before it is next read
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=('topic', 'window'), name='unique_topic_window_leaderboard'),
+            models.UniqueConstraint(fields=('window',), condition=models.Q(topic__isnull=True),
+                                    name='unique_all_topics_window_leaderboard'),
+        ]
+
+    def __str__(self):
+        return f'{self.topic or "All Topics"} / {self.get_window_display()}: as of {self.as_of}'
+
+
+class LeaderboardEntry(models.Model):
+    """A Django model representing a student's total points on a Leaderboard."""
+
+    leaderboard = models.ForeignKey(Leaderboard, on_delete=models.CASCADE, related_name='entries')
+    student = models.ForeignKey(User, on_delete=models.CASCADE)
+    points = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'leaderboard entries'
+        constraints = [
+            models.UniqueConstraint(fields=('leaderboard', 'student'), name='unique_leaderboard_student'),
+        ]
+        indexes = [
+            # each page of a board is read in order from this index
+            models.Index(fields=['leaderboard', '-points'], name='leaderboard_points_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.leaderboard} / {self.student}: {self.points}'
+
+
+class DueWordCount(models.Model):
+    """A Django model storing how many Words are due revision for a student, either within a single Topic or (when
+    topic is null) across all live Topics.
+
+    Counts are maintained incrementally by quiz_logger and the model signals (see utils.due_counts), and are only
+    trusted for the date stored in as_of. Older rows are recomputed on the next read or by the nightly rollover.
+    """
+
+    student = models.ForeignKey(User, on_delete=models.CASCADE)
+    topic = models.ForeignKey(Topic, on_delete=models.CASCADE, null=True, blank=True)
+    words_due = models.PositiveIntegerField(default=0)
+    as_of = models.DateField(default=datetime.date.today)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=('student', 'topic'), name='unique_student_topic_due_count'),
+            models.UniqueConstraint(fields=('student',), condition=models.Q(topic__isnull=True),
+                                    name='unique_student_all_topics_due_count'),
+        ]
+
+    def __str__(self):
+        topic = self.topic or 'All Topics'
+        return f'{self.student} / {topic}: {self.words_due} due on {self.as_of}'
+
+
+class FlushedJournal(models.Model):
+    """A Django model recording that a write-behind journal file has been committed to the database (see
+    utils.write_behind), so that its quiz results are never applied twice if the process crashes before deleting it.
+    """
+
+    name = models.CharField(max_length=64, unique=True)
+    flushed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,146 @@
+"""Signal handlers that keep the denormalised quiz data in step with changes made outside of quiz_logger, e.g. by
+teachers in the editor or admin."""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from quizzes.models import Topic, Word, WordScore, QuizResults
+from quizzes.utils import daily_results, due_counts, leaderboards, quiz_cache, vocabulary, word_stats
+from users.models import User
+
+
+@receiver(post_save, sender=WordScore)
+@receiver(post_delete, sender=WordScore)
+def word_score_changed(sender, instance, raw=False, origin=None, **kwargs):
+    """A single WordScore was saved or deleted (quiz_logger writes in bulk, so does not trigger this)."""
+    if raw:
+        return
+
+    # deletions cascading from a Word or User are dealt with by their own handlers (or by the cascade itself)
+    if origin is not None and getattr(origin, 'model', type(origin)) is not WordScore:
+        return
+
+    topic_ids = list(Word.topics.through.objects.filter(word_id=instance.word_id).values_list('topic_id', flat=True))
+    due_counts.recompute_student(instance.student_id, topic_ids)
+    quiz_cache.schedule_changed(instance.student_id)
+    # the previous totals are unknown, so recount everyone's scores for the Word
+    word_stats.rebuild([instance.word_id])
+
+
+@receiver(pre_save, sender=QuizResults)
+def quiz_results_saving(sender, instance, raw=False, **kwargs):
+    # remember whose results an edit is changing, as it may move them to another student or Topic
+    if not instance._state.adding and not raw:
+        instance._previous = QuizResults.objects.filter(pk=instance.pk).values_list('student_id', 'topic_id').first()
+
+
+@receiver(post_save, sender=QuizResults)
+def quiz_results_saved(sender, instance, created, **kwargs):
+    """A single QuizResults was created or edited (quiz_logger writes in bulk, so does not trigger this)."""
+    if created:
+        daily_results.add_quiz_results(instance)
+        leaderboards.add_quiz_results(instance)
+    else:
+        # the previous totals are unknown, so recount the whole of the student's history
+        student_id, topic_id = getattr(instance, '_previous', None) or (instance.student_id, instance.topic_id)
+        daily_results.rebuild(list({student_id, instance.student_id}))
+        leaderboards.invalidate(list({topic_id, instance.topic_id}))
+
+
+@receiver(post_delete, sender=QuizResults)
+def quiz_results_deleted(sender, instance, origin=None, **kwargs):
+    # deletions cascading from a User or Topic also delete their DailyResults
+    if origin is not None and getattr(origin, 'model', type(origin)) is not QuizResults:
+        return
+    daily_results.remove_quiz_results(instance)
+    leaderboards.invalidate([instance.topic_id])
+
+
+@receiver(m2m_changed, sender=Word.topics.through)
+def topic_words_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Words were added to or removed from a Topic, from either side of the relationship."""
+    if action == 'pre_clear':
+        # remember which topics are affected, as the relationship will be gone by the time of post_clear
+        instance._cleared_topic_ids = [instance.pk] if reverse else list(instance.topics.values_list('id', flat=True))
+        return
+
+    if action == 'post_clear':
+        topic_ids = getattr(instance, '_cleared_topic_ids', [])
+    elif action in ('post_add', 'post_remove'):
+        topic_ids = [instance.pk] if reverse else list(pk_set)
+    else:
+        return
+
+    refresh_topics(topic_ids)
+
+
+@receiver(post_save, sender=Topic)
+def topic_saved(sender, instance, created, raw=False, **kwargs):
+    """A Topic's settings may have changed whether it is live, and its name is shown alongside its results."""
+    vocabulary.invalidate([instance.pk])
+    daily_results.invalidate(topic_ids=[instance.pk])
+    if not created and not raw:
+        due_counts.recompute_topics([instance.pk])
+
+
+@receiver(post_delete, sender=Topic)
+def topic_deleted(sender, instance, **kwargs):
+    vocabulary.invalidate([instance.pk])
+    daily_results.invalidate(topic_ids=[instance.pk])
+    # the Topic's own rows are deleted along with it, leaving only the all-topics rows to recompute
+    due_counts.recompute_topics([instance.pk])
+    # likewise its boards, but its results are deleted without sending signals, so the all-topics boards are rebuilt
+    leaderboards.invalidate([instance.pk])
+
+
+@receiver(post_save, sender=Word)
+def word_saved(sender, instance, created, raw=False, **kwargs):
+    """A Word's origin or target may have changed, which must be reflected in the vocabulary of each of its Topics."""
+    if not created and not raw:
+        vocabulary.invalidate(list(instance.topics.values_list('id', flat=True)))
+
+
+@receiver(pre_delete, sender=Word)
+def word_deleting(sender, instance, **kwargs):
+    instance._deleted_topic_ids = list(instance.topics.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Word)
+def word_deleted(sender, instance, **kwargs):
+    refresh_topics(getattr(instance, '_deleted_topic_ids', []))
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields=None, raw=False, **kwargs):
+    # remember whether they were a teacher, as only students' results are ranked on the Leaderboards
+    if not instance._state.adding and not raw and update_fields != frozenset(['last_login']):
+        instance._was_teacher = User.objects.filter(pk=instance.pk).values_list('is_teacher', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, update_fields=None, raw=False, **kwargs):
+    """A student may have joined, left or been renamed, which changes the class's results."""
+    if raw or update_fields == frozenset(['last_login']):
+        return
+    daily_results.invalidate([instance.pk], students=True)
+    if getattr(instance, '_was_teacher', instance.is_teacher) != instance.is_teacher:
+        leaderboards.invalidate()
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    # the student's WordScores are deleted along with them, so remember what they contributed to each Word's totals
+    instance._word_stats = word_stats.summarise(student_id=instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    word_stats.subtract(getattr(instance, '_word_stats', []))
+
+
+def refresh_topics(topic_ids):
+    """The Words in the given Topics have changed, so recount them before anything which depends on the live Topics."""
+    Topic.update_word_counts(topic_ids)
+    due_counts.recompute_topics(topic_ids)
+    vocabulary.invalidate(topic_ids)
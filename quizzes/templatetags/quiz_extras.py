@@ -2,13 +2,15 @@ from django import template
 from django.template.defaultfilters import stringfilter
 from django.urls import reverse
 
+from quizzes.utils.due_counts import get_words_due
+
 register = template.Library()
 
 
 @register.simple_tag(name='to_revise')
 def count_of_words_to_revise(topic, user):
     """Template tag for getting the number of words that are due for revision (for given user & topic)."""
-    return topic.words_due_revision(user).count()
+    return get_words_due(user, topic)
 
 
 @register.simple_tag(name='results_reaction')
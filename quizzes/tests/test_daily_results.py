@@ -0,0 +1,63 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from quizzes.models import Topic, Word, QuizResults, DailyResults
+from quizzes.utils.quiz_logger import process_results
+from users.models import User
+
+
+class DailyResultsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = datetime.date.today()
+        cls.topic = Topic.objects.create(name='Animals')
+        cls.words = [Word.objects.create(origin=f'origin {i}', target=f'target {i}') for i in range(4)]
+        cls.topic.words.add(*cls.words)
+        cls.student = User.objects.create_user(username='test_student')
+
+    def get_totals(self):
+        return list(DailyResults.objects.order_by('date', 'student').values_list(
+            'date', 'quizzes_taken', 'correct_answers', 'incorrect_answers', 'points'))
+
+    def test_process_results_adds_to_totals(self):
+        results = {str(self.words[0].id): True, str(self.words[1].id): False}
+        process_results(results, self.student, self.topic.id, self.today)
+        process_results(results, self.student, self.topic.id, self.today)
+        self.assertEquals(self.get_totals(), [(self.today, 2, 2, 2, 20)])
+
+    def test_results_on_different_days(self):
+        yesterday = self.today - datetime.timedelta(1)
+        process_results({str(self.words[0].id): True}, self.student, self.topic.id, yesterday)
+        process_results({str(self.words[0].id): False}, self.student, self.topic.id, self.today)
+        self.assertEquals(self.get_totals(), [(yesterday, 1, 1, 0, 10), (self.today, 1, 0, 1, 0)])
+
+    def test_results_created_and_deleted_elsewhere(self):
+        first = QuizResults.objects.create(student=self.student, topic=self.topic, correct_answers=3,
+                                           incorrect_answers=1, points=30)
+        QuizResults.objects.create(student=self.student, topic=self.topic, correct_answers=1, points=10)
+        self.assertEquals(self.get_totals(), [(self.today, 2, 4, 1, 40)])
+
+        first.delete()
+        self.assertEquals(self.get_totals(), [(self.today, 1, 1, 0, 10)])
+        QuizResults.objects.all().delete()
+        self.assertEquals(self.get_totals(), [])
+
+    def test_results_edited_elsewhere(self):
+        quiz_results = QuizResults.objects.create(student=self.student, topic=self.topic, correct_answers=3, points=30)
+        quiz_results.points = 50
+        quiz_results.save()
+        self.assertEquals(self.get_totals(), [(self.today, 1, 3, 0, 50)])
+
+    def test_rebuild_command(self):
+        process_results({str(self.words[0].id): True}, self.student, self.topic.id, self.today)
+        other_student = User.objects.create_user(username='other_student')
+        process_results({str(self.words[0].id): True}, other_student, self.topic.id, self.today)
+        expected = self.get_totals()
+
+        DailyResults.objects.filter(student=self.student).update(points=1000)
+        DailyResults.objects.filter(student=other_student).delete()
+        call_command('rebuild_daily_results', '--workers', '1', stdout=StringIO())
+        self.assertEquals(self.get_totals(), expected)
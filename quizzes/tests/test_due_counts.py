@@ -0,0 +1,144 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from quizzes.models import Topic, Word, WordScore, DueWordCount
+from quizzes.utils import due_counts
+from quizzes.utils.quiz_logger import process_results
+from users.models import User
+
+
+class DueCountsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = datetime.date.today()
+        cls.student = User.objects.create_user(username='test_user', password='test_user1234')
+        cls.animals = Topic.objects.create(name='Animals')
+        cls.colours = Topic.objects.create(name='Colours')
+        cls.words = [Word.objects.create(origin=f'origin {i}', target=f'target {i}') for i in range(8)]
+        cls.animals.words.add(*cls.words[:5])
+        cls.colours.words.add(*cls.words[4:])
+
+        # the first word is not due again until next week
+        WordScore.objects.create(word=cls.words[0], student=cls.student,
+                                 next_review=cls.today + datetime.timedelta(7))
+
+    def assertMatchesLiveQuery(self):
+        for topic in (self.animals, self.colours):
+            expected = topic.words_due_revision(self.student, self.today).count()
+            self.assertEquals(expected, due_counts.get_words_due(self.student, topic))
+        expected = Topic.all_topics_words_due_revision(self.student, self.today).count()
+        self.assertEquals(expected, due_counts.get_words_due(self.student))
+
+    def test_counts_created_on_first_read(self):
+        self.assertFalse(DueWordCount.objects.filter(student=self.student).exists())
+        self.assertEquals(4, due_counts.get_words_due(self.student, self.animals))
+        self.assertEquals(4, due_counts.get_words_due(self.student, self.colours))
+        self.assertEquals(7, due_counts.get_words_due(self.student))
+
+        # one row per topic, plus the all-topics row
+        self.assertEquals(3, DueWordCount.objects.filter(student=self.student).count())
+
+    def test_read_is_single_query_once_current(self):
+        due_counts.refresh_student(self.student)
+        with self.assertNumQueries(1):
+            due_counts.get_words_due(self.student, self.animals)
+
+    def test_process_results_updates_counts(self):
+        due_counts.refresh_student(self.student)
+
+        # answering the shared word correctly removes it from both topics, and from the all-topics count
+        results = {str(self.words[1].id): True, str(self.words[4].id): True, str(self.words[2].id): False}
+        process_results(results, self.student, self.animals.id, self.today)
+
+        self.assertEquals(2, due_counts.get_words_due(self.student, self.animals))
+        self.assertEquals(3, due_counts.get_words_due(self.student, self.colours))
+        self.assertEquals(5, due_counts.get_words_due(self.student))
+        self.assertMatchesLiveQuery()
+
+    def test_process_results_applies_deltas(self):
+        due_counts.refresh_student(self.student)
+        # the counts are adjusted by the quiz's changes, rather than recounted from every live Word
+        with mock.patch('quizzes.utils.due_counts.recompute_student') as recompute_student:
+            process_results({str(self.words[1].id): True}, self.student, self.animals.id, self.today)
+        recompute_student.assert_not_called()
+        self.assertEquals(3, due_counts.get_words_due(self.student, self.animals))
+        self.assertMatchesLiveQuery()
+
+    def test_incorrect_answer_makes_word_due_again(self):
+        due_counts.refresh_student(self.student)
+        process_results({str(self.words[0].id): False}, self.student, self.animals.id, self.today)
+        self.assertEquals(5, due_counts.get_words_due(self.student, self.animals))
+        self.assertMatchesLiveQuery()
+
+    def test_topic_word_changes_update_counts(self):
+        due_counts.refresh_student(self.student)
+        new_word = Word.objects.create(origin='new origin', target='new target')
+
+        self.animals.words.add(new_word)
+        self.assertEquals(5, due_counts.get_words_due(self.student, self.animals))
+
+        # remove a word which is not due, so the count is unaffected, then one which is
+        self.words[0].topics.remove(self.animals)
+        self.assertEquals(5, due_counts.get_words_due(self.student, self.animals))
+        self.words[1].delete()
+        self.assertEquals(4, due_counts.get_words_due(self.student, self.animals))
+        self.assertMatchesLiveQuery()
+
+        self.colours.words.clear()
+        self.assertEquals(0, due_counts.get_words_due(self.student, self.colours))
+        self.assertMatchesLiveQuery()
+
+    def test_hiding_topic_updates_all_topics_count(self):
+        due_counts.refresh_student(self.student)
+        self.animals.is_hidden = True
+        self.animals.save()
+        self.assertEquals(4, due_counts.get_words_due(self.student))
+
+    def test_topic_saved_leaves_other_topics_rows(self):
+        due_counts.refresh_student(self.student)
+        yesterday = self.today - datetime.timedelta(1)
+        DueWordCount.objects.update(as_of=yesterday)
+        self.animals.save()
+        as_of = dict(DueWordCount.objects.values_list('topic_id', 'as_of'))
+        self.assertEquals({self.animals.id: self.today, self.colours.id: yesterday, None: self.today}, as_of)
+
+    def test_word_score_saved_directly_updates_counts(self):
+        due_counts.refresh_student(self.student)
+        WordScore.objects.create(word=self.words[3], student=self.student,
+                                 next_review=self.today + datetime.timedelta(3))
+        self.assertEquals(3, due_counts.get_words_due(self.student, self.animals))
+        self.assertMatchesLiveQuery()
+
+    def test_rollover_adds_words_falling_due(self):
+        due_counts.refresh_student(self.student)
+        WordScore.objects.filter(word=self.words[0]).update(next_review=self.today)
+
+        # pretend the rows were last brought up to date yesterday
+        yesterday = self.today - datetime.timedelta(1)
+        DueWordCount.objects.update(as_of=yesterday)
+
+        rolled_over = due_counts.rollover(self.today)
+        self.assertEquals(3, rolled_over)
+        self.assertEquals(5, DueWordCount.objects.get(student=self.student, topic=self.animals).words_due)
+        self.assertEquals(8, DueWordCount.objects.get(student=self.student, topic=None).words_due)
+        self.assertMatchesLiveQuery()
+
+    def test_stale_rows_recomputed_on_read(self):
+        due_counts.refresh_student(self.student)
+        DueWordCount.objects.update(as_of=self.today - datetime.timedelta(3), words_due=99)
+        self.assertMatchesLiveQuery()
+
+    def test_rebuild_command(self):
+        due_counts.refresh_student(self.student)
+        call_command('rebuild_due_counts', '--check', stdout=StringIO())
+
+        DueWordCount.objects.filter(topic=self.animals).update(words_due=99)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_due_counts', '--check', stdout=StringIO(), stderr=StringIO())
+
+        call_command('rebuild_due_counts', stdout=StringIO(), stderr=StringIO())
+        self.assertEquals(4, DueWordCount.objects.get(student=self.student, topic=self.animals).words_due)
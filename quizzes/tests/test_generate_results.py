@@ -0,0 +1,69 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase
+
+from quizzes.models import Topic, Word, WordScore, QuizResults, DailyResults
+from users.models import User
+
+
+class GenerateResultsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = datetime.date.today()
+        animals = Topic.objects.create(name='Animals')
+        colours = Topic.objects.create(name='Colours')
+        Topic.objects.create(name='Hidden', is_hidden=True)
+        words = [Word.objects.create(origin=f'origin {i}', target=f'target {i}') for i in range(16)]
+        animals.words.add(*words[:10])
+        colours.words.add(*words[8:])
+
+        students = [User.objects.create_user(username=f'student{i}') for i in range(3)]
+        User.objects.create_user(username='teacher', is_teacher=True)
+
+        # one student is part way through learning some words, and on a streak
+        WordScore.objects.create(word=words[0], student=students[0], consecutive_correct=2, times_seen=3,
+                                 times_correct=2, next_review=today - datetime.timedelta(5))
+        WordScore.objects.create(word=words[1], student=students[0], next_review=today + datetime.timedelta(20))
+        User.objects.filter(pk=students[0].pk).update(streak=4, last_quiz_date=today - datetime.timedelta(11))
+
+    def get_state(self):
+        return (list(WordScore.objects.order_by('word', 'student').values_list(
+                    'word', 'student', 'consecutive_correct', 'times_seen', 'times_correct', 'next_review')),
+                list(QuizResults.objects.order_by('student', 'topic', 'date_created', 'correct_answers').values_list(
+                    'student', 'topic', 'date_created', 'correct_answers', 'incorrect_answers', 'points')),
+                list(User.objects.order_by('id').values_list('id', 'streak', 'last_quiz_date')),
+                list(DailyResults.objects.order_by('student', 'topic', 'date').values_list(
+                    'student', 'topic', 'date', 'quizzes_taken', 'correct_answers', 'incorrect_answers', 'points')))
+
+    def generate_results(self, *args):
+        call_command('generate_results', 10, '--seed', '42', *args, stdout=StringIO())
+        return self.get_state()
+
+    def run_and_roll_back(self, *args):
+        with transaction.atomic():
+            state = self.generate_results(*args)
+            transaction.set_rollback(True)
+        return state
+
+    def test_in_memory_simulation_matches_per_quiz_path(self):
+        expected = self.run_and_roll_back('--per-quiz')
+        self.assertTrue(expected[1])
+        self.assertTrue(expected[3])
+        self.assertEquals(expected, self.generate_results())
+
+    def test_workers_do_not_change_the_outcome(self):
+        expected = self.run_and_roll_back()
+        self.assertEquals(expected, self.generate_results('--workers', '2'))
+
+    def test_different_seeds_differ(self):
+        expected = self.run_and_roll_back()
+        call_command('generate_results', 10, '--seed', '43', stdout=StringIO())
+        self.assertNotEqual(expected, self.get_state())
+
+    def test_only_visible_topics_and_students(self):
+        self.generate_results()
+        self.assertFalse(QuizResults.objects.filter(topic__is_hidden=True).exists())
+        self.assertFalse(QuizResults.objects.filter(student__is_teacher=True).exists())
@@ -0,0 +1,138 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase
+
+from charts.utils.chart_data import get_points_per_student_data, get_filtered_queryset, get_filters
+from quizzes.models import Leaderboard, QuizResults, Topic
+from quizzes.utils import leaderboards
+from users.models import User
+
+
+class LeaderboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = datetime.date.today()
+        cls.topic = Topic.objects.create(name='Animals')
+        cls.other_topic = Topic.objects.create(name='Colours')
+        cls.teacher = User.objects.create_user(username='test_teacher', is_teacher=True)
+        cls.students = [User.objects.create_user(username=f'student_{i}', first_name='Student', last_name=str(i))
+                        for i in range(4)]
+
+    def take_quiz(self, student, points, topic=None, days_ago=0):
+        return QuizResults.objects.create(student=student, topic=topic or self.topic, correct_answers=1, points=points,
+                                          date_created=self.today - datetime.timedelta(days_ago))
+
+    def get_entries(self, topic_id, window):
+        board = leaderboards.get_board(topic_id, window)
+        return list(board.entries.order_by('-points', 'student').values_list('student__last_name', 'points'))
+
+    def test_built_from_results_in_window(self):
+        self.take_quiz(self.students[0], 10)
+        self.take_quiz(self.students[1], 20, days_ago=5)
+        self.take_quiz(self.students[1], 5, topic=self.other_topic, days_ago=10)
+        self.take_quiz(self.teacher, 100)
+
+        self.assertEquals(self.get_entries(self.topic.id, 0), [('0', 10)])
+        self.assertEquals(self.get_entries(self.topic.id, 7), [('1', 20), ('0', 10)])
+        self.assertEquals(self.get_entries(None, 7), [('1', 20), ('0', 10)])
+        self.assertEquals(self.get_entries(None, Leaderboard.ALL_TIME), [('1', 25), ('0', 10)])
+        self.assertEquals(self.get_entries(self.other_topic.id, 30), [('1', 5)])
+
+    def test_quizzes_added_to_built_boards(self):
+        self.take_quiz(self.students[0], 10)
+        for window in Leaderboard.WINDOWS:
+            leaderboards.get_board(None, window)
+        leaderboards.get_board(self.topic.id, 7)
+
+        self.take_quiz(self.students[0], 5)
+        self.take_quiz(self.students[1], 20, days_ago=3)
+        with mock.patch('quizzes.utils.leaderboards.rebuild') as rebuild:
+            self.assertEquals(self.get_entries(None, 0), [('0', 15)])
+            self.assertEquals(self.get_entries(None, 7), [('1', 20), ('0', 15)])
+            self.assertEquals(self.get_entries(self.topic.id, 7), [('1', 20), ('0', 15)])
+            self.assertEquals(self.get_entries(None, Leaderboard.ALL_TIME), [('1', 20), ('0', 15)])
+        rebuild.assert_not_called()
+
+        # boards not yet read are built with the quizzes already included
+        self.assertEquals(self.get_entries(self.topic.id, 0), [('0', 15)])
+
+    def test_rebuilt_after_results_change(self):
+        quiz_results = self.take_quiz(self.students[0], 10)
+        self.assertEquals(self.get_entries(self.topic.id, 7), [('0', 10)])
+
+        quiz_results.points = 3
+        quiz_results.save()
+        self.assertEquals(self.get_entries(self.topic.id, 7), [('0', 3)])
+
+        quiz_results.delete()
+        self.assertEquals(self.get_entries(self.topic.id, 7), [])
+
+        self.take_quiz(self.students[0], 10)
+        self.students[0].delete()
+        self.assertEquals(self.get_entries(self.topic.id, 7), [])
+
+    def test_rebuilt_after_topic_or_user_changes(self):
+        quiz_results = self.take_quiz(self.students[0], 10)
+        self.take_quiz(self.students[1], 20, topic=self.other_topic)
+        self.assertEquals(self.get_entries(self.topic.id, 7), [('0', 10)])
+        self.assertEquals(self.get_entries(None, 7), [('1', 20), ('0', 10)])
+
+        quiz_results.topic = self.other_topic
+        quiz_results.save()
+        self.assertEquals(self.get_entries(self.topic.id, 7), [])
+        self.assertEquals(self.get_entries(self.other_topic.id, 7), [('1', 20), ('0', 10)])
+
+        self.students[1].is_teacher = True
+        self.students[1].save()
+        self.assertEquals(self.get_entries(None, 7), [('0', 10)])
+
+        self.other_topic.delete()
+        self.assertEquals(self.get_entries(None, 7), [])
+
+    def test_rebuilt_each_day(self):
+        self.take_quiz(self.students[0], 10, days_ago=7)
+        self.assertEquals(self.get_entries(None, 7), [('0', 10)])
+
+        tomorrow = self.today + datetime.timedelta(1)
+        board = leaderboards.get_board(None, 7, today=tomorrow)
+        self.assertEquals(board.as_of, tomorrow)
+        self.assertEquals(board.entries.count(), 0)
+
+    def get_points_per_student(self, page=None, from_board=True, **params):
+        request = mock.Mock(user=self.teacher, GET=params)
+        filters = get_filters(request) if from_board else None
+        return get_points_per_student_data(get_filtered_queryset(request), filters, page)
+
+    def test_points_per_student_matches_results(self):
+        self.take_quiz(self.students[2], 10)
+        self.take_quiz(self.students[1], 10, days_ago=3)
+        self.take_quiz(self.students[3], 30, topic=self.other_topic, days_ago=20)
+
+        for params in ({}, {'date_range': '7'}, {'date_range': '0', 'topic': str(self.topic.id)}):
+            expected = self.get_points_per_student(from_board=False, **params)
+            with mock.patch('charts.utils.chart_data.leaderboards.get_board',
+                            side_effect=leaderboards.get_board) as get_board:
+                self.assertEquals(self.get_points_per_student(page=1, **params), expected)
+            get_board.assert_called_once()
+
+        self.assertEquals(self.get_points_per_student(page=1, date_range='7'),
+                          [('Student 1', 10), ('Student 2', 10), ('Student 0', 0), ('Student 3', 0)])
+
+    def test_custom_dates_not_read_from_board(self):
+        self.take_quiz(self.students[0], 10, days_ago=3)
+        date_from = (self.today - datetime.timedelta(5)).isoformat()
+        with mock.patch('charts.utils.chart_data.leaderboards.get_board') as get_board:
+            data = self.get_points_per_student(page=1, date_from=date_from)
+        get_board.assert_not_called()
+        self.assertEquals(data[0], ('Student 0', 10))
+
+    def test_points_per_student_pages(self):
+        self.take_quiz(self.students[3], 10)
+        self.take_quiz(self.students[2], 20)
+        expected = self.get_points_per_student(from_board=False)
+
+        with mock.patch('charts.utils.chart_data.POINTS_PER_STUDENT_PAGE_SIZE', 3):
+            pages = [self.get_points_per_student(page=page) for page in (1, 2, 3)]
+        self.assertEquals(pages[0] + pages[1], expected)
+        self.assertEquals([len(page) for page in pages], [3, 1, 0])
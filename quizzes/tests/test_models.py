@@ -23,6 +23,53 @@ class TopicModelTests(TestCase):
         self.assertEqual(2, self.animals.words.count())
         self.assertEqual(0, self.colours.words.count())
 
+    def test_maintained_word_count(self):
+        self.animals.refresh_from_db()
+        self.assertEqual(2, self.animals.word_count)
+
+        words = [Word.objects.create(origin=f'origin {i}', target=f'target {i}') for i in range(3)]
+        self.animals.words.add(*words)
+        words[0].topics.remove(self.animals)
+        words[0].topics.add(self.colours)
+        words[1].delete()
+
+        for topic in (self.animals, self.colours):
+            topic.refresh_from_db()
+            self.assertEqual(topic.words.count(), topic.word_count)
+
+    def test_live_topics(self):
+        today = datetime.date.today()
+        self.assertFalse(Topic.live_topics().exists())
+
+        # the Topic goes live once it has 4 Words
+        words = [Word.objects.create(origin=f'origin {i}', target=f'target {i}') for i in range(2)]
+        self.animals.words.add(*words)
+        self.assertEqual([self.animals], list(Topic.live_topics()))
+
+        # ...but not while hidden, nor before it becomes available
+        self.animals.is_hidden = True
+        self.animals.save()
+        self.assertFalse(Topic.live_topics().exists())
+
+        self.animals.is_hidden = False
+        self.animals.available_from = today + datetime.timedelta(2)
+        self.animals.save()
+        self.assertFalse(Topic.live_topics().exists())
+        self.assertEqual([self.animals], list(Topic.live_topics(today + datetime.timedelta(2))))
+
+        # clearing the Topic's Words takes it out of action again
+        self.animals.words.clear()
+        self.assertFalse(Topic.live_topics(today + datetime.timedelta(2)).exists())
+
+    def test_save_stale_instance_keeps_word_count(self):
+        stale_colours = Topic.objects.get(pk=self.colours.pk)
+        words = [Word.objects.create(origin=f'origin {i}', target=f'target {i}') for i in range(4)]
+        self.colours.words.add(*words)
+
+        stale_colours.long_desc = 'Edited'
+        stale_colours.save()
+        self.assertEqual([self.colours], list(Topic.live_topics()))
+
 
 class WordModelTests(TestCase):
     @classmethod
@@ -113,16 +160,12 @@ class QuizResultsModelTests(TestCase):
         self.assertEqual(0, broken_streak)
 
     def test_continue_existing_streak(self):
-        # user is adding to their 100-day streak
+        # user is adding to their 100-day streak, having last quizzed yesterday
+        yesterday = datetime.date.today() - datetime.timedelta(1)
         self.new_student.streak = 100
+        self.new_student.last_quiz_date = yesterday
         self.new_student.save()
 
-        # add quiz results data for yesterday, so quizzing again today builds on it
-        yesterday = datetime.date.today() - datetime.timedelta(1)
-        qr = QuizResults.objects.create(student=self.new_student, topic=self.animals)
-        qr.date_created = yesterday
-        qr.save()
-
         QuizResults.update_user_streak(self.new_student)
         self.new_student.refresh_from_db()
         streak = QuizResults.get_user_streak(self.new_student)
@@ -131,14 +174,28 @@ class QuizResultsModelTests(TestCase):
     def test_update_streak_when_already_quizzed_today(self):
         # streak should not increase in length if the user has already quizzed today
         self.new_student.streak = 100
+        self.new_student.last_quiz_date = datetime.date.today()
         self.new_student.save()
 
-        # add quiz results data for today
-        qr = QuizResults.objects.create(student=self.new_student, topic=self.animals)
-        qr.date_created = datetime.date.today()
-        qr.save()
-
         QuizResults.update_user_streak(self.new_student)
         self.new_student.refresh_from_db()
         streak = QuizResults.get_user_streak(self.new_student)
         self.assertEqual(100, streak)
+
+    def test_start_new_streak_after_gap(self):
+        self.new_student.streak = 100
+        self.new_student.last_quiz_date = datetime.date.today() - datetime.timedelta(2)
+        self.new_student.save()
+
+        QuizResults.update_user_streak(self.new_student)
+        self.assertEqual(1, self.new_student.streak)
+        self.new_student.refresh_from_db()
+        self.assertEqual(1, self.new_student.streak)
+        self.assertEqual(datetime.date.today(), self.new_student.last_quiz_date)
+
+    def test_streak_decided_without_querying_results(self):
+        self.new_student.streak = 5
+        self.new_student.last_quiz_date = datetime.date.today()
+        with self.assertNumQueries(0):
+            QuizResults.update_user_streak(self.new_student)
+            self.assertEqual(5, QuizResults.get_user_streak(self.new_student))
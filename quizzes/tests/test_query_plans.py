@@ -0,0 +1,26 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from quizzes.management.commands.audit_query_plans import _get_full_scans
+from quizzes.models import Topic
+from users.models import User
+
+
+class QueryPlanAuditTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        out = StringIO()
+        call_command('audit_query_plans', stdout=out, stderr=StringIO())
+        self.assertIn('hot queries use an index', out.getvalue())
+
+    def test_audit_data_is_rolled_back(self):
+        call_command('audit_query_plans', stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(Topic.objects.exists())
+
+    def test_index_scans_are_full_scans(self):
+        # reading a whole index is no better than reading the whole table
+        self.assertEquals({('quizzes_wordscore', 'quizzes_wordscore_word_id_125242d0')},
+                          _get_full_scans('SELECT COUNT(*) FROM "quizzes_wordscore" U0'))
+        self.assertEquals(set(), _get_full_scans('SELECT "word_id" FROM "quizzes_wordscore" WHERE "student_id" = 1'))
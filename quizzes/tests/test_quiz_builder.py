@@ -6,6 +6,7 @@ from django.test import TestCase
 from myproject.settings import CORRECT_ANSWER_PTS, ORIGIN_ICON, TARGET_ICON
 from quizzes.models import Topic, Word
 from quizzes.utils.quiz_builder import _choose_direction, get_quiz, _get_options, _get_dummy_data
+from quizzes.utils.vocabulary import get_vocabulary
 from users.models import User
 
 
@@ -15,6 +16,7 @@ class QuizBuilderTests(TestCase):
         cls.student = User.objects.create_user(username='test_user', password='test_user1234')
         cls.teacher = User.objects.create_user(username='test_teacher', password='test_user1234', is_teacher=True)
         animals = Topic.objects.create(name='Animals', long_desc='Practice your German words for Animals.')
+        cls.animals = animals
         Word.objects.create(origin='Mouse', target='die Maus').topics.add(animals)
         Word.objects.create(origin='Fish', target='der Fisch').topics.add(animals)
         Word.objects.create(origin='Cat', target='die Katze').topics.add(animals)
@@ -112,9 +114,11 @@ class QuizBuilderTests(TestCase):
                 self.assertEquals(word.origin, options[correct_index])
 
     def test_get_options(self):
-        options_pool = list(self.all_topic_words.values('id', 'origin', 'target'))
-        options = _get_options(options_pool, 1, True)
+        vocabulary = get_vocabulary(self.animals.pk)
+        options = _get_options(vocabulary, 0, True)
         self.assertIsInstance(options, list)
+        self.assertEquals(3, len(set(options)))
+        self.assertNotIn(vocabulary.targets[0], options)
 
     def test_get_dummy_data(self):
         # validate the basic format of the dummy data
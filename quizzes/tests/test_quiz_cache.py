@@ -0,0 +1,76 @@
+import datetime
+import json
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from quizzes.models import Topic, Word, WordScore
+from quizzes.utils import quiz_cache
+from users.models import User
+
+
+class QuizCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user(username='test_user', password='test_user1234')
+        cls.topic = Topic.objects.create(name='Animals')
+        cls.words = [Word.objects.create(origin=f'origin {i}', target=f'target {i}') for i in range(6)]
+        cls.topic.words.add(*cls.words)
+        cls.path = reverse('quiz', args=[cls.topic.pk])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pregenerated_quiz_is_served_once(self):
+        self.assertTrue(quiz_cache.pregenerate(self.student, self.topic.pk))
+        cached = cache.get(quiz_cache.QUIZ_KEY.format(self.student.id, self.topic.pk))['quiz']
+
+        with self.assertNumQueries(0):
+            quiz = quiz_cache.take_quiz(self.student, self.topic.pk)
+        self.assertEquals(cached, quiz)
+
+        # the quiz has been consumed, so the next one is built on demand
+        self.assertIsNone(cache.get(quiz_cache.QUIZ_KEY.format(self.student.id, self.topic.pk)))
+
+    def test_quiz_view_serves_pregenerated_quiz(self):
+        quiz_cache.pregenerate(self.student, self.topic.pk)
+        cached = cache.get(quiz_cache.QUIZ_KEY.format(self.student.id, self.topic.pk))['quiz']
+
+        self.client.force_login(self.student)
+        response = self.client.get(self.path)
+        self.assertEquals(cached, response.context['quiz'])
+
+    def test_schedule_change_invalidates_quiz(self):
+        quiz_cache.pregenerate(self.student, self.topic.pk)
+
+        # all words but one are now scheduled for next week, so a fresh quiz only has one question
+        next_week = datetime.date.today() + datetime.timedelta(7)
+        for word in self.words[1:]:
+            WordScore.objects.create(word=word, student=self.student, next_review=next_week)
+
+        quiz = quiz_cache.take_quiz(self.student, self.topic.pk)
+        self.assertEquals(1, len(quiz['questions']))
+
+    def test_quiz_results_invalidate_quiz(self):
+        quiz_cache.pregenerate(self.student, self.topic.pk)
+        self.client.force_login(self.student)
+        results = json.dumps({str(word.id): True for word in self.words[1:]})
+        self.client.post(self.path, {'results': results})
+
+        quiz = quiz_cache.take_quiz(self.student, self.topic.pk)
+        self.assertEquals(1, len(quiz['questions']))
+
+    def test_topic_change_invalidates_quiz(self):
+        quiz_cache.pregenerate(self.student, self.topic.pk)
+        self.words[0].topics.remove(self.topic)
+        quiz = quiz_cache.take_quiz(self.student, self.topic.pk)
+        self.assertEquals(5, len(quiz['questions']))
+
+    def test_warm_up_command(self):
+        out = StringIO()
+        call_command('pregenerate_quizzes', stdout=out)
+        self.assertIn('Pre-generated 1 quizzes for 1 students', out.getvalue())
+        self.assertIsNotNone(cache.get(quiz_cache.QUIZ_KEY.format(self.student.id, self.topic.pk)))
@@ -0,0 +1,127 @@
+import datetime
+import threading
+import time
+from unittest import mock
+
+from django.db import connection, transaction, OperationalError
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+
+from quizzes.models import Topic, Word, WordScore, QuizResults, QUIZ_INTERVALS, MAX_SCORE
+from quizzes.utils.quiz_logger import process_results, upsert_word_scores
+from users.models import User
+
+THREADS = 8
+SUBMISSIONS_PER_THREAD = 5
+
+
+class UpsertWordScoresTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = datetime.date.today()
+        cls.student = User.objects.create_user(username='test_user', password='test_user1234')
+        cls.words = [Word.objects.create(origin=f'origin {i}', target=f'target {i}') for i in range(3)]
+
+    def test_single_statement(self):
+        WordScore.objects.create(word=self.words[0], student=self.student)
+        with self.assertNumQueries(1):
+            upsert_word_scores(self.student, {word.id: True for word in self.words}, self.today)
+        self.assertEquals(3, WordScore.objects.filter(student=self.student).count())
+
+    def test_due_word_moves_along_intervals(self):
+        for score in range(MAX_SCORE + 2):
+            WordScore.objects.update_or_create(word=self.words[0], student=self.student,
+                                               defaults={'consecutive_correct': score, 'next_review': self.today})
+            upsert_word_scores(self.student, {self.words[0].id: True}, self.today)
+
+            word_score = WordScore.objects.get(word=self.words[0], student=self.student)
+            expected_interval = QUIZ_INTERVALS[min(score, MAX_SCORE)]
+            self.assertEquals(self.today + datetime.timedelta(expected_interval), word_score.next_review)
+            self.assertEquals(score + 1, word_score.consecutive_correct)
+
+    def test_correct_answer_before_due_changes_nothing(self):
+        word_score = WordScore.objects.create(word=self.words[0], student=self.student,
+                                              next_review=self.today + datetime.timedelta(3))
+        upsert_word_scores(self.student, {self.words[0].id: True}, self.today)
+        word_score.refresh_from_db()
+        self.assertEquals(1, word_score.times_seen)
+        self.assertEquals(0, word_score.times_correct)
+
+    def test_fallback_without_upserts(self):
+        WordScore.objects.create(word=self.words[0], student=self.student, consecutive_correct=2,
+                                 next_review=self.today)
+        WordScore.objects.create(word=self.words[1], student=self.student, next_review=self.today)
+        answers = {self.words[0].id: True, self.words[1].id: False, self.words[2].id: True}
+        fields = ('word', 'consecutive_correct', 'times_seen', 'times_correct', 'next_review')
+
+        with transaction.atomic():
+            expected = upsert_word_scores(self.student, answers, self.today)
+            expected_rows = list(WordScore.objects.order_by('word').values_list(*fields))
+            transaction.set_rollback(True)
+
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            self.assertEquals(expected, upsert_word_scores(self.student, answers, self.today))
+        self.assertEquals(expected_rows, list(WordScore.objects.order_by('word').values_list(*fields)))
+
+
+@skipUnlessDBFeature('supports_update_conflicts_with_target')
+class ConcurrentResultsTests(TransactionTestCase):
+    """Submit overlapping quiz results for the same student from several threads at once."""
+
+    def setUp(self):
+        self.today = datetime.date.today()
+        self.student = User.objects.create_user(username='test_user', password='test_user1234')
+        self.topic = Topic.objects.create(name='Animals')
+        self.words = [Word.objects.create(origin=f'origin {i}', target=f'target {i}') for i in range(4)]
+        self.topic.words.add(*self.words)
+
+    def submit_concurrently(self, results):
+        errors = []
+        start = threading.Barrier(THREADS)
+
+        def submit():
+            try:
+                start.wait()
+                for _ in range(SUBMISSIONS_PER_THREAD):
+                    # SQLite allows one writer at a time, so a submission may have to wait its turn and try again
+                    for _ in range(200):
+                        try:
+                            process_results(results, self.student, self.topic.id, self.today)
+                            break
+                        except OperationalError:
+                            time.sleep(0.005)
+                    else:
+                        errors.append('gave up waiting for the database')
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEquals([], errors)
+
+    def test_overlapping_incorrect_answers(self):
+        # every incorrect answer counts, so no submission may be lost
+        self.submit_concurrently({str(word.id): False for word in self.words})
+
+        submissions = THREADS * SUBMISSIONS_PER_THREAD
+        self.assertEquals(submissions, QuizResults.objects.filter(student=self.student).count())
+        for word_score in WordScore.objects.filter(student=self.student):
+            self.assertEquals(submissions, word_score.times_seen)
+            self.assertEquals(0, word_score.times_correct)
+            self.assertEquals(0, word_score.consecutive_correct)
+            self.assertEquals(self.today, word_score.next_review)
+
+    def test_overlapping_correct_answers(self):
+        # only the first correct answer counts, as each word is then no longer due
+        self.submit_concurrently({str(word.id): True for word in self.words})
+
+        self.assertEquals(len(self.words), WordScore.objects.filter(student=self.student).count())
+        for word_score in WordScore.objects.filter(student=self.student):
+            self.assertEquals(1, word_score.times_seen)
+            self.assertEquals(1, word_score.times_correct)
+            self.assertEquals(1, word_score.consecutive_correct)
+            self.assertEquals(self.today + datetime.timedelta(QUIZ_INTERVALS[0]), word_score.next_review)
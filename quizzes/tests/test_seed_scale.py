@@ -0,0 +1,40 @@
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from django.db import transaction
+from django.test import TestCase
+
+from quizzes.models import Topic, Word, WordScore, QuizResults
+from users.models import User
+
+
+class SeedScaleTests(TestCase):
+    def seed_scale(self, *args):
+        call_command('seed_scale', '--topics', '6', '--words', '60', '--students', '8', '--days', '5', *args,
+                     stdout=StringIO())
+        return (list(Topic.objects.order_by('name').values_list('name', 'word_count', 'live_from')),
+                list(Word.objects.order_by('origin').values_list('origin', 'target')),
+                list(User.objects.order_by('username').values_list('username', 'first_name', 'streak')),
+                list(WordScore.objects.order_by('student__username', 'word__origin').values_list(
+                    'student__username', 'word__origin', 'consecutive_correct', 'times_seen', 'next_review')),
+                QuizResults.objects.count())
+
+    def test_creates_requested_data(self):
+        topics, words, students, word_scores, quiz_count = self.seed_scale()
+        self.assertEquals(len(topics), 6)
+        self.assertEquals(len(words), 60)
+        self.assertEquals(len(students), 8)
+        self.assertTrue(word_scores)
+        self.assertTrue(quiz_count)
+        self.assertEquals(sum(word_count for _, word_count, _ in topics), Word.topics.through.objects.count())
+
+    def test_same_seed_same_data(self):
+        with transaction.atomic():
+            expected = self.seed_scale('--seed', '3')
+            transaction.set_rollback(True)
+        self.assertEquals(expected, self.seed_scale('--seed', '3'))
+
+    def test_refuses_to_run_twice(self):
+        self.seed_scale()
+        with self.assertRaises(CommandError):
+            self.seed_scale()
@@ -1,10 +1,12 @@
 import datetime
 import json
+from unittest import mock
 
 from django.test import TestCase
 from django.urls import reverse, resolve
 
 from quizzes.models import Topic, Word, WordScore, MAX_SCORE, QUIZ_INTERVALS
+from quizzes.utils import results_handoff
 from quizzes.views import HomeView, TopicDetailView
 from users.models import User
 
@@ -264,3 +266,41 @@ class QuizTests(TestCase):
         session.save()
         response = self.client.get(self.path, follow=True)
         self.assertTemplateUsed(response, 'quizzes/quiz_results.html')
+
+    def test_results_are_handed_to_results_page_in_a_cookie(self):
+        self.client.force_login(self.student)
+        session_key = self.client.session.session_key
+        results = json.dumps({str(self.mouse.id): True, str(self.cat.id): False})
+
+        response = self.client.post(self.path, {'results': results})
+        self.assertIn(results_handoff.COOKIE_NAME, response.cookies)
+        self.assertNotIn('results', self.client.session)
+
+        response = self.client.get(self.path)
+        self.assertTemplateUsed(response, 'quizzes/quiz_results.html')
+        self.assertEquals(response.context['correct'], 1)
+        self.assertEquals(response.context['total'], 2)
+        self.assertEquals(self.client.session.session_key, session_key)
+
+        # the cookie is removed, so refreshing the page starts a new quiz
+        response = self.client.get(self.path)
+        self.assertTemplateUsed(response, 'quizzes/quiz.html')
+
+    def test_results_cookie_of_another_student_is_ignored(self):
+        other_student = User.objects.create_user(username='other_user', password='test_user1234')
+        self.client.force_login(other_student)
+        self.client.post(self.path, {'results': json.dumps({str(self.mouse.id): True})})
+
+        self.client.force_login(self.student)
+        response = self.client.get(self.path)
+        self.assertTemplateUsed(response, 'quizzes/quiz.html')
+
+    def test_results_too_large_for_a_cookie_use_the_session(self):
+        self.client.force_login(self.student)
+        with mock.patch.object(results_handoff, 'MAX_COOKIE_SIZE', 10):
+            response = self.client.post(self.path, {'results': json.dumps({str(self.mouse.id): True})})
+        self.assertNotIn(results_handoff.COOKIE_NAME, response.cookies)
+
+        response = self.client.get(self.path)
+        self.assertTemplateUsed(response, 'quizzes/quiz_results.html')
+        self.assertNotIn('results', self.client.session)
@@ -0,0 +1,71 @@
+from django.test import TestCase
+
+from quizzes.models import Topic, Word
+from quizzes.utils import vocabulary
+from quizzes.utils.quiz_builder import get_quiz
+from users.models import User
+
+
+class VocabularyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user(username='test_user', password='test_user1234')
+        cls.topic = Topic.objects.create(name='Animals')
+        cls.words = [Word.objects.create(origin=f'origin {i}', target=f'target {i}') for i in range(20)]
+        cls.topic.words.add(*cls.words)
+
+    def setUp(self):
+        vocabulary.clear()
+
+    def test_vocabulary_contents(self):
+        topic_vocabulary = vocabulary.get_vocabulary(self.topic.pk)
+        self.assertEquals(20, len(topic_vocabulary))
+        self.assertEquals([word.id for word in self.words], list(topic_vocabulary.ids))
+        self.assertEquals({'id': self.words[3].id, 'origin': 'origin 3', 'target': 'target 3'},
+                          topic_vocabulary.get_word(3))
+
+    def test_missing_topic(self):
+        self.assertIsNone(vocabulary.get_vocabulary(999))
+
+    def test_vocabulary_is_reused(self):
+        vocabulary.get_vocabulary(self.topic.pk)
+        with self.assertNumQueries(0):
+            vocabulary.get_vocabulary(self.topic.pk)
+
+    def test_get_quiz_single_query_once_warm(self):
+        get_quiz(self.student, self.topic.pk)
+        with self.assertNumQueries(1):
+            quiz = get_quiz(self.student, self.topic.pk)
+        self.assertEquals(12, len(quiz['questions']))
+
+    def test_sample_excludes_word(self):
+        topic_vocabulary = vocabulary.get_vocabulary(self.topic.pk)
+        for _ in range(50):
+            sample = topic_vocabulary.sample(3, exclude=0)
+            self.assertEquals(3, len(set(sample)))
+            self.assertNotIn(0, sample)
+
+    def test_sample_covers_whole_topic(self):
+        # options are no longer restricted to the first few words of the topic
+        topic_vocabulary = vocabulary.get_vocabulary(self.topic.pk)
+        sampled = set()
+        for _ in range(200):
+            sampled.update(topic_vocabulary.sample(3))
+        self.assertEquals(set(range(20)), sampled)
+
+    def test_invalidated_when_words_added(self):
+        vocabulary.get_vocabulary(self.topic.pk)
+        Word.objects.create(origin='new origin', target='new target').topics.add(self.topic)
+        self.assertEquals(21, len(vocabulary.get_vocabulary(self.topic.pk)))
+
+    def test_invalidated_when_word_edited(self):
+        vocabulary.get_vocabulary(self.topic.pk)
+        self.words[0].origin = 'edited origin'
+        self.words[0].save()
+        self.assertEquals('edited origin', vocabulary.get_vocabulary(self.topic.pk).origins[0])
+
+    def test_invalidated_when_topic_hidden(self):
+        vocabulary.get_vocabulary(self.topic.pk)
+        self.topic.is_hidden = True
+        self.topic.save()
+        self.assertTrue(vocabulary.get_vocabulary(self.topic.pk).is_hidden)
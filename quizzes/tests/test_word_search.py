@@ -0,0 +1,99 @@
+import io
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from quizzes.models import Topic, Word
+from quizzes.utils import word_search
+from users.models import User
+
+
+@skipUnless(word_search.is_supported(), "The search index requires SQLite 3.34 or later.")
+class WordSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='test_teacher', password='test_user1234', is_teacher=True)
+        cls.topic = Topic.objects.create(name='Animals')
+        cls.cat = Word.objects.create(origin='chat', target='cat')
+        cls.dog = Word.objects.create(origin='chien', target='dog')
+        cls.bird = Word.objects.create(origin='oiseau', target='bird')
+        cls.topic.words.add(cls.cat, cls.dog)
+
+    def search(self, *terms, fields=word_search.WORD_FIELDS):
+        return set(word_search.filter_words(Word.objects.all(), terms, fields))
+
+    def get_indexed(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT rowid, origin, target, topics FROM {word_search.TABLE} ORDER BY rowid")
+            return cursor.fetchall()
+
+    def test_filter_words(self):
+        self.assertEquals(self.search('HIE'), {self.dog})
+        self.assertEquals(self.search('ch'), {self.cat, self.dog})  # too short for a trigram, so uses icontains
+        self.assertEquals(self.search('chi', 'dog'), {self.dog})
+        self.assertEquals(self.search('"x'), set())
+        self.assertEquals(self.search('animals'), set())
+        self.assertEquals(self.search('animals', fields=word_search.INDEXED_FIELDS), {self.cat, self.dog})
+
+    def test_filter_words_matches_fallback(self):
+        for term in ('cat', 'ird', 'oiseau', 'xyz'):
+            with mock.patch('quizzes.utils.word_search.is_supported', return_value=False):
+                expected = self.search(term)
+            self.assertEquals(self.search(term), expected)
+
+    def test_search_ranks_prefixes_first(self):
+        grape = Word.objects.create(origin='raisin', target='grape')
+        ape = Word.objects.create(origin='singe', target='ape')
+        glimpse = Word.objects.create(origin='aperçu', target='glimpse')
+        self.assertEquals(word_search.search('APE'), [glimpse.id, ape.id, grape.id])
+        self.assertEquals(word_search.search('ape', limit=2), [glimpse.id, ape.id])
+        self.assertEquals(word_search.search('ch', limit=1), [self.cat.id])
+        self.assertEquals(word_search.search(' '), [])
+
+    def test_kept_in_sync(self):
+        self.assertEquals(self.get_indexed(), [(self.cat.id, 'chat', 'cat', 'Animals'),
+                                               (self.dog.id, 'chien', 'dog', 'Animals'),
+                                               (self.bird.id, 'oiseau', 'bird', None)])
+
+        self.bird.target = 'birdie'
+        self.bird.save()
+        self.bird.topics.add(self.topic)
+        self.assertEquals(self.get_indexed()[-1], (self.bird.id, 'oiseau', 'birdie', 'Animals'))
+
+        self.topic.name = 'Pets'
+        self.topic.save()
+        self.assertEquals({topics for _, _, _, topics in self.get_indexed()}, {'Pets'})
+
+        self.topic.words.remove(self.cat)
+        self.dog.topics.clear()
+        self.bird.delete()
+        self.assertEquals(self.get_indexed(), [(self.cat.id, 'chat', 'cat', None), (self.dog.id, 'chien', 'dog', None)])
+
+        self.cat.topics.add(self.topic)
+        self.topic.delete()
+        self.assertEquals(self.get_indexed()[0], (self.cat.id, 'chat', 'cat', None))
+
+    def test_rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {word_search.TABLE}")
+        call_command('rebuild_word_search', stdout=io.StringIO())
+        self.assertEquals(len(self.get_indexed()), 3)
+        self.assertEquals(self.search('anima', fields=word_search.INDEXED_FIELDS), {self.cat, self.dog})
+
+    def test_search_view(self):
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse('search_words'), {'q': 'dog'})
+        self.assertEquals(response.json(), {'words': [{'id': self.dog.id, 'origin': 'chien', 'target': 'dog'}]})
+
+    def test_admin_search(self):
+        admin = User.objects.create_superuser(username='test_admin', password='test_user1234')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:quizzes_word_changelist'), {'q': 'anim ird'})
+        self.assertEquals(list(response.context['cl'].result_list), [])
+        response = self.client.get(reverse('admin:quizzes_word_changelist'), {'q': 'anim hat'})
+        self.assertEquals(list(response.context['cl'].result_list), [self.cat])
+        response = self.client.get(reverse('admin:quizzes_topic_changelist'), {'q': 'chien'})
+        self.assertEquals(list(response.context['cl'].result_list), [self.topic])
@@ -0,0 +1,84 @@
+import datetime
+
+from django.test import TestCase
+
+from charts.utils.chart_data import get_weakest_words_data, MAX_WEAKEST_WORDS
+from quizzes.models import Topic, Word, WordScore, WordStats
+from quizzes.utils import word_stats
+from quizzes.utils.quiz_logger import process_results
+from users.models import User
+
+
+class WordStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = datetime.date.today()
+        cls.topic = Topic.objects.create(name='Animals')
+        cls.words = [Word.objects.create(origin=f'origin {i}', target=f'target {i}') for i in range(4)]
+        cls.topic.words.add(*cls.words)
+        cls.student = User.objects.create_user(username='test_student')
+        cls.other_student = User.objects.create_user(username='other_student')
+
+    def get_stats(self):
+        return list(WordStats.objects.order_by('word').values_list('word', 'times_seen', 'times_correct', 'students'))
+
+    def assertStatsMatchScores(self):
+        self.assertEquals(self.get_stats(), sorted(word_stats.summarise()))
+
+    def take_quiz(self, student, answers, days_later=0):
+        results = {str(self.words[i].id): is_correct for i, is_correct in answers.items()}
+        process_results(results, student, self.topic.id, self.today + datetime.timedelta(days_later))
+
+    def test_process_results_adds_to_totals(self):
+        self.take_quiz(self.student, {0: True, 1: False})
+        self.take_quiz(self.other_student, {0: False})
+        self.assertEquals(self.get_stats(), [(self.words[0].id, 2, 1, 2), (self.words[1].id, 1, 0, 1)])
+
+        # correct answers to Words not yet due don't count, but incorrect answers always do
+        self.take_quiz(self.student, {0: True, 1: False})
+        self.take_quiz(self.student, {0: True, 2: True}, days_later=1)
+        self.assertEquals(self.get_stats(), [(self.words[0].id, 3, 2, 2), (self.words[1].id, 2, 0, 1),
+                                             (self.words[2].id, 1, 1, 1)])
+        self.assertStatsMatchScores()
+
+    def test_word_score_edited_elsewhere(self):
+        self.take_quiz(self.student, {0: True})
+        self.take_quiz(self.other_student, {0: True})
+        WordScore.objects.filter(student=self.student).update(times_seen=5)  # e.g. imported, which is not tracked
+
+        word_score = WordScore.objects.get(student=self.other_student)
+        word_score.times_correct = 0
+        word_score.save()
+        self.assertEquals(self.get_stats(), [(self.words[0].id, 6, 1, 2)])
+
+        WordScore.objects.filter(student=self.student).get().delete()
+        self.assertEquals(self.get_stats(), [(self.words[0].id, 1, 0, 1)])
+
+    def test_student_deleted(self):
+        self.take_quiz(self.student, {0: True, 1: False})
+        self.take_quiz(self.other_student, {0: False})
+
+        self.student.delete()
+        self.assertEquals(self.get_stats(), [(self.words[0].id, 1, 0, 1)])
+
+    def test_rebuild(self):
+        self.take_quiz(self.student, {0: True, 1: False})
+        self.take_quiz(self.other_student, {0: False, 3: True})
+        expected = self.get_stats()
+
+        WordStats.objects.all().update(times_seen=100)
+        word_stats.rebuild([self.words[0].id])
+        self.assertEquals(self.get_stats()[0], expected[0])
+        word_stats.rebuild()
+        self.assertEquals(self.get_stats(), expected)
+
+    def test_weakest_words(self):
+        self.take_quiz(self.student, {0: True, 1: False, 2: True, 3: False})
+        self.take_quiz(self.other_student, {0: True, 1: True, 2: False})
+
+        self.assertEquals(get_weakest_words_data()[:4], [('origin 3', 'target 3', 0), ('origin 1', 'target 1', 50),
+                                                         ('origin 2', 'target 2', 50), ('origin 0', 'target 0', 100)])
+        self.assertEquals(get_weakest_words_data()[4:], [('N/A', 'N/A', 'N/A')] * (MAX_WEAKEST_WORDS - 4))
+        self.assertEquals(get_weakest_words_data(self.other_student)[:3],
+                          [('origin 2', 'target 2', 0), ('origin 0', 'target 0', 100),
+                           ('origin 1', 'target 1', 100)])
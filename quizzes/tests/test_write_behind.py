@@ -0,0 +1,131 @@
+import datetime
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.test import TestCase
+
+from quizzes.models import Topic, Word, WordScore, QuizResults, FlushedJournal
+from quizzes.utils import vocabulary, write_behind
+from quizzes.utils.quiz_logger import record_results
+from users.models import User
+
+
+class WriteBehindTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = datetime.date.today()
+        cls.student = User.objects.create_user(username='test_user', password='test_user1234')
+        cls.topic = Topic.objects.create(name='Animals')
+        cls.words = [Word.objects.create(origin=f'origin {i}', target=f'target {i}') for i in range(4)]
+        cls.topic.words.add(*cls.words)
+        cls.results = {str(cls.words[0].id): True, str(cls.words[1].id): False}
+
+    def setUp(self):
+        vocabulary.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.queue = write_behind.WriteBehindQueue(self.directory, 100)
+
+    def get_journals(self):
+        return [name for name in os.listdir(self.directory) if name.endswith(write_behind.JOURNAL_SUFFIX)]
+
+    def test_submit_does_not_query_database(self):
+        vocabulary.get_vocabulary(self.topic.id)
+        with self.assertNumQueries(0):
+            results_page_data = write_behind.submit(self.results, self.student, self.topic.id, queue=self.queue)
+
+        self.assertEquals([('origin 0', 'target 0', True), ('origin 1', 'target 1', False)],
+                          results_page_data['words'])
+        self.assertEquals(1, results_page_data['correct'])
+        self.assertEquals(2, results_page_data['total'])
+        self.assertEquals(1, len(self.get_journals()))
+
+    def test_submit_ignores_words_not_in_topic(self):
+        other_word = Word.objects.create(origin='other origin', target='other target')
+        results_page_data = write_behind.submit({**self.results, str(other_word.id): True}, self.student,
+                                                self.topic.id, queue=self.queue)
+        self.assertEquals(2, results_page_data['total'])
+
+    def test_flush_writes_results(self):
+        other_student = User.objects.create_user(username='other_user', password='test_user1234')
+        write_behind.submit(self.results, self.student, self.topic.id, queue=self.queue)
+        write_behind.submit(self.results, other_student, self.topic.id, queue=self.queue)
+
+        self.assertEquals(2, self.queue.flush())
+        self.assertEquals(2, QuizResults.objects.filter(topic=self.topic).count())
+        self.assertEquals(4, WordScore.objects.filter(word__in=self.words[:2]).count())
+        self.assertEquals(1, User.objects.get(pk=self.student.pk).streak)
+
+        # the journal is deleted once its contents are committed
+        self.assertEquals([], self.get_journals())
+        self.assertFalse(FlushedJournal.objects.exists())
+        self.assertEquals(0, self.queue.flush())
+
+    def test_recover_crashed_journal(self):
+        # a journal whose process crashed before flushing it, with a final line cut short by the crash
+        journal = write_behind.Journal.create(self.directory)
+        journal.append({'student': self.student.id, 'topic': self.topic.id, 'date': self.today.isoformat(),
+                        'answers': self.results})
+        journal.file.write('{"student": ')
+        journal.file.close()
+
+        self.assertEquals(1, self.queue.recover())
+        self.assertEquals(1, QuizResults.objects.filter(student=self.student).count())
+        self.assertEquals([], self.get_journals())
+
+    def test_recover_skips_committed_journal(self):
+        # a journal whose process crashed after committing it, but before deleting it
+        journal = write_behind.Journal.create(self.directory)
+        journal.append({'student': self.student.id, 'topic': self.topic.id, 'date': self.today.isoformat(),
+                        'answers': self.results})
+        journal.file.close()
+        FlushedJournal.objects.create(name=journal.name)
+
+        self.assertEquals(0, self.queue.recover())
+        self.assertFalse(QuizResults.objects.filter(student=self.student).exists())
+        self.assertEquals([], self.get_journals())
+
+    def test_recover_leaves_journals_in_use(self):
+        write_behind.submit(self.results, self.student, self.topic.id, queue=self.queue)
+        self.assertEquals(0, write_behind.WriteBehindQueue(self.directory, 100).recover())
+        self.assertEquals(1, len(self.get_journals()))
+
+    def test_flush_skips_deleted_student(self):
+        other_student = User.objects.create_user(username='other_user', password='test_user1234')
+        write_behind.submit(self.results, other_student, self.topic.id, queue=self.queue)
+        other_student.delete()
+        self.assertEquals(0, self.queue.flush())
+        self.assertEquals([], self.get_journals())
+
+    def test_failing_submission_moved_aside(self):
+        other_student = User.objects.create_user(username='other_user', password='test_user1234')
+        write_behind.submit(self.results, other_student, self.topic.id, queue=self.queue)
+        write_behind.submit(self.results, self.student, self.topic.id, queue=self.queue)
+
+        def fail_for_other_student(student, *args):
+            if student == other_student:
+                raise ValueError
+            return record_results(student, *args)
+
+        with mock.patch('quizzes.utils.write_behind.record_results', side_effect=fail_for_other_student), \
+                self.assertLogs('quizzes.utils.write_behind', 'ERROR'):
+            for _ in range(write_behind.MAX_FLUSH_ATTEMPTS - 1):
+                self.assertRaises(ValueError, self.queue.flush)
+            self.assertEquals(1, len(self.get_journals()))
+
+            # the batch is then applied a submission at a time, and the one which still fails is moved aside
+            self.assertEquals(1, self.queue.flush())
+
+        self.assertEquals([self.student.id], list(QuizResults.objects.values_list('student', flat=True)))
+        self.assertEquals([], self.get_journals())
+        [dead_letter] = os.listdir(self.directory)
+        self.assertTrue(dead_letter.endswith(write_behind.DEAD_LETTER_SUFFIX))
+        with open(os.path.join(self.directory, dead_letter)) as file:
+            self.assertEquals([other_student.id], [json.loads(line)['student'] for line in file])
+
+        # later submissions are no longer held up
+        write_behind.submit(self.results, self.student, self.topic.id, queue=self.queue)
+        self.assertEquals(1, self.queue.flush())
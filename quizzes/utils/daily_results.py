@@ -0,0 +1,115 @@
+"""This module maintains the DailyResults rollup, i.e. each student's total quizzes, answers and points per Topic per
+day, which the charts read in place of the individual QuizResults. Totals are added as each quiz is logged, and can be
+rebuilt from the QuizResults at any time (see the rebuild_daily_results command).
+
+Every change is also recorded against version tokens kept in Django's cache: one for all the results, one for each
+student's and one for each Topic's. The charts use them to tell whether the data they have cached is still current.
+"""
+
+import uuid
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+
+from quizzes.models import DailyResults, QuizResults
+
+TOTALS = ('quizzes_taken', 'correct_answers', 'incorrect_answers', 'points')
+VERSION_KEY = 'quizzes:results:{}'
+
+
+def add(rows):
+    """Add to the totals of DailyResults rows, creating any that don't yet exist.
+
+    Each row is given as (student_id, topic_id, date, quizzes_taken, correct_answers, incorrect_answers, points). The
+    additions are made by the database from the row as it stands, so overlapping quizzes can't lose an update.
+    """
+    qn = connection.ops.quote_name
+    table = qn(DailyResults._meta.db_table)
+    columns = [qn(DailyResults._meta.get_field(name).column) for name in ('student', 'topic', 'date') + TOTALS]
+    student, topic, date = columns[:3]
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) " \
+          f"ON CONFLICT ({student}, {date}, {topic}) DO UPDATE SET " + \
+          ', '.join(f'{column} = {table}.{column} + EXCLUDED.{column}' for column in columns[3:])
+
+    adapt_date = connection.ops.adapt_datefield_value
+    params = [(student_id, topic_id, adapt_date(date), *totals) for student_id, topic_id, date, *totals in rows]
+    if params:
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+        invalidate({row[0] for row in params}, {row[1] for row in params})
+
+
+def add_quiz_results(quiz_results):
+    """Add a newly created QuizResults to the totals for its student, Topic and day."""
+    add([(quiz_results.student_id, quiz_results.topic_id, quiz_results.date_created, 1,
+          quiz_results.correct_answers, quiz_results.incorrect_answers, quiz_results.points)])
+
+
+@transaction.atomic
+def remove_quiz_results(quiz_results):
+    """Take a deleted QuizResults away from the totals for its student, Topic and day."""
+    rows = DailyResults.objects.filter(student_id=quiz_results.student_id, topic_id=quiz_results.topic_id,
+                                       date=quiz_results.date_created)
+    rows.update(quizzes_taken=F('quizzes_taken') - 1,
+                correct_answers=F('correct_answers') - quiz_results.correct_answers,
+                incorrect_answers=F('incorrect_answers') - quiz_results.incorrect_answers,
+                points=F('points') - quiz_results.points)
+    rows.filter(quizzes_taken=0).delete()
+    invalidate([quiz_results.student_id], [quiz_results.topic_id])
+
+
+def summarise(student_ids):
+    """Total up the given students' QuizResults, returning rows in the form expected by add."""
+    return list(QuizResults.objects.filter(student_id__in=student_ids)
+                .values('student_id', 'topic_id', 'date_created')
+                .annotate(quizzes_taken=Count('id'), total_correct=Sum('correct_answers'),
+                          total_incorrect=Sum('incorrect_answers'), total_points=Sum('points'))
+                .order_by()
+                .values_list('student_id', 'topic_id', 'date_created', 'quizzes_taken', 'total_correct',
+                             'total_incorrect', 'total_points'))
+
+
+@transaction.atomic
+def rebuild(student_ids, rows=None):
+    """Replace the given students' DailyResults with the totals of their QuizResults (or with the given rows, as
+    returned by summarise for the same students)."""
+    DailyResults.objects.filter(student_id__in=student_ids).delete()
+    add(summarise(student_ids) if rows is None else rows)
+    invalidate(student_ids)
+
+
+def get_scopes(student_id=None, topic_id=None):
+    """Get the names of the version tokens which cover the results of the given student and/or Topic (or of everyone).
+    """
+    scopes = [f'student:{student_id}'] if student_id else []
+    if topic_id:
+        scopes.append(f'topic:{topic_id}')
+    return scopes or ['all']
+
+
+def get_versions(scopes):
+    """Get the current version token of each of the given scopes, creating any which don't yet exist."""
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, timeout=None)
+        versions.update(cache.get_many(list(missing)))
+    # a cache backend which stores nothing (e.g. DummyCache) means the versions never match
+    return tuple(versions.get(key) or uuid.uuid4().hex for key in keys)
+
+
+def invalidate(student_ids=(), topic_ids=(), students=False):
+    """Record that the results of the given students and Topics have changed (and so those of everyone, too). If
+    students is True, the students themselves have changed (e.g. joined, left or been renamed)."""
+    scopes = ['all'] + [f'student:{student_id}' for student_id in student_ids] + \
+        [f'topic:{topic_id}' for topic_id in topic_ids] + (['students'] if students else [])
+
+    def replace_versions():
+        cache.set_many({VERSION_KEY.format(scope): uuid.uuid4().hex for scope in scopes}, timeout=None)
+
+    # as with the vocabulary index, invalidate again once the change is visible to other workers
+    replace_versions()
+    transaction.on_commit(replace_versions)
@@ -0,0 +1,207 @@
+"""This module maintains the DueWordCount store, i.e. the number of Words due revision for each student, both per Topic
+and across all live Topics. Reading a count is a single row lookup, whereas writes are applied incrementally as each
+student's spaced repetition schedule (or the Topics themselves) change."""
+
+import datetime
+from collections import defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from quizzes.models import DueWordCount, Topic, Word, WordScore
+
+TopicWords = Word.topics.through
+
+
+def get_words_due(student, topic=None):
+    """Get the number of Words the student has due revision today, either in the given Topic or across all live Topics.
+    """
+    today = datetime.date.today()
+    words_due = DueWordCount.objects.filter(student=student, topic=topic, as_of=today)\
+        .values_list('words_due', flat=True).first()
+
+    # the row is missing or out of date, so bring all the student's counts up to date
+    if words_due is None:
+        counts = refresh_student(student, today=today)
+        words_due = counts.get(topic.id if topic else None, 0)
+    return words_due
+
+
+def refresh_student(student, today=None):
+    """Ensure the student has an up-to-date DueWordCount row for every Topic (plus the all-topics row).
+
+    Returns a dictionary of {topic_id: words_due}, with the all-topics count stored under the key None.
+    """
+    today = today or datetime.date.today()
+    rows = {row.topic_id: row for row in DueWordCount.objects.filter(student=student)}
+    topic_ids = set(Topic.objects.values_list('id', flat=True))
+    stale = {topic_id for topic_id in topic_ids | {None}
+             if topic_id not in rows or rows[topic_id].as_of != today}
+
+    if stale:
+        counts = _count_words_due_per_topic(student, stale - {None}, today)
+        if None in stale:
+            counts[None] = _count_words_due_all_topics(student, today)
+
+        rows_to_create = []
+        rows_to_update = []
+        for topic_id, words_due in counts.items():
+            row = rows.get(topic_id)
+            if row is None:
+                row = DueWordCount(student=student, topic_id=topic_id)
+                rows_to_create.append(row)
+            else:
+                rows_to_update.append(row)
+            row.words_due = words_due
+            row.as_of = today
+            rows[topic_id] = row
+
+        # another request may have created the same rows in the meantime, in which case theirs are kept
+        DueWordCount.objects.bulk_create(rows_to_create, ignore_conflicts=True)
+        DueWordCount.objects.bulk_update(rows_to_update, fields=['words_due', 'as_of'])
+
+    return {topic_id: row.words_due for topic_id, row in rows.items() if topic_id in topic_ids or topic_id is None}
+
+
+def apply_schedule_changes(student, changes, today=None):
+    """Adjust the student's stored counts after quiz_logger has rescheduled some of their Words.
+
+    changes is a dictionary of {word_id: (old_next_review, new_next_review)}, where old_next_review is None for a Word
+    the student has never seen before. Only rows already current for today are adjusted; any others are recomputed in
+    full the next time they are read.
+    """
+    today = today or datetime.date.today()
+
+    # +1 where a Word has become due, -1 where a Word is no longer due
+    word_deltas = {}
+    for word_id, (old_next_review, new_next_review) in changes.items():
+        was_due = old_next_review is None or old_next_review <= today
+        is_due = new_next_review <= today
+        if was_due != is_due:
+            word_deltas[word_id] = 1 if is_due else -1
+
+    if not word_deltas:
+        return
+
+    live_topic_ids = set(Topic.live_topics(today).values_list('id', flat=True))
+    topic_deltas = defaultdict(int)
+    live_words = set()
+
+    for topic_id, word_id in TopicWords.objects.filter(word_id__in=word_deltas).values_list('topic_id', 'word_id'):
+        topic_deltas[topic_id] += word_deltas[word_id]
+        if topic_id in live_topic_ids:
+            live_words.add(word_id)
+
+    # words shared between live topics are only counted once in the all-topics total
+    topic_deltas[None] = sum(word_deltas[word_id] for word_id in live_words)
+
+    for topic_id, delta in topic_deltas.items():
+        if delta:
+            DueWordCount.objects.filter(student=student, topic_id=topic_id, as_of=today)\
+                .update(words_due=Greatest(F('words_due') + delta, 0))
+
+
+def recompute_topic_counts(rows, today=None):
+    """Recompute the given per-Topic DueWordCount rows from the live schedule, in a single UPDATE statement."""
+    today = today or datetime.date.today()
+    words_in_topic = TopicWords.objects.filter(topic_id=OuterRef('topic_id'))\
+        .values('topic_id').annotate(total=Count('id')).values('total')
+    words_not_due = TopicWords.objects.filter(topic_id=OuterRef('topic_id'),
+                                              word__wordscore__student_id=OuterRef('student_id'),
+                                              word__wordscore__next_review__gt=today)\
+        .values('topic_id').annotate(total=Count('id')).values('total')
+
+    return rows.filter(topic__isnull=False).update(
+        words_due=Coalesce(Subquery(words_in_topic), 0) - Coalesce(Subquery(words_not_due), 0), as_of=today)
+
+
+def recompute_all_topics_counts(rows, today=None):
+    """Recompute the given all-topics DueWordCount rows from the live schedule, in a single UPDATE statement."""
+    today = today or datetime.date.today()
+    live_topic_ids = list(Topic.live_topics(today).values_list('id', flat=True))
+    live_words = TopicWords.objects.filter(topic_id__in=live_topic_ids).values('word_id').distinct().count()
+    live_words_not_due = WordScore.objects.filter(student_id=OuterRef('student_id'), next_review__gt=today,
+                                                  word__topics__in=live_topic_ids)\
+        .values('student_id').annotate(total=Count('word_id', distinct=True)).values('total')
+
+    return rows.filter(topic__isnull=True).update(
+        words_due=live_words - Coalesce(Subquery(live_words_not_due), 0), as_of=today)
+
+
+def recompute_student(student_id, topic_ids, today=None):
+    """Recompute the student's existing rows for the given Topics, along with their all-topics row."""
+    student_rows = DueWordCount.objects.filter(student_id=student_id)
+    recompute_topic_counts(student_rows.filter(topic_id__in=topic_ids), today=today)
+    recompute_all_topics_counts(student_rows, today=today)
+
+
+def recompute_topics(topic_ids, today=None):
+    """Recompute every student's rows for the given Topics, along with all the all-topics rows. The rows for other
+    Topics are left alone."""
+    recompute_topic_counts(DueWordCount.objects.filter(topic_id__in=topic_ids), today=today)
+    recompute_all_topics_counts(DueWordCount.objects.filter(topic__isnull=True), today=today)
+
+
+def rollover(today=None):
+    """Advance all rows that are out of date to today, adding the Words which have fallen due in the meantime.
+
+    Intended to be run shortly after midnight (see the rollover_due_counts command) so that the first page load of the
+    day does not have to recompute anything. Returns the number of rows rolled over.
+    """
+    today = today or datetime.date.today()
+    rolled_over = 0
+
+    stale_dates = DueWordCount.objects.filter(as_of__lt=today).values_list('as_of', flat=True).distinct().order_by()
+    for as_of in list(stale_dates):
+        stale_rows = DueWordCount.objects.filter(as_of=as_of)
+        rolled_over += stale_rows.count()
+
+        # Words scheduled for review on (as_of, today] were not due at the time the rows were last correct, but are now
+        newly_due = {'word__wordscore__next_review__gt': as_of, 'word__wordscore__next_review__lte': today}
+        deltas = {(student_id, topic_id): total for student_id, topic_id, total in
+                  TopicWords.objects.filter(**newly_due)
+                  .values('word__wordscore__student_id', 'topic_id').annotate(total=Count('id'))
+                  .values_list('word__wordscore__student_id', 'topic_id', 'total')}
+
+        # the set of live topics only changes overnight if a topic has been scheduled to go live
+        live_topics_changed = Topic.objects.filter(live_from__gt=as_of, live_from__lte=today).exists()
+        if live_topics_changed:
+            recompute_all_topics_counts(stale_rows, today=today)
+        else:
+            live_topic_ids = list(Topic.live_topics(today).values_list('id', flat=True))
+            deltas.update({(student_id, None): total for student_id, total in
+                           TopicWords.objects.filter(topic_id__in=live_topic_ids, **newly_due)
+                           .values('word__wordscore__student_id')
+                           .annotate(total=Count('word_id', distinct=True))
+                           .values_list('word__wordscore__student_id', 'total')})
+
+        rows_to_update = []
+        for row in stale_rows.iterator():
+            delta = deltas.get((row.student_id, row.topic_id))
+            if delta:
+                row.words_due += delta
+                rows_to_update.append(row)
+
+        DueWordCount.objects.bulk_update(rows_to_update, fields=['words_due'], batch_size=500)
+        stale_rows.update(as_of=today)
+
+    return rolled_over
+
+
+def _count_words_due_per_topic(student, topic_ids, today):
+    """Count the student's Words due revision in each of the given Topics using the live schedule."""
+    words_in_topic = dict(TopicWords.objects.filter(topic_id__in=topic_ids)
+                          .values('topic_id').annotate(total=Count('id')).values_list('topic_id', 'total'))
+    words_not_due = dict(TopicWords.objects.filter(topic_id__in=topic_ids, word__wordscore__student=student,
+                                                   word__wordscore__next_review__gt=today)
+                         .values('topic_id').annotate(total=Count('id')).values_list('topic_id', 'total'))
+    return {topic_id: words_in_topic.get(topic_id, 0) - words_not_due.get(topic_id, 0) for topic_id in topic_ids}
+
+
+def _count_words_due_all_topics(student, today):
+    """Count the student's Words due revision across all live Topics using the live schedule."""
+    live_topic_ids = list(Topic.live_topics(today).values_list('id', flat=True))
+    live_words = TopicWords.objects.filter(topic_id__in=live_topic_ids).values('word_id').distinct().count()
+    live_words_not_due = WordScore.objects.filter(student=student, next_review__gt=today,
+                                                  word__topics__in=live_topic_ids).values('word_id').distinct().count()
+    return live_words - live_words_not_due
@@ -0,0 +1,82 @@
+"""This module maintains the Leaderboards, i.e. the students ranked by the points they earned in each Topic (and in all
+Topics) over each of the Dashboard's preset windows of days. A board is built from the DailyResults when it is first
+read on each day, and each quiz logged after that is added to it, so reading a page of a board is a short index scan.
+"""
+
+import datetime
+
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from quizzes.models import DailyResults, Leaderboard, LeaderboardEntry, Topic
+
+
+def get_board(topic_id, window, today=None):
+    """Get the Leaderboard for the given Topic (or all Topics, if None) and window, (re)building it if it is not
+    up to date. Returns None if there is no such Topic."""
+    today = today or datetime.date.today()
+    board = Leaderboard.objects.filter(topic_id=topic_id, window=window).first()
+    if board is None:
+        if topic_id is not None and not Topic.objects.filter(pk=topic_id).exists():
+            return None
+        # another request may have created the same board in the meantime, in which case theirs is kept
+        Leaderboard.objects.bulk_create([Leaderboard(topic_id=topic_id, window=window)], ignore_conflicts=True)
+        board = Leaderboard.objects.get(topic_id=topic_id, window=window)
+    if board.as_of != today:
+        rebuild(board, today)
+    return board
+
+
+@transaction.atomic
+def rebuild(board, today=None):
+    """Replace the board's entries with the students' total points from the DailyResults."""
+    today = today or datetime.date.today()
+    # the board is marked up to date first, so that (on SQLite) no quiz can be logged until it has been rebuilt
+    Leaderboard.objects.filter(pk=board.pk).update(as_of=today)
+    board.as_of = today
+
+    results = DailyResults.objects.filter(student__is_teacher=False)
+    if board.topic_id is not None:
+        results = results.filter(topic_id=board.topic_id)
+    if board.window != Leaderboard.ALL_TIME:
+        results = results.filter(date__gte=today - datetime.timedelta(board.window), date__lte=today)
+    totals = results.values('student_id').annotate(total=Sum('points')).order_by().values_list('student_id', 'total')
+
+    board.entries.all().delete()
+    LeaderboardEntry.objects.bulk_create((LeaderboardEntry(leaderboard=board, student_id=student_id, points=total)
+                                          for student_id, total in totals.iterator()), batch_size=500)
+
+
+def add_quiz_results(quiz_results, today=None):
+    """Add the points of a newly created QuizResults to every up to date board it counts towards."""
+    if quiz_results.student.is_teacher:
+        return
+
+    today = today or datetime.date.today()
+    windows = [window for window in Leaderboard.WINDOWS if window == Leaderboard.ALL_TIME or
+               today - datetime.timedelta(window) <= quiz_results.date_created <= today]
+
+    qn = connection.ops.quote_name
+    boards = qn(Leaderboard._meta.db_table)
+    entries = qn(LeaderboardEntry._meta.db_table)
+    board, student, points = (qn(LeaderboardEntry._meta.get_field(name).column)
+                              for name in ('leaderboard', 'student', 'points'))
+    topic, window, as_of = (qn(Leaderboard._meta.get_field(name).column) for name in ('topic', 'window', 'as_of'))
+
+    sql = f"INSERT INTO {entries} ({board}, {student}, {points}) " \
+          f"SELECT {qn(Leaderboard._meta.pk.column)}, %s, %s FROM {boards} " \
+          f"WHERE {as_of} = %s AND {window} IN ({', '.join(['%s'] * len(windows))}) " \
+          f"AND ({topic} = %s OR {topic} IS NULL) " \
+          f"ON CONFLICT ({board}, {student}) DO UPDATE SET {points} = {entries}.{points} + EXCLUDED.{points}"
+    params = [quiz_results.student_id, quiz_results.points, connection.ops.adapt_datefield_value(today), *windows,
+              quiz_results.topic_id]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def invalidate(topic_ids=None):
+    """Mark the boards of the given Topics (by default, of every Topic), and those of all Topics, to be rebuilt."""
+    boards = Leaderboard.objects.all()
+    if topic_ids is not None:
+        boards = boards.filter(topic_id__in=topic_ids) | boards.filter(topic__isnull=True)
+    boards.update(as_of=None)
@@ -1,42 +1,44 @@
 """This module generates all the questions needed for a Quiz and returning it in the expected format."""
 
-import copy
 import datetime
 import random
 
-from django.shortcuts import get_object_or_404
+from django.http import Http404
 
 from myproject.settings import CORRECT_ANSWER_PTS, ORIGIN_ICON, TARGET_ICON, MAX_QUIZ_LENGTH
-from quizzes.models import Topic
+from quizzes.models import WordScore
+from quizzes.utils.vocabulary import get_vocabulary
 
 
 def get_quiz(user, topic_id):
     """Create quiz for given Topic and current User, based on Words that are due to be revised."""
+    today = datetime.date.today()
+    vocabulary = get_vocabulary(topic_id)
 
     # teachers can still do quizzes if topic is hidden, or not yet launched
-    if user.is_teacher:
-        topic = get_object_or_404(Topic, pk=topic_id)
-    else:
-        topic = get_object_or_404(Topic, pk=topic_id, is_hidden=False, available_from__lte=datetime.date.today())
+    if vocabulary is None or not (user.is_teacher or vocabulary.is_available(today)):
+        raise Http404("No Topic matches the given query.")
 
     quiz = _get_quiz_template()
     questions = []
 
-    # gather data needed for the quiz: the words due to be revised, and a pool of possible incorrect options
-    words_to_revise = topic.words_due_revision(user).values('id', 'origin', 'target')[:MAX_QUIZ_LENGTH]
-    options_pool = list(topic.words.values('id', 'origin', 'target')[:MAX_QUIZ_LENGTH * 4])
+    # the words due to be revised are all the words in the topic, less those the user has scheduled for a later date
+    words_not_due = set(WordScore.objects.filter(student=user, next_review__gt=today, word__topics=topic_id)
+                        .values_list('word_id', flat=True))
+    words_to_revise = vocabulary.get_unscheduled(words_not_due, MAX_QUIZ_LENGTH)
 
-    # ensure both word lists have enough content with which to form a quiz
+    # if nothing is due, offer some extra practice using any words from the topic
     if len(words_to_revise) == 0:
         quiz['is_due_revision'] = False
-        words_to_revise = copy.deepcopy(options_pool[:MAX_QUIZ_LENGTH])
+        words_to_revise = vocabulary.sample(MAX_QUIZ_LENGTH)
 
-    if len(options_pool) >= 4:
-        for question in words_to_revise:
+    if len(vocabulary) >= 4:
+        for word_index in words_to_revise:
+            question = vocabulary.get_word(word_index)
             direction = _choose_direction()
             question['origin_to_target'] = direction
 
-            options = _get_options(options_pool, question['id'], direction)
+            options = _get_options(vocabulary, word_index, direction)
 
             correct_answer = random.randrange(4)
             question['correct_answer'] = correct_answer
@@ -108,18 +110,15 @@ def _get_quiz_template():
     }
 
 
-def _get_options(options_pool, word_id, direction):
+def _get_options(vocabulary, word_index, direction):
     """Build the multiple-choice options for the question currently being generated."""
     if not direction:
-        option_text = 'origin'
+        option_text = vocabulary.origins
     else:
-        option_text = 'target'
-
-    raw_options = random.sample(options_pool, 4)  # pick 4 in case one of those is the correct answer
+        option_text = vocabulary.targets
 
-    # remove the correct answer if selected
-    options = (opt[option_text] for opt in raw_options if opt['id'] != word_id)
-    return [next(options) for _ in range(3)]
+    # distractors are drawn uniformly from across the whole topic, never including the correct answer
+    return [option_text[index] for index in vocabulary.sample(3, exclude=word_index)]
 
 
 def _choose_direction():
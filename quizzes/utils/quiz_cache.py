@@ -0,0 +1,91 @@
+"""This module pre-generates each student's next quiz and keeps it in Django's cache, so that the burst of quiz starts at
+the beginning of a lesson can be served without building every quiz on demand.
+
+A cached quiz is only served if nothing it was built from has changed since: it is stamped with the date, the version
+of the student's schedule (replaced by quiz_logger and the signal handlers whenever it changes) and the version of the
+Topic's vocabulary index.
+"""
+
+import datetime
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.http import Http404
+
+from myproject.settings import PREGENERATE_QUIZZES
+from quizzes.utils import vocabulary
+from quizzes.utils.quiz_builder import get_quiz
+
+QUIZ_KEY = 'quizzes:next-quiz:{}:{}'
+SCHEDULE_VERSION_KEY = 'quizzes:schedule:{}'
+QUIZ_TIMEOUT = 60 * 60 * 24
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='quiz-pregeneration')
+
+
+def take_quiz(user, topic_id):
+    """Get the user's next quiz for the given Topic, using (and consuming) the pre-generated quiz if it is still valid.
+    """
+    key = QUIZ_KEY.format(user.id, topic_id)
+    cached = cache.get_many([key, SCHEDULE_VERSION_KEY.format(user.id), vocabulary.VERSION_KEY.format(topic_id)])
+
+    entry = cached.get(key)
+    if entry is not None:
+        cache.delete(key)
+        current_versions = (datetime.date.today(),
+                            cached.get(SCHEDULE_VERSION_KEY.format(user.id)),
+                            cached.get(vocabulary.VERSION_KEY.format(topic_id)))
+        if entry['versions'] == current_versions and None not in current_versions:
+            return entry['quiz']
+
+    return get_quiz(user, topic_id)
+
+
+def pregenerate(user, topic_id):
+    """Build the user's next quiz for the given Topic and store it in the cache. Returns True if a quiz was stored."""
+    # the versions are read before the quiz is built, so any change made while building it will invalidate it
+    versions = (datetime.date.today(), _get_schedule_version(user.id), vocabulary.get_vocabulary_version(topic_id))
+
+    try:
+        quiz = get_quiz(user, topic_id)
+    except Http404:
+        return False
+
+    if not quiz['questions']:
+        return False
+
+    cache.set(QUIZ_KEY.format(user.id, topic_id), {'quiz': quiz, 'versions': versions}, timeout=QUIZ_TIMEOUT)
+    return True
+
+
+def pregenerate_later(user, topic_ids):
+    """Pre-generate the user's next quizzes in a background thread, once the current transaction has been committed."""
+    if PREGENERATE_QUIZZES:
+        transaction.on_commit(lambda: _executor.submit(_pregenerate_in_background, user, list(topic_ids)))
+
+
+def schedule_changed(student_id):
+    """Invalidate all the student's pre-generated quizzes, as their spaced repetition schedule has changed."""
+    def replace_version():
+        cache.set(SCHEDULE_VERSION_KEY.format(student_id), uuid.uuid4().hex, timeout=None)
+
+    # as with the vocabulary index, invalidate again once the change is visible to other workers
+    replace_version()
+    transaction.on_commit(replace_version)
+
+
+def _get_schedule_version(student_id):
+    key = SCHEDULE_VERSION_KEY.format(student_id)
+    cache.add(key, uuid.uuid4().hex, timeout=None)
+    return cache.get(key)
+
+
+def _pregenerate_in_background(user, topic_ids):
+    try:
+        for topic_id in topic_ids:
+            pregenerate(user, topic_id)
+    finally:
+        # the thread is reused, so don't leave its database connection open between jobs
+        connection.close()
@@ -3,80 +3,181 @@ schedule accordingly."""
 
 import datetime
 
-from django.db import transaction
-from django.db.models import F
+from django.db import connection, transaction
+from django.utils import timezone
 
 from myproject.settings import CORRECT_ANSWER_PTS
-from quizzes.models import WordScore, QuizResults, Word
+from quizzes.models import WordScore, QuizResults, Word, QUIZ_INTERVALS, MAX_SCORE
+from quizzes.utils import daily_results, due_counts, leaderboards, quiz_cache, word_stats
 
 
 @transaction.atomic
-def process_results(results, student, topic_id, today=datetime.date.today()):
+def process_results(results, student, topic_id, today=None):
     """Update the spaced repetition schedule for the User with the latest Quiz data."""
+    today = today or datetime.date.today()
     results_page_data = {'words': []}
-    total_questions = 0
-    total_correct = 0
-    word_scores_to_create = []
-    word_scores_to_update = []
+    answers = {}
 
-    # obtain the necessary database entries for maintaining the spaced-repetition schedule
     words_in_quiz = Word.objects.in_bulk(results, field_name='pk')
-    word_scores = {ws.word_id: ws for ws in
-                   WordScore.objects.select_related('word').filter(student=student, word__in=words_in_quiz)}
 
     # process the results
-    for word_id in words_in_quiz:
+    for word_id, word in words_in_quiz.items():
         is_correct = results.get(str(word_id))
-        total_questions += 1
-
-        # if WordScore exists for this word/student pair, update it...
-        word_score = word_scores.get(word_id, None)
-
-        if word_score:
-            if word_score.next_review <= today or not is_correct:
-                word_score.times_seen = F('times_seen') + 1
-
-                if is_correct:
-                    word_score.set_next_review(today=today)
-                    word_score.consecutive_correct = F('consecutive_correct') + 1
-                    word_score.times_correct = F('times_correct') + 1
-                else:
-                    word_score.next_review = today
-                    word_score.consecutive_correct = 0
-                word_scores_to_update.append(word_score)
-
-        # ...otherwise, create the WordScore
-        else:
-            if is_correct:
-                word_score = WordScore(word=words_in_quiz.get(word_id), student=student, consecutive_correct=1,
-                                       times_correct=1, next_review=today + datetime.timedelta(1))
-            else:
-                word_score = WordScore(word=words_in_quiz.get(word_id), student=student)
-            word_scores_to_create.append(word_score)
+        answers[word_id] = is_correct
 
         # prepare data for display on the results page
-        total_correct += is_correct
-        result = (word_score.word.origin, word_score.word.target, is_correct)
-        results_page_data['words'].append(result)
+        results_page_data['words'].append((word.origin, word.target, is_correct))
 
-    # bulk create/update the WordScores
-    WordScore.objects.bulk_create(word_scores_to_create)
-    WordScore.objects.bulk_update(word_scores_to_update,
-                                  fields=['consecutive_correct', 'times_seen', 'times_correct', 'next_review'])
-
-    _log_results(student, today, topic_id, total_correct, total_questions)
+    record_results(student, topic_id, answers, today)
 
     # record quiz score and pass it to results page
-    results_page_data['correct'] = total_correct
-    results_page_data['total'] = total_questions
+    results_page_data['correct'] = sum(answers.values())
+    results_page_data['total'] = len(answers)
     return results_page_data
 
 
+def record_results(student, topic_id, answers, today):
+    """Write a marked Quiz, given as {word_id: is_correct}, to the database. Must be called within a transaction."""
+    if answers:
+        # the Words' totals and the student's due counts are adjusted by the difference the quiz made to their
+        # WordScores
+        before = get_word_scores(student.id, answers)
+        after = upsert_word_scores(student, answers, today)
+        word_stats.add_changes(before, after)
+        due_counts.apply_schedule_changes(student, {word_id: (before[word_id][2] if word_id in before else None,
+                                                              next_review)
+                                                    for word_id, (_, _, next_review) in after.items()}, today=today)
+        quiz_cache.schedule_changed(student.id)
+
+    total_correct = sum(answers.values())
+    _log_results(student, today, topic_id, total_correct, len(answers))
+
+
+def get_word_scores(student_id, word_ids):
+    """Get the student's existing WordScores for the given Words, as {word_id: (times_seen, times_correct,
+    next_review)}. They are locked until the end of the transaction (where supported), so no overlapping submission can
+    change them meanwhile."""
+    return {word_id: (times_seen, times_correct, next_review) for word_id, times_seen, times_correct, next_review in
+            WordScore.objects.select_for_update().filter(student_id=student_id, word_id__in=word_ids)
+            .values_list('word_id', 'times_seen', 'times_correct', 'next_review')}
+
+
+def upsert_word_scores(student, answers, today):
+    """Create or update the student's WordScores for the given {word_id: is_correct} answers in a single statement.
+
+    Every increment is computed by the database from the row as it stands, so overlapping submissions for the same
+    student can neither lose an update nor collide on the (word, student) constraint. The rules are those of the
+    spaced repetition schedule: a correct answer to a Word that is not yet due changes nothing, a correct answer to a
+    due Word moves it along the QUIZ_INTERVALS, and an incorrect answer makes the Word due again today. Databases
+    without INSERT ... ON CONFLICT ... RETURNING apply the same rules with bulk_create and bulk_update instead.
+
+    Returns the student's new WordScores, as {word_id: (times_seen, times_correct, next_review)}.
+    """
+    if not connection.features.supports_update_conflicts_with_target or \
+            not connection.features.can_return_rows_from_bulk_insert:
+        return _save_word_scores(student, answers, today)
+
+    qn = connection.ops.quote_name
+    fields = {field.name: qn(field.column) for field in WordScore._meta.concrete_fields}
+    table = qn(WordScore._meta.db_table)
+    existing = {name: f'{table}.{column}' for name, column in fields.items()}
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    today_value = connection.ops.adapt_datefield_value(today)
+
+    def review_date(days):
+        return connection.ops.adapt_datefield_value(today + datetime.timedelta(days=days))
+
+    # a new WordScore starts as if it had been seen once; its times_correct doubles as the answer in the update below
+    insert_columns = ['word', 'student', 'consecutive_correct', 'times_seen', 'times_correct', 'last_updated',
+                      'next_review']
+    values = []
+    insert_params = []
+    for word_id, is_correct in answers.items():
+        values.append('(%s, %s, %s, %s, %s, %s, %s)')
+        insert_params += [word_id, student.id, int(is_correct), 1, int(is_correct), now,
+                          review_date(QUIZ_INTERVALS[0]) if is_correct else today_value]
+
+    answered_correctly = f"EXCLUDED.{fields['times_correct']} = 1"
+    counts = f"({existing['next_review']} <= %s OR NOT {answered_correctly})"  # i.e. the answer changes the schedule
+    scheduled = ' '.join(f'WHEN {score} THEN %s' for score in range(MAX_SCORE))
+
+    assignments = [
+        ('times_seen', f"{existing['times_seen']} + CASE WHEN {counts} THEN 1 ELSE 0 END", [today_value]),
+        ('times_correct', f"{existing['times_correct']} + CASE WHEN {counts} THEN EXCLUDED.{fields['times_correct']} "
+                          f"ELSE 0 END", [today_value]),
+        ('consecutive_correct', f"CASE WHEN NOT {counts} THEN {existing['consecutive_correct']} "
+                                f"WHEN {answered_correctly} THEN {existing['consecutive_correct']} + 1 ELSE 0 END",
+         [today_value]),
+        ('next_review', f"CASE WHEN NOT {counts} THEN {existing['next_review']} "
+                        f"WHEN {answered_correctly} THEN "
+                        f"CASE {existing['consecutive_correct']} {scheduled} ELSE %s END ELSE %s END",
+         [today_value] + [review_date(days) for days in QUIZ_INTERVALS] + [today_value]),
+        ('last_updated', f"CASE WHEN {counts} THEN EXCLUDED.{fields['last_updated']} "
+                         f"ELSE {existing['last_updated']} END", [today_value]),
+    ]
+
+    sql = (f"INSERT INTO {table} ({', '.join(fields[name] for name in insert_columns)}) VALUES {', '.join(values)} "
+           f"ON CONFLICT ({fields['word']}, {fields['student']}) DO UPDATE SET "
+           + ', '.join(f'{fields[name]} = {expression}' for name, expression, _ in assignments)
+           + f" RETURNING {fields['word']}, {fields['times_seen']}, {fields['times_correct']}, "
+             f"{fields['next_review']}")
+    update_params = [param for _, _, params in assignments for param in params]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, insert_params + update_params)
+        rows = cursor.fetchall()
+
+    # the returned dates may be given as strings (e.g. by SQLite), so are converted as the ORM would
+    to_date = WordScore._meta.get_field('next_review').to_python
+    return {word_id: (times_seen, times_correct, to_date(next_review))
+            for word_id, times_seen, times_correct, next_review in rows}
+
+
+def _save_word_scores(student, answers, today):
+    """Apply the rules of upsert_word_scores with bulk_create and bulk_update, for databases without upserts. The
+    student's existing WordScores are locked while they are changed (where supported)."""
+    word_scores = {word_score.word_id: word_score for word_score in
+                   WordScore.objects.select_for_update().filter(student=student, word_id__in=answers)}
+    now = timezone.now()
+    word_scores_to_create = []
+    word_scores_to_update = []
+
+    for word_id, is_correct in answers.items():
+        word_score = word_scores.get(word_id)
+        if word_score is None:
+            word_score = WordScore(word_id=word_id, student=student, consecutive_correct=int(is_correct), times_seen=1,
+                                   times_correct=int(is_correct), last_updated=now,
+                                   next_review=(today + datetime.timedelta(QUIZ_INTERVALS[0])) if is_correct else today)
+            word_scores[word_id] = word_score
+            word_scores_to_create.append(word_score)
+        elif word_score.next_review <= today or not is_correct:
+            word_score.times_seen += 1
+            if is_correct:
+                word_score.set_next_review(today=today)
+                word_score.consecutive_correct += 1
+                word_score.times_correct += 1
+            else:
+                word_score.next_review = today
+                word_score.consecutive_correct = 0
+            word_score.last_updated = now
+            word_scores_to_update.append(word_score)
+
+    WordScore.objects.bulk_create(word_scores_to_create)
+    WordScore.objects.bulk_update(word_scores_to_update, fields=['consecutive_correct', 'times_seen', 'times_correct',
+                                                                 'last_updated', 'next_review'])
+    return {word_id: (word_score.times_seen, word_score.times_correct, word_score.next_review)
+            for word_id, word_score in word_scores.items()}
+
+
 def _log_results(student, today, topic_id, total_correct, total_questions):
     """Log quiz results in the database and update the user's streak."""
     QuizResults.update_user_streak(student, today=today)  # only updates streak if this is user's first quiz taken today
 
     quiz_score = total_correct * CORRECT_ANSWER_PTS
-    QuizResults.objects.create(student=student, topic_id=topic_id,
+    quiz_results = QuizResults(student=student, topic_id=topic_id,
                                correct_answers=total_correct, incorrect_answers=total_questions - total_correct,
                                points=quiz_score, date_created=today)
+    # the DailyResults and Leaderboards are updated here, rather than by the post_save signal handler
+    QuizResults.objects.bulk_create([quiz_results])
+    daily_results.add_quiz_results(quiz_results)
+    leaderboards.add_quiz_results(quiz_results)
@@ -0,0 +1,42 @@
+"""This module hands the results of a quiz from QuizView.post to the results page rendered by QuizView.get after the
+redirect. The results travel in a short-lived, signed and compressed cookie, so no session is written for each quiz and
+any worker process can render the results page."""
+
+from django.core import signing
+
+COOKIE_NAME = 'quiz_results'
+MAX_AGE = 300  # seconds for the student's browser to follow the redirect
+MAX_COOKIE_SIZE = 4000  # browsers need only store 4096 bytes per cookie, including its name and attributes
+SESSION_KEY = 'results'  # results too large for a cookie are kept in the session instead
+
+
+def _get_salt(student):
+    # a cookie can only be read back for the student whose results it holds
+    return f'quizzes.results_handoff:{student.pk}'
+
+
+def store(request, response, results):
+    """Attach the quiz results to the response that redirects the student to their results page."""
+    value = signing.dumps(results, salt=_get_salt(request.user), compress=True)
+    if len(value) > MAX_COOKIE_SIZE:
+        request.session[SESSION_KEY] = results
+        return
+    response.set_cookie(COOKIE_NAME, value, max_age=MAX_AGE, path=request.path, secure=request.is_secure(),
+                        httponly=True, samesite='Lax')
+
+
+def retrieve(request):
+    """Get the quiz results handed to this request, or None if a quiz has not just been taken."""
+    value = request.COOKIES.get(COOKIE_NAME)
+    if value:
+        try:
+            return signing.loads(value, salt=_get_salt(request.user), max_age=MAX_AGE)
+        except signing.BadSignature:
+            pass  # tampered with, expired, or belonging to another student
+    return request.session.pop(SESSION_KEY, None)
+
+
+def clear(request, response):
+    """Remove the results cookie once the results page has been rendered, so a refresh starts a new quiz."""
+    if COOKIE_NAME in request.COOKIES:
+        response.delete_cookie(COOKIE_NAME, path=request.path, samesite='Lax')
@@ -0,0 +1,132 @@
+"""This module simulates students taking quizzes day by day, for the generate_results command.
+
+The same random decisions (how many quizzes to take each day, in which Topics, and which answers are correct) drive both
+the per-quiz path, which logs every quiz through quiz_logger, and the much faster in-memory path, which replays the
+spaced repetition rules of quiz_logger over each student's schedule and returns the final state to be bulk inserted.
+Each student has their own random generator derived from the seed, so the outcome does not depend on the order in which
+students are simulated, nor on how they are divided between worker processes.
+"""
+
+import datetime
+import random
+
+MAX_QUIZZES_PER_DAY = 10
+
+_topics = None  # the Topics available to each worker process (see init_worker)
+
+
+class SimulatedTopic:
+    """A Topic as seen by the simulation: its id, and the ids of its Words in the order quizzes select them."""
+    __slots__ = ('id', 'word_ids')
+
+    def __init__(self, topic_id, word_ids):
+        self.id = topic_id
+        self.word_ids = tuple(sorted(word_ids))
+
+
+class SimulatedStudent:
+    """A student's spaced repetition schedule, streak and quiz history, as held in memory by the simulation."""
+
+    def __init__(self, student_id, scores, streak, last_quiz_date):
+        self.id = student_id
+        self.scores = scores  # {word_id: [consecutive_correct, times_seen, times_correct, next_review]}
+        self.streak = streak
+        self.last_quiz_date = last_quiz_date
+        self.changed_word_ids = set()
+        self.quiz_results = []  # (topic_id, date, correct_answers, incorrect_answers)
+
+    def words_due_revision(self, topic, today):
+        """The Words in the Topic which the student has due revision on the given date, as in Topic.words_due_revision.
+        """
+        return [word_id for word_id in topic.word_ids
+                if word_id not in self.scores or self.scores[word_id][3] <= today]
+
+    def log_results(self, topic, results, today, intervals, max_score):
+        """Apply a quiz's {word_id: is_correct} results, following the same rules as quiz_logger."""
+        for word_id, is_correct in results.items():
+            score = self.scores.get(word_id)
+            if score is None:
+                if is_correct:
+                    self.scores[word_id] = [1, 1, 1, today + datetime.timedelta(intervals[0])]
+                else:
+                    self.scores[word_id] = [0, 1, 0, today]
+            elif score[3] <= today or not is_correct:
+                score[1] += 1
+                if is_correct:
+                    score[3] = today + datetime.timedelta(intervals[min(score[0], max_score)])
+                    score[0] += 1
+                    score[2] += 1
+                else:
+                    score[3] = today
+                    score[0] = 0
+            else:
+                continue
+            self.changed_word_ids.add(word_id)
+
+        # as QuizResults.update_user_streak
+        if self.last_quiz_date is None or self.last_quiz_date < today:
+            if self.last_quiz_date == today - datetime.timedelta(1):
+                self.streak += 1
+            else:
+                self.streak = 1
+            self.last_quiz_date = today
+
+        correct_answers = sum(results.values())
+        self.quiz_results.append((topic.id, today, correct_answers, len(results) - correct_answers))
+
+
+def get_random(seed, student_id):
+    """Get the random generator for the given student's simulation."""
+    return random.Random(f'{seed}:{student_id}')
+
+
+def simulate_days(rng, topics, date_from, date_to, take_quiz):
+    """Make each day's random decisions, calling take_quiz(topic, quiz_date, rng) for each quiz taken."""
+    quiz_date = date_from
+    while quiz_date <= date_to:
+        # randomly decide how many quizzes to do today, and in which topics
+        quizzes_today = get_quiz_today_count(rng)
+        for topic in rng.choices(topics, k=quizzes_today):
+            take_quiz(topic, quiz_date, rng)
+        quiz_date += datetime.timedelta(1)
+
+
+def simulate_student(student, seed, date_from, date_to, quiz_length, intervals, max_score, topics=None):
+    """Simulate a student taking quizzes on every day from date_from to date_to, entirely in memory.
+
+    Returns the SimulatedStudent, whose state can then be written to the database in bulk.
+    """
+    def take_quiz(topic, quiz_date, rng):
+        words_to_quiz = student.words_due_revision(topic, quiz_date)[:quiz_length]
+        results = {word_id: correct_or_incorrect(rng) for word_id in words_to_quiz}
+        if results:
+            student.log_results(topic, results, quiz_date, intervals, max_score)
+
+    simulate_days(get_random(seed, student.id), _topics if topics is None else topics, date_from, date_to, take_quiz)
+    return student
+
+
+def init_worker(topics):
+    """Set up a worker process in the generate_results pool."""
+    global _topics
+    _topics = topics
+
+
+def get_quiz_today_count(rng):
+    """Helper method to provide a more natural randomised count of quizzes to be taken 'today'."""
+    quiz_count = -1
+    keep_quizzing = True
+    quiz_pc = 90
+    pc_decay = 5  # after each quiz, it becomes slightly less likely the student will do another.
+
+    while keep_quizzing and quiz_count <= MAX_QUIZZES_PER_DAY:
+        quiz_count += 1
+        keep_quizzing = rng.randint(1, 100) <= quiz_pc
+        quiz_pc -= pc_decay
+    return quiz_count
+
+
+def correct_or_incorrect(rng):
+    """Helper method to provide a boolean that is 60% likely to be True."""
+    pc_accurate = 60
+    return rng.randint(1, 100) <= pc_accurate
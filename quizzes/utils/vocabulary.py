@@ -0,0 +1,108 @@
+"""This module holds a compact, in-memory index of each Topic's vocabulary, shared by all the quizzes built by this worker
+process. It allows quiz_builder to choose questions and multiple-choice options without querying the Words table.
+
+Each index is stamped with a version token kept in Django's cache. The signal handlers replace the token whenever a
+Topic or its Words change, so when the cache backend is shared between workers (e.g. Memcached or Redis), a change made
+by one worker invalidates the indexes held by all the others.
+"""
+
+import random
+import uuid
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.db import transaction
+
+from quizzes.models import Topic, Word
+
+VERSION_KEY = 'quizzes:vocabulary:{}'
+
+_vocabularies = {}
+
+
+class TopicVocabulary:
+    """An array-backed snapshot of a Topic's Words (in id order), along with the Topic's visibility settings."""
+    __slots__ = ('is_hidden', 'available_from', 'ids', 'origins', 'targets', 'version')
+
+    def __init__(self, topic, words, version):
+        self.is_hidden = topic['is_hidden']
+        self.available_from = topic['available_from']
+        self.ids = array('q', (word[0] for word in words))
+        self.origins = tuple(word[1] for word in words)
+        self.targets = tuple(word[2] for word in words)
+        self.version = version
+
+    def __len__(self):
+        return len(self.ids)
+
+    def is_available(self, today):
+        """Whether students are able to take quizzes in this Topic on the given date."""
+        return not self.is_hidden and self.available_from <= today
+
+    def get_word(self, index):
+        """Get the Word at the given position in the index, in the format used by quiz_builder."""
+        return {'id': self.ids[index], 'origin': self.origins[index], 'target': self.targets[index]}
+
+    def find(self, word_id):
+        """Get the position of the Word with the given id, or None if it is not in this Topic."""
+        index = bisect_left(self.ids, word_id)
+        return index if index < len(self.ids) and self.ids[index] == word_id else None
+
+    def get_unscheduled(self, scheduled_ids, limit):
+        """Get the positions of up to limit Words which are not in the given set of Word ids."""
+        indexes = []
+        for index, word_id in enumerate(self.ids):
+            if len(indexes) == limit:
+                break
+            if word_id not in scheduled_ids:
+                indexes.append(index)
+        return indexes
+
+    def sample(self, k, exclude=None):
+        """Get the positions of k Words chosen uniformly at random from the whole Topic, never including exclude."""
+        picks = random.sample(range(len(self.ids)), min(k + 1, len(self.ids)))  # one spare, in case exclude is picked
+        return [index for index in picks if index != exclude][:k]
+
+
+def get_vocabulary(topic_id):
+    """Get the vocabulary index for the given Topic, building it if necessary. Returns None if there is no such Topic."""
+    version = get_vocabulary_version(topic_id)
+    vocabulary = _vocabularies.get(topic_id)
+    if vocabulary is None or vocabulary.version != version:
+        topic = Topic.objects.filter(pk=topic_id).values('is_hidden', 'available_from').first()
+        if topic is None:
+            return None
+
+        words = list(Word.objects.filter(topics=topic_id).order_by('id').values_list('id', 'origin', 'target'))
+        vocabulary = TopicVocabulary(topic, words, version)
+        _vocabularies[topic_id] = vocabulary
+    return vocabulary
+
+
+def get_vocabulary_version(topic_id):
+    """Get the current version token for the given Topic's vocabulary, creating one if there is none yet."""
+    key = VERSION_KEY.format(topic_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        # a cache backend which stores nothing (e.g. DummyCache) means rebuilding the index every time
+        version = cache.get(key) or uuid.uuid4().hex
+    return version
+
+
+def invalidate(topic_ids):
+    """Discard the vocabulary indexes for the given Topics, in this process and (via the cache) in all others."""
+    def replace_versions():
+        cache.set_many({VERSION_KEY.format(topic_id): uuid.uuid4().hex for topic_id in topic_ids}, timeout=None)
+        for topic_id in topic_ids:
+            _vocabularies.pop(topic_id, None)
+
+    # invalidate again once the change is committed, in case another worker rebuilt its index in the meantime
+    replace_versions()
+    transaction.on_commit(replace_versions)
+
+
+def clear():
+    """Discard every vocabulary index held by this process."""
+    _vocabularies.clear()
@@ -0,0 +1,85 @@
+"""This module maintains the search index of the Words (an SQLite FTS5 table with the trigram tokenizer), from which
+the editor and admin find the Words containing a search term without reading every Word.
+
+The index holds each Word's origin, target and the names of its Topics, under the Word's id. It is kept up to date
+by database triggers (created along with it by the 0024_word_search migration), so that Words and Topics changed in
+bulk, which send no signals, are indexed too. It can also be rebuilt at any time. Terms shorter than a trigram,
+and databases other than SQLite, fall back to icontains.
+"""
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from quizzes.models import Topic, Word
+
+TABLE = 'quizzes_word_search'
+MIN_TERM_LENGTH = 3  # the trigram tokenizer can only find terms of at least three characters
+SEARCH_LIMIT = 20  # maximum number of Words given by search
+WORD_FIELDS = ('origin', 'target')
+INDEXED_FIELDS = WORD_FIELDS + ('topics',)
+FALLBACK_LOOKUPS = {'origin': 'origin__icontains', 'target': 'target__icontains', 'topics': 'topics__name__icontains'}
+
+
+def is_supported():
+    """Whether the database supports the index (SQLite 3.34 added the trigram tokenizer)."""
+    return connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 34)
+
+
+def filter_words(words, terms, fields=WORD_FIELDS):
+    """Filter a queryset of Words to those containing every one of the given search terms (case-insensitively) in any
+    of the given fields."""
+    terms = [term for term in terms if term]
+    if not terms:
+        return words
+    if not is_supported() or any(len(term) < MIN_TERM_LENGTH for term in terms):
+        for term in terms:
+            words = words.filter(Q(*[(FALLBACK_LOOKUPS[field], term) for field in fields], _connector=Q.OR))
+        return words.distinct() if 'topics' in fields else words
+
+    sql = f"SELECT rowid FROM {connection.ops.quote_name(TABLE)} WHERE {connection.ops.quote_name(TABLE)} MATCH %s"
+    return words.filter(pk__in=RawSQL(sql, [_get_match_expression(terms, fields)]))
+
+
+def search(query, limit=SEARCH_LIMIT):
+    """Get the ids of the Words whose origin or target contains the query, best matches first: those beginning with it
+    (in their origin, then in their target), then the rest by relevance."""
+    query = query.strip()
+    if len(query) < MIN_TERM_LENGTH or not is_supported():
+        words = filter_words(Word.objects.all(), [query]) if query else Word.objects.none()
+        return list(words.order_by('origin').values_list('id', flat=True)[:limit])
+
+    table = connection.ops.quote_name(TABLE)
+    prefix = _escape_like(query) + '%'
+    sql = f"SELECT rowid FROM {table} WHERE {table} MATCH %s " \
+          f"ORDER BY CASE WHEN origin LIKE %s ESCAPE '\\' THEN 0 WHEN target LIKE %s ESCAPE '\\' THEN 1 ELSE 2 END, " \
+          f"rank LIMIT %s"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [_get_match_expression([query], WORD_FIELDS), prefix, prefix, limit])
+        return [word_id for word_id, in cursor.fetchall()]
+
+
+def rebuild():
+    """Replace the whole index with the current Words, e.g. after it has been edited by hand."""
+    if not is_supported():
+        return
+    qn = connection.ops.quote_name
+    words, topics, word_topics = (qn(model._meta.db_table) for model in (Word, Topic, Word.topics.through))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {qn(TABLE)}")
+        cursor.execute(f"INSERT INTO {qn(TABLE)} (rowid, origin, target, topics) "
+                       f"SELECT w.id, w.origin, w.target, "
+                       f"(SELECT group_concat(t.name, ' ') FROM {word_topics} wt JOIN {topics} t ON t.id = wt.topic_id "
+                       f"WHERE wt.word_id = w.id) "
+                       f"FROM {words} w")
+
+
+def _get_match_expression(terms, fields):
+    # each term is quoted as a phrase (so its own quotes are doubled), which the trigram tokenizer finds as a substring
+    columns = '{' + ' '.join(fields) + '}'
+    phrases = ['"' + term.replace('"', '""') + '"' for term in terms]
+    return ' AND '.join(f'{columns} : {phrase}' for phrase in phrases)
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
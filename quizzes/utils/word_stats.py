@@ -0,0 +1,76 @@
+"""This module maintains the WordStats rollup, i.e. the total of every student's WordScore for each Word, from which
+the class's weakest Words are read. Totals are adjusted as each quiz is logged, and can be rebuilt from the WordScores
+at any time."""
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from quizzes.models import WordScore, WordStats
+
+TOTALS = ('times_seen', 'times_correct', 'students')
+
+
+def add(rows):
+    """Add to the totals of WordStats rows, creating any that don't yet exist.
+
+    Each row is given as (word_id, times_seen, times_correct, students). As in daily_results, the additions are made
+    by the database from the row as it stands.
+    """
+    qn = connection.ops.quote_name
+    table = qn(WordStats._meta.db_table)
+    columns = [qn(WordStats._meta.get_field(name).column) for name in ('word',) + TOTALS]
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) " \
+          f"ON CONFLICT ({columns[0]}) DO UPDATE SET " + \
+          ', '.join(f'{column} = {table}.{column} + EXCLUDED.{column}' for column in columns[1:])
+
+    params = [tuple(row) for row in rows if any(row[1:])]
+    if params:
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+
+
+def add_changes(before, after):
+    """Add the changes made to a student's WordScores, given as {word_id: (times_seen, times_correct, ...)} before (for
+    those which already existed) and after the change."""
+    rows = []
+    for word_id, (times_seen, times_correct, *_) in after.items():
+        seen_before, correct_before, *_ = before.get(word_id, (0, 0))
+        rows.append((word_id, times_seen - seen_before, times_correct - correct_before, 0 if word_id in before else 1))
+    add(rows)
+
+
+@transaction.atomic
+def subtract(rows):
+    """Take the given totals away (e.g. those of a deleted student), removing any Words no longer seen by anyone."""
+    qn = connection.ops.quote_name
+    columns = [qn(WordStats._meta.get_field(name).column) for name in ('word',) + TOTALS]
+    sql = f"UPDATE {qn(WordStats._meta.db_table)} SET " + \
+          ', '.join(f'{column} = {column} - %s' for column in columns[1:]) + f" WHERE {columns[0]} = %s"
+
+    rows = list(rows)
+    if rows:
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, [(*totals, word_id) for word_id, *totals in rows])
+        WordStats.objects.filter(word_id__in=[row[0] for row in rows], students=0).delete()
+
+
+def summarise(word_ids=None, student_id=None):
+    """Total up the WordScores of the given Words (by default, of every Word), or of only one student, returning rows
+    in the form expected by add."""
+    scores = WordScore.objects.all()
+    if word_ids is not None:
+        scores = scores.filter(word_id__in=word_ids)
+    if student_id is not None:
+        scores = scores.filter(student_id=student_id)
+    return list(scores.values('word_id')
+                .annotate(total_seen=Sum('times_seen'), total_correct=Sum('times_correct'), students=Count('id'))
+                .order_by()
+                .values_list('word_id', 'total_seen', 'total_correct', 'students'))
+
+
+@transaction.atomic
+def rebuild(word_ids=None):
+    """Replace the WordStats of the given Words (by default, of every Word) with the totals of their WordScores."""
+    stats = WordStats.objects.all() if word_ids is None else WordStats.objects.filter(word_id__in=word_ids)
+    stats.delete()
+    add(summarise(word_ids))
@@ -0,0 +1,322 @@
+"""This module implements the optional write-behind mode for quiz results (see the WRITE_BEHIND_RESULTS setting).
+
+Normally each quiz submission is written to the database in its own transaction, which on SQLite queues every
+classroom's submissions behind a single writer lock. In write-behind mode, a submission is instead marked in memory
+(using the Topic's vocabulary index), appended to a journal file on local disk and acknowledged straight away. A
+background thread then writes everything submitted in the last WRITE_BEHIND_INTERVAL_MS milliseconds, for all students,
+in a single transaction.
+
+Each journal file is locked by the process appending to it, and deleted once its contents have been committed. A file
+left behind by a process that crashed is replayed by the next process to start flushing (or by the
+replay_results_journal command). A FlushedJournal row is committed along with each batch, so that a file whose
+process crashed after committing it, but before deleting it, is never applied twice.
+
+A batch which fails MAX_FLUSH_ATTEMPTS times in a row is applied one submission at a time, and any submission which
+still fails is logged and moved aside to a dead-letter file (the journal's name, ending in DEAD_LETTER_SUFFIX), so that
+it no longer holds up the batches behind it. Renaming that file to end in JOURNAL_SUFFIX replays it.
+"""
+
+import atexit
+import datetime
+import json
+import logging
+import os
+import threading
+import uuid
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, transaction
+from django.http import Http404
+
+from myproject.settings import RESULTS_JOURNAL_DIR, WRITE_BEHIND_INTERVAL_MS
+from quizzes.models import FlushedJournal, Topic, Word
+from quizzes.utils import quiz_cache, vocabulary
+from quizzes.utils.quiz_logger import record_results
+from users.models import User
+
+try:
+    import fcntl
+except ImportError:  # e.g. on Windows
+    fcntl = None
+
+JOURNAL_SUFFIX = '.journal'
+DEAD_LETTER_SUFFIX = '.failed'
+MAX_FLUSH_ATTEMPTS = 5
+
+logger = logging.getLogger(__name__)
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+class Journal:
+    """An append-only file of quiz submissions, one JSON object per line, locked by the process using it."""
+
+    def __init__(self, path, file):
+        self.path = path
+        self.file = file
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    @classmethod
+    def create(cls, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, uuid.uuid4().hex + JOURNAL_SUFFIX)
+        file = open(path, 'a+', encoding='utf-8')
+        fcntl.flock(file, fcntl.LOCK_EX)
+        return cls(path, file)
+
+    @classmethod
+    def claim(cls, path):
+        """Lock a journal left behind by another process. Returns None if the journal is still in use (or is gone)."""
+        try:
+            file = open(path, 'a+', encoding='utf-8')
+        except FileNotFoundError:
+            return None
+
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            file.close()
+            return None
+
+        # the owner may have flushed and deleted the journal while it was being opened
+        if not os.path.exists(path):
+            file.close()
+            return None
+        return cls(path, file)
+
+    def append(self, entry):
+        """Durably add a submission to the journal."""
+        self.file.write(json.dumps(entry) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def read(self):
+        """Get all the submissions in the journal, ignoring a final line left incomplete by a crash."""
+        self.file.seek(0)
+        entries = []
+        for line in self.file:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                if line.endswith('\n'):
+                    raise
+        return entries
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass  # already removed by an earlier attempt, which failed after deleting it
+        self.file.close()
+
+
+class WriteBehindQueue:
+    """The journal and pending submissions of this process, along with the background thread which flushes them."""
+
+    def __init__(self, directory, interval_ms):
+        self.directory = directory
+        self.interval = interval_ms / 1000
+        self._lock = threading.Lock()  # guards the current journal and its pending submissions
+        self._flush_lock = threading.Lock()  # ensures flushes are applied one at a time, in order
+        self._journal = None
+        self._pending = []
+        self._unflushed = []  # (journal, submissions) rotated out of use, but not yet committed
+        self._failed_attempts = 0  # consecutive failures to commit the oldest unflushed journal
+        self._flusher = None
+        self._stopped = threading.Event()
+
+    def append(self, entry):
+        with self._lock:
+            if self._journal is None:
+                self._journal = Journal.create(self.directory)
+            self._journal.append(entry)
+            self._pending.append(entry)
+
+    def start(self):
+        """Start the background flusher, if it is not already running."""
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, name='quiz-results-flusher', daemon=True)
+                self._flusher.start()
+                atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the background flusher, once it has committed every submission appended so far."""
+        self._stopped.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+    def flush(self):
+        """Commit every submission appended so far. Returns the number of submissions written."""
+        with self._flush_lock:
+            with self._lock:
+                if self._pending:
+                    self._unflushed.append((self._journal, self._pending))
+                    self._journal, self._pending = None, []
+
+            flushed = 0
+            while self._unflushed:
+                journal, entries = self._unflushed[0]
+                try:
+                    flushed += apply_journal(journal, entries)
+                except Exception:
+                    self._failed_attempts += 1
+                    if self._failed_attempts < MAX_FLUSH_ATTEMPTS:
+                        raise
+                    logger.exception("Failed to flush %s %d times, so applying its submissions one at a time.",
+                                     journal.name, self._failed_attempts)
+                    flushed += apply_journal(journal, entries, isolate_failures=True)
+                self._failed_attempts = 0
+                self._unflushed.pop(0)
+            return flushed
+
+    def recover(self):
+        """Replay any journals in the directory which were left behind by crashed processes."""
+        if not os.path.isdir(self.directory):
+            return 0
+
+        replayed = 0
+        for filename in sorted(os.listdir(self.directory)):
+            if filename.endswith(JOURNAL_SUFFIX):
+                journal = Journal.claim(os.path.join(self.directory, filename))
+                if journal is None:
+                    continue
+                try:
+                    replayed += apply_journal(journal, journal.read())
+                except Exception:
+                    # left for the next process to retry, without holding up the journals after it
+                    logger.exception("Failed to replay %s.", journal.name)
+                    journal.file.close()
+        return replayed
+
+    def _run(self):
+        try:
+            self.recover()
+        except Exception:
+            logger.exception("Failed to replay the quiz results journal.")
+
+        while not self._stopped.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                # the submissions are kept, in memory and on disk, and will be retried on the next flush
+                logger.exception("Failed to flush the quiz results journal.")
+            finally:
+                close_old_connections()
+
+
+def submit(results, student, topic_id, queue=None):
+    """Mark a Quiz without touching the database, and queue its results to be written by the background flusher.
+
+    Returns the data for the results page, in the same format as quiz_logger.process_results. A queue other than this
+    process's own may be given, in which case it is up to the caller to flush it.
+    """
+    topic_vocabulary = vocabulary.get_vocabulary(topic_id)
+    if topic_vocabulary is None:
+        raise Http404("No Topic matches the given query.")
+
+    results_page_data = {'words': []}
+    answers = {}
+    for word_id, is_correct in results.items():
+        index = topic_vocabulary.find(int(word_id))
+        if index is not None:
+            answers[str(topic_vocabulary.ids[index])] = is_correct
+            results_page_data['words'].append((topic_vocabulary.origins[index], topic_vocabulary.targets[index],
+                                               is_correct))
+
+    entry = {'student': student.id, 'topic': topic_id, 'date': datetime.date.today().isoformat(), 'answers': answers}
+    if queue is None:
+        queue = get_queue()
+        queue.start()
+    queue.append(entry)
+
+    results_page_data['correct'] = sum(answers.values())
+    results_page_data['total'] = len(answers)
+    return results_page_data
+
+
+def get_queue():
+    """Get this process's write-behind queue."""
+    global _queue
+    if fcntl is None:
+        raise ImproperlyConfigured("Write-behind mode for quiz results is only supported on POSIX platforms.")
+
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteBehindQueue(RESULTS_JOURNAL_DIR, WRITE_BEHIND_INTERVAL_MS)
+        return _queue
+
+
+def apply_journal(journal, entries, isolate_failures=False):
+    """Write the given submissions from a journal to the database in a single transaction, then delete the journal.
+
+    If isolate_failures is set, each submission is applied in its own savepoint, and those which fail are moved to a
+    dead-letter file rather than failing the whole batch. Returns the number of submissions written (which is 0 if the
+    journal had already been committed).
+    """
+    applied = 0
+    with transaction.atomic():
+        if not FlushedJournal.objects.filter(name=journal.name).exists():
+            if isolate_failures:
+                applied = _apply_entries_isolated(journal, entries)
+            else:
+                applied = _apply_entries(entries)
+            FlushedJournal.objects.create(name=journal.name)
+
+    journal.remove()
+    FlushedJournal.objects.filter(name=journal.name).delete()
+    return applied
+
+
+def _apply_entries_isolated(journal, entries):
+    applied = 0
+    failed = []
+    for entry in entries:
+        try:
+            with transaction.atomic():
+                applied += _apply_entries([entry])
+        except Exception:
+            logger.exception("Failed to write a quiz submission from %s: %s", journal.name, json.dumps(entry))
+            failed.append(entry)
+
+    if failed:
+        # written before the batch commits, so a failed commit only leaves a dead-letter file to be written again
+        path = journal.path[:-len(JOURNAL_SUFFIX)] + DEAD_LETTER_SUFFIX
+        with open(path, 'w', encoding='utf-8') as file:
+            file.writelines(json.dumps(entry) + '\n' for entry in failed)
+            file.flush()
+            os.fsync(file.fileno())
+        logger.error("Moved %d quiz submissions which could not be written to %s.", len(failed), path)
+    return applied
+
+
+def _apply_entries(entries):
+    students = User.objects.in_bulk({entry['student'] for entry in entries})
+    topic_ids = set(Topic.objects.filter(pk__in={entry['topic'] for entry in entries}).values_list('id', flat=True))
+    word_ids = set(Word.objects.filter(pk__in={int(word_id) for entry in entries for word_id in entry['answers']})
+                   .values_list('id', flat=True))
+
+    applied = 0
+    next_quizzes = set()
+    for entry in entries:
+        student = students.get(entry['student'])
+        topic_id = entry['topic']
+
+        # the student, Topic or Words may have been deleted since the quiz was submitted
+        if student is None or topic_id not in topic_ids:
+            continue
+        answers = {int(word_id): is_correct for word_id, is_correct in entry['answers'].items()
+                   if int(word_id) in word_ids}
+
+        record_results(student, topic_id, answers, datetime.date.fromisoformat(entry['date']))
+        next_quizzes.add((student, topic_id))
+        applied += 1
+
+    for student, topic_id in next_quizzes:
+        quiz_cache.pregenerate_later(student, [topic_id])
+    return applied
@@ -2,14 +2,15 @@ import datetime
 import json
 
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import FilteredRelation, Q, F, Count, ExpressionWrapper, BooleanField
+from django.db.models import FilteredRelation, Q, ExpressionWrapper, BooleanField, OuterRef, Subquery
 from django.shortcuts import render, redirect
 from django.urls import reverse
 from django.views import View
 from django.views.generic import ListView, DetailView
 
-from quizzes.models import Topic, Word
-from quizzes.utils import quiz_builder
+from myproject.settings import WRITE_BEHIND_RESULTS
+from quizzes.models import Topic, Word, DueWordCount
+from quizzes.utils import due_counts, quiz_cache, results_handoff, write_behind
 from quizzes.utils.quiz_logger import process_results
 
 
@@ -23,16 +24,15 @@ class HomeView(LoginRequiredMixin, ListView):
         # topics that are hidden, future-scheduled, or have fewer than 4 words, are only visible to teachers
         today = datetime.date.today()
         topics = Topic.objects.annotate(
-            word_count=Count('words', distinct=True),
             future_avail_from=ExpressionWrapper(Q(available_from__gt=today), output_field=BooleanField()),
             is_visible=ExpressionWrapper(Q(is_hidden=False) & Q(future_avail_from=False), output_field=BooleanField()))
 
         if not self.request.user.is_teacher:
             # exclude non-visible topics from student's homepage, add details of words due revision
             student = self.request.user
-            topics = topics.filter(is_visible=True, word_count__gte=4)\
-                .annotate(words_due=F('word_count') - Count('id', filter=Q(words__wordscore__next_review__gt=today) &
-                                                            Q(words__wordscore__student=student)))
+            due_counts.refresh_student(student, today=today)
+            words_due = DueWordCount.objects.filter(student=student, topic=OuterRef('pk')).values('words_due')
+            topics = topics.filter(live_from__lte=today).annotate(words_due=Subquery(words_due))
 
         return topics.order_by('available_from', 'date_created')
 
@@ -77,24 +77,33 @@ class QuizView(LoginRequiredMixin, View):
         results = json.loads(data)
         student = self.request.user
 
-        results_page_data = process_results(results, student, topic_id)
-        self.request.session['results'] = results_page_data
+        if WRITE_BEHIND_RESULTS:
+            # the results are written in the background, after which the student's next quiz is pre-generated
+            results_page_data = write_behind.submit(results, student, topic_id)
+        else:
+            results_page_data = process_results(results, student, topic_id)
+
+            # get the student's next quiz in this topic ready while they look at their results
+            quiz_cache.pregenerate_later(student, [topic_id])
 
         # redirect to prevent results being resubmitted if page is refreshed
-        return redirect(self.request.path)
+        response = redirect(self.request.path)
+        results_handoff.store(self.request, response, results_page_data)
+        return response
 
     def get(self, *args, topic_id, **kwargs):
         """Renders the results page or a new quiz depending on whether a quiz has just been taken or not."""
-        results = self.request.session.get('results', False)
+        results = results_handoff.retrieve(self.request)
 
         # a quiz has just been taken, render the results page
         if results:
-            del self.request.session['results']
-            return render(self.request, 'quizzes/quiz_results.html', results)
+            response = render(self.request, 'quizzes/quiz_results.html', results)
+            results_handoff.clear(self.request, response)
+            return response
 
         # a new quiz is being started, obtain the question data and render the quiz page
         else:
-            quiz_data = quiz_builder.get_quiz(self.request.user, topic_id=topic_id)
+            quiz_data = quiz_cache.take_quiz(self.request.user, topic_id)
             if quiz_data['questions']:
                 return render(self.request, 'quizzes/quiz.html', {'quiz': quiz_data})
 
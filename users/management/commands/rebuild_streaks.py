@@ -0,0 +1,34 @@
+import datetime
+
+from django.core.management import BaseCommand
+
+from quizzes.models import QuizResults
+from users.models import User
+
+
+class Command(BaseCommand):
+    """Terminal command for recalculating every student's streak from their full quiz history."""
+
+    help = 'Rebuild each student\'s streak and last quiz date from their QuizResults, e.g. after importing results.'
+
+    def handle(self, *args, **kwargs):
+        streaks = {}  # student_id: (streak, last_quiz_date)
+
+        # a single pass over each student's quiz days in order, comparing each day only with the one before it
+        quiz_days = QuizResults.objects.values_list('student_id', 'date_created').distinct()\
+            .order_by('student_id', 'date_created')
+        for student_id, date_created in quiz_days.iterator():
+            streak, last_quiz_date = streaks.get(student_id, (0, None))
+            if last_quiz_date == date_created - datetime.timedelta(1):
+                streak += 1
+            else:
+                streak = 1
+            streaks[student_id] = (streak, date_created)
+
+        users_to_update = []
+        for user in User.objects.only('id', 'streak', 'last_quiz_date').iterator():
+            user.streak, user.last_quiz_date = streaks.get(user.id, (0, None))
+            users_to_update.append(user)
+
+        User.objects.bulk_update(users_to_update, fields=['streak', 'last_quiz_date'], batch_size=500)
+        self.stdout.write(f"Streaks rebuilt for {len(users_to_update)} users ({len(streaks)} with quiz history).")
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.5 on 2026-10-18 03:41
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+
+def set_last_quiz_dates(apps, schema_editor):
+    """Take each student's latest quiz as the day their streak was last extended, so existing streaks carry over."""
+    User = apps.get_model('users', 'User')
+    QuizResults = apps.get_model('quizzes', 'QuizResults')
+    latest_quiz = QuizResults.objects.filter(student_id=OuterRef('pk'))\
+        .values('student_id').annotate(latest=Max('date_created')).values('latest')
+    User.objects.update(last_quiz_date=Subquery(latest_quiz))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_remove_teacherprofile_user_remove_user_is_student_and_more'),
+        ('quizzes', '0018_flushedjournal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='last_quiz_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_teacher', False)), fields=['-streak', 'last_quiz_date'], name='student_streak_idx'),
+        ),
+        migrations.RunPython(set_last_quiz_dates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.5 on 2026-10-18 05:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_last_quiz_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_teacher', False)), fields=['last_name', 'id'], name='student_name_idx'),
+        ),
+    ]
@@ -10,9 +10,19 @@ class User(AbstractUser):
 
     is_teacher = models.BooleanField(default=False)
     streak = models.PositiveIntegerField(default=0)
+    last_quiz_date = models.DateField(null=True, blank=True)  # the day on which streak was last extended
 
     REQUIRED_FIELDS = ['is_teacher']
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # the longest current streaks are read by walking this index from the top, skipping broken streaks
+            models.Index(fields=['-streak', 'last_quiz_date'], condition=models.Q(is_teacher=False),
+                         name='student_streak_idx'),
+            # students without points are listed by name below the leaderboards (see chart_data)
+            models.Index(fields=['last_name', 'id'], condition=models.Q(is_teacher=False), name='student_name_idx'),
+        ]
+
     def __str__(self):
         if self.is_superuser:
             role = "Admin"
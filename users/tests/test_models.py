@@ -1,5 +1,10 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
+from quizzes.models import QuizResults, Topic
 from users.models import User
 
 
@@ -21,3 +26,26 @@ class UserModelTests(TestCase):
         user = User.objects.create_superuser(username='test_user', first_name='test', last_name='user')
         expected = 'test user (Admin)'
         self.assertEqual(expected, str(user))
+
+
+class RebuildStreaksTests(TestCase):
+    def test_rebuild_streaks(self):
+        today = datetime.date.today()
+        topic = Topic.objects.create(name='Animals')
+        student = User.objects.create_user(username='student', streak=50)
+        lapsed_student = User.objects.create_user(username='lapsed_student')
+        new_student = User.objects.create_user(username='new_student', streak=3, last_quiz_date=today)
+
+        # three days in a row (with two quizzes on the last), after an earlier one-day streak
+        for days_ago in (0, 0, 1, 2, 5):
+            QuizResults.objects.create(student=student, topic=topic, date_created=today - datetime.timedelta(days_ago))
+        QuizResults.objects.create(student=lapsed_student, topic=topic, date_created=today - datetime.timedelta(10))
+
+        call_command('rebuild_streaks', stdout=StringIO())
+
+        for user, streak, last_quiz_date in ((student, 3, today),
+                                             (lapsed_student, 1, today - datetime.timedelta(10)),
+                                             (new_student, 0, None)):
+            user.refresh_from_db()
+            self.assertEqual(streak, user.streak)
+            self.assertEqual(last_quiz_date, user.last_quiz_date)